@@ -0,0 +1,128 @@
+import json
+from pathlib import Path
+
+import pytest
+from brownie import network
+
+# The benchmarks run on the same session fixtures as the tests
+from tests.conftest import (  # noqa: F401
+    amount,
+    dai_whale,
+    eth_whale,
+    gov,
+    golden_state,
+    guardian,
+    healthCheck,
+    isolation,
+    keeper,
+    lqty_whale,
+    lusd_whale,
+    management,
+    mock_protocol,
+    protocol,
+    protocol_addresses,
+    rewards,
+    stability_pool,
+    strategist,
+    strategy,
+    swap_lib,
+    test_strategy,
+    test_vault,
+    token,
+    user,
+    vault,
+    weth,
+    weth_amout,
+)
+
+# Gas used by every scenario, recorded against the local mock protocol stack
+BASELINE_PATH = Path(__file__).parent / "gas_baseline.json"
+
+# Gas used by the scenarios run in this session
+GAS_USED = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--gas-tolerance",
+        type=float,
+        default=2.0,
+        help="Fail scenarios using more than this percentage over the baseline",
+    )
+    parser.addoption(
+        "--update-gas-baseline",
+        action="store_true",
+        default=False,
+        help="Write the gas used by the scenarios run to the baseline file",
+    )
+
+
+def load_baseline():
+    if not BASELINE_PATH.exists():
+        return {}
+    with BASELINE_PATH.open() as fp:
+        return json.load(fp)
+
+
+@pytest.fixture(scope="session")
+def baseline():
+    yield load_baseline()
+
+
+@pytest.fixture(scope="session")
+def record_gas(request, baseline):
+    tolerance = request.config.getoption("--gas-tolerance")
+    update = request.config.getoption("--update-gas-baseline")
+
+    def record(scenario, tx):
+        GAS_USED[scenario] = tx.gas_used
+        if update:
+            return
+
+        assert (
+            scenario in baseline
+        ), f"{scenario} has no baseline, record it with --update-gas-baseline"
+
+        limit = baseline[scenario] * (1 + tolerance / 100)
+        assert tx.gas_used <= limit, (
+            f"{scenario} used {tx.gas_used} gas, "
+            f"{_delta(tx.gas_used, baseline[scenario]):+.2f}% over the baseline "
+            f"({baseline[scenario]}, tolerance {tolerance}%)"
+        )
+
+    yield record
+
+
+@pytest.fixture(scope="session", autouse=True)
+def local():
+    # Gas depends on the state of the protocol, so baselines are only
+    # comparable when recorded against the local mocks
+    if network.show_active().endswith("-fork"):
+        pytest.skip("gas benchmarks run on the development network")
+    yield True
+
+
+def _delta(gas_used, baseline):
+    return (gas_used / baseline - 1) * 100
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not GAS_USED:
+        return
+
+    baseline = load_baseline()
+    terminalreporter.write_sep("=", "gas report")
+    for scenario, gas_used in sorted(GAS_USED.items()):
+        line = f"{scenario:<40} {gas_used:>10}"
+        if scenario in baseline:
+            line += f" {_delta(gas_used, baseline[scenario]):+8.2f}%"
+        else:
+            line += "      (new)"
+        terminalreporter.write_line(line)
+
+    if config.getoption("--update-gas-baseline"):
+        baseline.update(GAS_USED)
+        with BASELINE_PATH.open("w") as fp:
+            json.dump(baseline, fp, indent=4, sort_keys=True)
+            fp.write("\n")
+        terminalreporter.write_line(f"baseline written to {BASELINE_PATH.name}")
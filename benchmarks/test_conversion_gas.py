@@ -0,0 +1,132 @@
+import pytest
+
+from brownie import Wei
+
+
+@pytest.fixture(params=["", "_direct_pools"])
+def venue(request, test_strategy, gov):
+    # Uniswap legs are measured through the router and on the pools directly.
+    # The suffix is appended to the scenario names
+    test_strategy.setSwapOnPoolsDirectly(request.param != "", {"from": gov})
+    yield request.param
+
+
+def test_sell_lqty_for_dai(test_strategy, protocol, lqty_whale, venue, record_gas):
+    lqty = protocol["lqty"]
+    lqty.transfer(test_strategy, 100 * 10 ** 18, {"from": lqty_whale})
+
+    tx = test_strategy.sellLQTYforDAI()
+
+    record_gas(f"sell_lqty_for_dai{venue}", tx)
+    assert lqty.balanceOf(test_strategy) == 0
+
+
+def test_sell_eth_for_dai(test_strategy, gov, venue, record_gas):
+    gov.transfer(test_strategy, Wei("1 ether"))
+
+    tx = test_strategy.sellETHforDAI()
+
+    record_gas(f"sell_eth_for_dai{venue}", tx)
+    assert test_strategy.balance() == 0
+
+
+@pytest.mark.parametrize(
+    "source,name",
+    [(1, "last_good_price"), (2, "chainlink"), (3, "uniswap_twap")],
+)
+def test_sell_eth_for_dai_with_price_source(
+    test_strategy, gov, source, name, record_gas
+):
+    # Compared with sell_eth_for_dai, which calls Liquity's fetchPrice.
+    # lastGoodPrice is fetched once and then read until it gets old
+    test_strategy.setPriceSource(source, 3600, 1800, {"from": gov})
+    gov.transfer(test_strategy, Wei("1 ether"))
+    test_strategy.sellETHforDAI()
+    gov.transfer(test_strategy, Wei("1 ether"))
+
+    tx = test_strategy.sellETHforDAI()
+
+    record_gas(f"sell_eth_for_dai_{name}", tx)
+    assert test_strategy.balance() == 0
+
+
+def test_sell_dai_for_lusd_on_curve(
+    test_strategy, protocol, dai_whale, gov, record_gas
+):
+    protocol["dai"].transfer(test_strategy, 1_000 * 10 ** 18, {"from": dai_whale})
+    test_strategy.setConvertDAItoLUSDonCurve(True, {"from": gov})
+
+    tx = test_strategy.sellDAIforLUSD()
+
+    record_gas("sell_dai_for_lusd_curve", tx)
+    assert protocol["dai"].balanceOf(test_strategy) == 0
+
+
+def test_sell_dai_for_lusd_on_best_venue(
+    test_strategy, protocol, dai_whale, gov, record_gas
+):
+    # Quotes both venues before selling on Curve
+    test_strategy.setSelectBestDAItoLUSDVenue(True, {"from": gov})
+    protocol["dai"].transfer(test_strategy, 1_000 * 10 ** 18, {"from": dai_whale})
+
+    tx = test_strategy.sellDAIforLUSD()
+
+    record_gas("sell_dai_for_lusd_best_venue", tx)
+    assert protocol["dai"].balanceOf(test_strategy) == 0
+
+
+def test_sell_dai_for_lusd_on_uniswap(
+    test_strategy, protocol, dai_whale, gov, venue, record_gas
+):
+    protocol["dai"].transfer(test_strategy, 1_000 * 10 ** 18, {"from": dai_whale})
+    test_strategy.setConvertDAItoLUSDonCurve(False, {"from": gov})
+
+    tx = test_strategy.sellDAIforLUSD()
+
+    record_gas(f"sell_dai_for_lusd_uniswap{venue}", tx)
+    assert protocol["dai"].balanceOf(test_strategy) == 0
+
+
+def test_sell_rewards_in_single_swap(
+    test_strategy, protocol, lqty_whale, gov, venue, record_gas
+):
+    protocol["lqty"].transfer(test_strategy, 100 * 10 ** 18, {"from": lqty_whale})
+    gov.transfer(test_strategy, Wei("1 ether"))
+
+    tx = test_strategy.sellRewardsInSingleSwap()
+
+    record_gas(f"sell_rewards_single_swap{venue}", tx)
+    assert test_strategy.balance() == 0
+
+
+def test_sell_dai_for_lusd_in_split_order(
+    test_strategy, protocol, dai_whale, gov, record_gas
+):
+    # 10 steps quoting Curve and two Uniswap pools
+    protocol["dai"].transfer(test_strategy, 1_000_000 * 10 ** 18, {"from": dai_whale})
+    test_strategy.setSplitOrder([500, 100], 10, {"from": gov})
+
+    tx = test_strategy.sellDAIforLUSD()
+
+    record_gas("sell_dai_for_lusd_split_order", tx)
+    assert protocol["dai"].balanceOf(test_strategy) == 0
+
+
+@pytest.mark.parametrize("leg,name", [(0, "eth_to_dai"), (1, "dai_to_lusd_curve")])
+def test_sell_with_slippage_policy(
+    test_strategy, protocol, dai_whale, gov, leg, name, record_gas
+):
+    # Compared with sell_eth_for_dai and sell_dai_for_lusd_curve, the depth of
+    # the pool is read to scale the slippage tolerance
+    test_strategy.setSlippagePolicy(leg, (True, 30, 10_000, 500), {"from": gov})
+    if leg == 0:
+        gov.transfer(test_strategy, Wei("1 ether"))
+        tx = test_strategy.sellETHforDAI()
+        assert test_strategy.balance() == 0
+    else:
+        protocol["dai"].transfer(test_strategy, 1_000 * 10 ** 18, {"from": dai_whale})
+        test_strategy.setConvertDAItoLUSDonCurve(True, {"from": gov})
+        tx = test_strategy.sellDAIforLUSD()
+        assert protocol["dai"].balanceOf(test_strategy) == 0
+
+    record_gas(f"sell_{name}_slippage_policy", tx)
@@ -0,0 +1,273 @@
+from brownie import chain, Wei
+
+from scripts.mock_protocol import protocol_addresses
+
+# Liquidation offsetting 1M LUSD of debt against the Stability Pool. The
+# collateral sets whether depositors end up with a profit or a loss
+DEBT = 1_000_000 * 10 ** 18
+
+
+def encode_path(tokens, fees):
+    # Uniswap v3 path: token + n * (fee + token)
+    path = bytes.fromhex(tokens[0].address[2:])
+    for fee, token in zip(fees, tokens[1:]):
+        path += fee.to_bytes(3, "big") + bytes.fromhex(token.address[2:])
+    return path
+
+
+def deposit_and_harvest(vault, strategy, token, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    return strategy.harvest()
+
+
+def test_first_deposit(vault, strategy, token, user, amount, record_gas):
+    tx = deposit_and_harvest(vault, strategy, token, user, amount)
+
+    record_gas("harvest_first_deposit", tx)
+    assert strategy.estimatedTotalAssets() == amount
+
+
+def test_harvest_without_gains(vault, strategy, token, user, amount, record_gas):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+
+    # Same block timestamp: no LQTY issued and no liquidations
+    tx = strategy.harvest()
+
+    record_gas("harvest_without_gains", tx)
+
+
+def test_profitable_harvest(
+    vault, strategy, token, user, amount, stability_pool, gov, record_gas
+):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+
+    # A day of LQTY issuance and a liquidation at 150% collateral ratio
+    chain.sleep(24 * 3600)
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("500 ether")})
+    assert stability_pool.getDepositorETHGain(strategy) > 0
+    assert stability_pool.getDepositorLQTYGain(strategy) > 0
+
+    tx = strategy.harvest()
+
+    record_gas("harvest_profit_lqty_eth", tx)
+    assert tx.events["Harvested"]["profit"] > 0
+
+
+def test_profitable_harvest_with_lqty_valuation(
+    vault, strategy, token, user, amount, stability_pool, gov, record_gas
+):
+    # Counting LQTY in estimatedTotalAssets should not add to
+    # harvest_profit_lqty_eth
+    strategy.setLQTYValuation(True, 1_000, {"from": gov})
+    deposit_and_harvest(vault, strategy, token, user, amount)
+
+    chain.sleep(24 * 3600)
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("500 ether")})
+
+    tx = strategy.harvest()
+
+    record_gas("harvest_profit_lqty_eth_lqty_valuation", tx)
+    assert tx.events["Harvested"]["profit"] > 0
+
+
+def test_profitable_harvest_with_sale_caps(
+    vault, strategy, token, user, amount, stability_pool, gov, record_gas
+):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+    # Part of both rewards is carried over
+    strategy.setMaxSaleValues(10 ** 18, 10 ** 18, {"from": gov})
+
+    chain.sleep(24 * 3600)
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("500 ether")})
+
+    tx = strategy.harvest()
+
+    record_gas("harvest_profit_lqty_eth_sale_caps", tx)
+    assert strategy.balance() > 0
+
+
+def test_profitable_harvest_in_single_swap(
+    vault, strategy, token, user, amount, stability_pool, gov, record_gas
+):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+    strategy.setConvertRewardsInSingleSwap(True, {"from": gov})
+
+    chain.sleep(24 * 3600)
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("500 ether")})
+
+    tx = strategy.harvest()
+
+    record_gas("harvest_profit_lqty_eth_single_swap", tx)
+    assert tx.events["Harvested"]["profit"] > 0
+
+
+def test_profitable_harvest_with_routes_to_lusd(
+    vault, strategy, token, user, amount, protocol, stability_pool, gov, record_gas
+):
+    lqty, weth, dai = protocol["lqty"], protocol["weth"], protocol["dai"]
+    deposit_and_harvest(vault, strategy, token, user, amount)
+    strategy.setRoute(
+        lqty, encode_path([lqty, weth, dai, token], [3000, 3000, 500]), {"from": gov}
+    )
+    strategy.setRoute(weth, encode_path([weth, dai, token], [3000, 500]), {"from": gov})
+
+    chain.sleep(24 * 3600)
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("500 ether")})
+
+    tx = strategy.harvest()
+
+    record_gas("harvest_profit_lqty_eth_routes_to_lusd", tx)
+    assert tx.events["Harvested"]["profit"] > 0
+
+
+def test_profitable_harvest_on_pools_directly(
+    vault, strategy, token, user, amount, stability_pool, gov, record_gas
+):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+    strategy.setSwapOnPoolsDirectly(True, {"from": gov})
+
+    chain.sleep(24 * 3600)
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("500 ether")})
+
+    tx = strategy.harvest()
+
+    record_gas("harvest_profit_lqty_eth_direct_pools", tx)
+    assert tx.events["Harvested"]["profit"] > 0
+
+
+def test_profitable_harvest_in_single_swap_on_pools_directly(
+    vault, strategy, token, user, amount, stability_pool, gov, record_gas
+):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+    strategy.setConvertRewardsInSingleSwap(True, {"from": gov})
+    strategy.setSwapOnPoolsDirectly(True, {"from": gov})
+
+    chain.sleep(24 * 3600)
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("500 ether")})
+
+    tx = strategy.harvest()
+
+    record_gas("harvest_profit_lqty_eth_single_swap_direct_pools", tx)
+    assert tx.events["Harvested"]["profit"] > 0
+
+
+def test_loss_harvest(
+    vault, strategy, token, user, amount, stability_pool, gov, record_gas
+):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+
+    # Collateral is worth less than the debt it offsets
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("200 ether")})
+    strategy.setDoHealthCheck(False, {"from": gov})
+
+    tx = strategy.harvest()
+
+    record_gas("harvest_loss", tx)
+    assert tx.events["Harvested"]["loss"] > 0
+
+
+def test_tend(
+    vault, strategy, token, user, amount, stability_pool, gov, keeper, record_gas
+):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+
+    chain.sleep(24 * 3600)
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("500 ether")})
+
+    tx = strategy.tend({"from": keeper})
+
+    record_gas("tend", tx)
+    assert stability_pool.getDepositorETHGain(strategy) == 0
+    assert strategy.balance() == 0
+
+
+def test_tend_without_gains(vault, strategy, token, user, amount, keeper, record_gas):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+
+    tx = strategy.tend({"from": keeper})
+
+    record_gas("tend_without_gains", tx)
+
+
+def test_harvest_dust(vault, strategy, token, user, amount, record_gas):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+
+    # An hour of LQTY issuance is swapped as soon as it is claimed
+    chain.sleep(3600)
+    tx = strategy.harvest()
+
+    record_gas("harvest_dust_swapped", tx)
+
+
+def test_harvest_dust_carried_over(
+    vault, strategy, token, user, amount, gov, record_gas
+):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+    strategy.setMinSellAmounts(Wei("0.01 ether"), 10 ** 18, 10 ** 18, {"from": gov})
+
+    # The LQTY gain is left in the Stability Pool until it is worth a swap
+    chain.sleep(3600)
+    tx = strategy.harvest()
+
+    record_gas("harvest_dust_carried_over", tx)
+
+
+def test_partial_withdrawal(vault, strategy, token, user, amount, record_gas):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+
+    # Vault has no idle funds so it has to call liquidatePosition
+    tx = vault.withdraw(amount // 2, {"from": user})
+
+    record_gas("withdraw_liquidate_position", tx)
+    assert token.balanceOf(user) == amount // 2
+
+
+def test_withdrawal_from_idle_buffer(
+    vault, strategy, token, user, amount, gov, record_gas
+):
+    strategy.setIdleBufferRatio(1_000, {"from": gov})
+    deposit_and_harvest(vault, strategy, token, user, amount)
+
+    # Small withdrawals are paid from the buffer without touching the pool
+    tx = vault.withdraw(amount // 100, {"from": user})
+
+    record_gas("withdraw_idle_buffer", tx)
+    assert token.balanceOf(user) == amount // 100
+
+
+def test_migrate(
+    vault,
+    strategy,
+    token,
+    user,
+    amount,
+    Strategy,
+    protocol,
+    strategist,
+    gov,
+    record_gas,
+):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+    new_strategy = strategist.deploy(Strategy, vault, protocol_addresses(protocol))
+
+    tx = vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+
+    record_gas("migrate", tx)
+    assert token.balanceOf(new_strategy) == amount
+
+
+def test_emergency_exit(
+    vault, strategy, token, user, amount, stability_pool, gov, record_gas
+):
+    deposit_and_harvest(vault, strategy, token, user, amount)
+
+    # Rewards are left unsold when exiting
+    chain.sleep(24 * 3600)
+    strategy.setEmergencyExit({"from": gov})
+
+    tx = strategy.harvest()
+
+    record_gas("harvest_emergency_exit", tx)
+    assert stability_pool.getCompoundedLUSDDeposit(strategy) == 0
@@ -2,7 +2,10 @@
 pragma solidity 0.6.12;
 pragma experimental ABIEncoderV2;
 
-import {BaseStrategy} from "@yearnvaults/contracts/BaseStrategy.sol";
+import {
+    BaseStrategy,
+    StrategyParams
+} from "@yearnvaults/contracts/BaseStrategy.sol";
 import "@openzeppelin/contracts/math/Math.sol";
 import {
     SafeERC20,
@@ -11,74 +14,297 @@ import {
     Address
 } from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
 
+import "../interfaces/chainlink/AggregatorV3Interface.sol";
 import "../interfaces/curve/IStableSwapExchange.sol";
 import "../interfaces/liquity/IPriceFeed.sol";
 import "../interfaces/liquity/IStabilityPool.sol";
+import "../interfaces/uniswap/IQuoter.sol";
 import "../interfaces/uniswap/ISwapRouter.sol";
+import "../interfaces/uniswap/IUniswapV3Pool.sol";
+import "../interfaces/uniswap/IUniswapV3SwapCallback.sol";
 import "../interfaces/weth/IWETH9.sol";
+import "./libraries/SwapLib.sol";
+import "./libraries/TickMath.sol";
 
-contract Strategy is BaseStrategy {
+contract Strategy is BaseStrategy, IUniswapV3SwapCallback {
     using SafeERC20 for IERC20;
     using Address for address;
     using SafeMath for uint256;
 
+    // Addresses of the external contracts the strategy interacts with.
+    // They are provided at deployment so the strategy can also run against
+    // local stand-ins of these protocols
+    struct ProtocolAddresses {
+        address lqty;
+        address stabilityPool;
+        address priceFeed;
+        address router;
+        address curvePool;
+        address weth;
+        address dai;
+        address uniswapFactory;
+        // Init code hash of the pools deployed by uniswapFactory
+        bytes32 poolInitCodeHash;
+        address quoter;
+        address ethUsdAggregator;
+    }
+
     // LQTY rewards accrue to Stability Providers who deposit LUSD to the Stability Pool
-    IERC20 internal constant LQTY =
-        IERC20(0x6DEA81C8171D0bA574754EF6F8b412F2Ed88c54D);
+    IERC20 internal immutable LQTY;
 
     // Source of liquidity to repay debt from liquidated troves
-    IStabilityPool internal constant stabilityPool =
-        IStabilityPool(0x66017D22b0f8556afDd19FC67041899Eb65a21bb);
+    IStabilityPool internal immutable stabilityPool;
 
     // Chainlink ETH:USD with Tellor ETH:USD as fallback
-    IPriceFeed internal constant priceFeed =
-        IPriceFeed(0x4c517D4e2C851CA76d7eC94B805269Df0f2201De);
+    IPriceFeed internal immutable priceFeed;
 
     // Uniswap v3 router to do LQTY->ETH
-    ISwapRouter internal constant router =
-        ISwapRouter(0xE592427A0AEce92De3Edee1F18E0157C05861564);
+    ISwapRouter internal immutable router;
 
     // LUSD3CRV Curve Metapool
-    IStableSwapExchange internal constant curvePool =
-        IStableSwapExchange(0xEd279fDD11cA84bEef15AF5D39BB4d4bEE23F0cA);
+    IStableSwapExchange internal immutable curvePool;
 
     // Wrapped Ether - Used for swaps routing
-    IWETH9 internal constant WETH =
-        IWETH9(0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2);
+    IWETH9 internal immutable WETH;
 
     // DAI - Used for swaps routing
-    IERC20 internal constant DAI =
-        IERC20(0x6B175474E89094C44Da98b954EedeAC495271d0F);
+    IERC20 internal immutable DAI;
+
+    // Uniswap v3 factory, used to verify the pools calling back the strategy
+    // when swapping on them directly
+    address internal immutable uniswapFactory;
+    bytes32 internal immutable poolInitCodeHash;
+
+    // Uniswap v3 quoter, used to compare Uniswap and Curve prices for DAI->LUSD
+    IQuoter internal immutable quoter;
+
+    // Chainlink ETH:USD, read directly when it is the source of the ETH price
+    AggregatorV3Interface internal immutable ethUsdAggregator;
+
+    // Scales Chainlink answers to 18 decimals
+    uint256 internal immutable chainlinkPriceScale;
+
+    // Everything the token conversions need packed in a single storage slot,
+    // which is read once per harvest and passed down to the conversions
+    struct SwapConfig {
+        // Switch between Uniswap v3 (low liquidity) and Curve for DAI->LUSD
+        bool convertDAItoLUSDonCurve;
+        // Quote DAI->LUSD on both Curve and Uniswap v3 and sell on the venue
+        // that returns more LUSD. Setting convertDAItoLUSDonCurve turns it off
+        bool selectBestDAItoLUSDVenue;
+        // Wrap ETH and sell LQTY for WETH so rewards are sold in a single swap
+        bool convertRewardsInSingleSwap;
+        // Swap on Uniswap v3 pools directly instead of going through the router
+        bool swapOnPoolsDirectly;
+        // Allow changing fees to take advantage of cheaper or more liquid pools
+        uint24 lqtyToEthFee;
+        uint24 ethToDaiFee;
+        uint24 daiToLusdFee;
+        // Minimum expected output when swapping
+        // This should be relative to MAX_BPS representing 100%
+        uint16 minExpectedSwapPercentage;
+        // Whether a route is set to sell LQTY, ETH or DAI, so that sales on
+        // the default pools do not read the routes. Maintained by setRoute
+        bool lqtyRouteSet;
+        bool ethRouteSet;
+        bool daiRouteSet;
+    }
 
-    // Switch between Uniswap v3 (low liquidity) and Curve to convert DAI->LUSD
-    bool public convertDAItoLUSDonCurve;
+    SwapConfig public swapConfig;
+
+    // Uniswap v3 paths to sell LQTY, ETH (starting at WETH) and DAI, encoded as
+    // token (20 bytes) + n * (fee (3 bytes) + token (20 bytes)). Routes end in
+    // DAI or directly in LUSD. When no route is set the fees above are used
+    mapping(address => bytes) public routes;
+
+    // Split DAI->LUSD sales across Curve and the Uniswap v3 DAI-LUSD pools with
+    // these fees. The DAI balance is divided in `splitOrderSteps` chunks and
+    // each chunk goes to the venue paying the most LUSD for it on top of the
+    // chunks already allocated there. 0 steps disables the split
+    uint24[] public splitOrderFees;
+    uint256 public splitOrderSteps;
+
+    // Legs of the token conversions with their own slippage policy
+    enum SwapLeg {ETHtoDAI, DAItoLUSDonCurve, DAItoLUSDonUniswap}
+
+    // Slippage tolerated on a swap leg, relative to MAX_BPS representing
+    // 100%. It grows from baseSlippage, which should cover the pool fee, with
+    // the price impact expected from the trade size relative to the depth of
+    // the pool, scaled by impactFactor (MAX_BPS tolerates the price impact of
+    // a constant product pool). It never exceeds maxSlippage. Legs without a
+    // policy, or whose pool depth cannot be read, use minExpectedSwapPercentage
+    struct SlippagePolicy {
+        bool enabled;
+        uint16 baseSlippage;
+        uint16 impactFactor;
+        uint16 maxSlippage;
+    }
+
+    mapping(SwapLeg => SlippagePolicy) public slippagePolicies;
+
+    // Balances below these amounts are not worth a swap and are carried over
+    // to the next harvest
+    uint256 public minETHToSell;
+    uint256 public minLQTYToSell;
+    uint256 public minDAIToSell;
+
+    // Sales of ETH and LQTY worth more than these amounts of want are spread
+    // over several harvests and tends so that they do not move the pools too
+    // much. The rest is carried over. 0 disables the cap
+    uint256 public maxETHSaleValue;
+    uint256 public maxLQTYSaleValue;
+    // Once a sale is capped, capped tokens are not sold again, and do not fire
+    // the triggers, until this many seconds have passed
+    uint256 public saleCapInterval;
+    uint256 public lastCappedSale;
+
+    // Harvest once ETH gains are worth less than this premium over the LUSD
+    // they offset. This should be relative to MAX_BPS representing 100%
+    uint256 public minLiquidationPremium;
+
+    // Sources of the ETH price used to set the minimum output of ETH sales
+    enum PriceSource {
+        // Liquity's fetchPrice, which writes storage and may query Tellor
+        FetchPrice,
+        // Liquity's lastGoodPrice, refreshed with fetchPrice when older than
+        // maxPriceAge as far as the strategy knows
+        LastGoodPrice,
+        // Chainlink latestRoundData if updated within maxPriceAge
+        Chainlink,
+        // Time weighted average price of the Uniswap v3 ETH-DAI pool
+        UniswapTWAP
+    }
+
+    // Price source settings and state packed in a single storage slot.
+    // Sources that cannot provide a price fall back to fetchPrice
+    struct PriceConfig {
+        PriceSource source;
+        uint32 maxPriceAge; // LastGoodPrice and Chainlink, in seconds
+        uint32 twapPeriod; // UniswapTWAP, in seconds
+        // LQTY is priced by the LQTY-WETH pool averaged over this period to
+        // set the minimum output of LQTY sales. 0 sells LQTY at any price
+        uint32 lqtyTwapPeriod;
+        uint64 lastPriceFetch; // Last time the strategy called fetchPrice
+    }
+
+    PriceConfig public priceConfig;
+
+    // Optional valuation of the LQTY balance and pending gains in
+    // estimatedTotalAssets. Packed in a single storage slot
+    struct LQTYValuation {
+        bool enabled;
+        uint16 haircut; // Discount relative to MAX_BPS representing 100%
+    }
 
-    // Allow changing fees to take advantage of cheaper or more liquid Uniswap pools
-    uint24 public lqtyToEthFee;
-    uint24 public ethToDaiFee;
-    uint24 public daiToLusdFee;
+    LQTYValuation public lqtyValuation;
 
-    // Minimum expected output when swapping
-    // This should be relative to MAX_BPS representing 100%
-    uint256 public minExpectedSwapPercentage;
+    // Share of the total debt kept as loose LUSD so that small withdrawals do
+    // not have to go to the Stability Pool. This should be relative to
+    // MAX_BPS representing 100%
+    uint256 public idleBufferRatio;
 
     // 100%
     uint256 internal constant MAX_BPS = 10000;
 
-    constructor(address _vault) public BaseStrategy(_vault) {
-        // Use curve as default route to swap DAI for LUSD
-        convertDAItoLUSDonCurve = true;
+    // Uniswap v3 fees are expressed in hundredths of a bip
+    uint24 internal constant MAX_UNISWAP_FEE = 1e6;
+
+    // Every step of a split order quotes all the venues
+    uint256 internal constant MAX_SPLIT_ORDER_STEPS = 20;
+
+    // Price limits that let a Uniswap v3 swap use all the available liquidity
+    uint160 internal constant MIN_SQRT_RATIO = 4295128739;
+    uint160 internal constant MAX_SQRT_RATIO =
+        1461446703485210103287273052203988822378723970342;
+
+    // In-memory view of the position in the Stability Pool. Every getter in the
+    // Stability Pool walks the P/S epoch and scale snapshots so the position is
+    // read once per harvest and kept up to date after each deposit / withdrawal
+    struct Snapshot {
+        uint256 deposit; // Compounded LUSD deposit in the Stability Pool
+        uint256 ethGain; // ETH gain pending to be claimed
+        uint256 lqtyGain; // LQTY gain pending to be claimed
+        uint256 looseWant; // LUSD held by the strategy
+    }
+
+    // Everything monitors and keepers poll, read in a single call. Each
+    // external value is read once
+    struct StrategyState {
+        uint256 estimatedTotalAssets;
+        uint256 wantBalance; // balanceOfWant
+        uint256 lusdDeposit; // Compounded LUSD deposit in the Stability Pool
+        uint256 totalLUSDBalance;
+        uint256 ethBalance;
+        uint256 ethGain; // Pending in the Stability Pool
+        uint256 totalETHBalance;
+        uint256 lqtyBalance;
+        uint256 lqtyGain; // Pending in the Stability Pool
+        uint256 totalLQTYBalance;
+        uint256 daiBalance;
+        uint256 lastGoodPrice; // Liquity's, used to value ETH
+        SwapConfig swapConfig;
+    }
+
+    // Emitted by every swap of the token conversions so that their execution
+    // can be analysed from the logs. `venue` is the Curve pool or the Uniswap
+    // v3 factory, whether the swap went through the router or the pools
+    event Swapped(
+        address indexed tokenIn,
+        address indexed tokenOut,
+        address indexed venue,
+        uint256 amountIn,
+        uint256 amountOut,
+        uint256 minAmountOut
+    );
+
+    constructor(address _vault, ProtocolAddresses memory _protocol)
+        public
+        BaseStrategy(_vault)
+    {
+        LQTY = IERC20(_protocol.lqty);
+        stabilityPool = IStabilityPool(_protocol.stabilityPool);
+        priceFeed = IPriceFeed(_protocol.priceFeed);
+        router = ISwapRouter(_protocol.router);
+        curvePool = IStableSwapExchange(_protocol.curvePool);
+        WETH = IWETH9(_protocol.weth);
+        DAI = IERC20(_protocol.dai);
+        uniswapFactory = _protocol.uniswapFactory;
+        poolInitCodeHash = _protocol.poolInitCodeHash;
+        quoter = IQuoter(_protocol.quoter);
+        ethUsdAggregator = AggregatorV3Interface(_protocol.ethUsdAggregator);
+        uint8 chainlinkDecimals =
+            AggregatorV3Interface(_protocol.ethUsdAggregator).decimals();
+        chainlinkPriceScale = 10**(18 - uint256(chainlinkDecimals));
+
+        // Sell DAI for LUSD on Curve. Quoting both venues costs gas on every
+        // harvest, so governance has to turn on the selection of the best one.
+        // Use the 0.3% LQTY-ETH and ETH-DAI pools and the 0.05% DAI-LUSD pool
+        // on Uniswap and allow 1% slippage by default
+        swapConfig = SwapConfig({
+            convertDAItoLUSDonCurve: true,
+            selectBestDAItoLUSDVenue: false,
+            convertRewardsInSingleSwap: false,
+            swapOnPoolsDirectly: false,
+            lqtyToEthFee: 3000,
+            ethToDaiFee: 3000,
+            daiToLusdFee: 500,
+            minExpectedSwapPercentage: 9900,
+            lqtyRouteSet: false,
+            ethRouteSet: false,
+            daiRouteSet: false
+        });
 
         // Set health check to health.ychad.eth
         healthCheck = 0xDDCea799fF1699e98EDF118e0629A974Df7DF012;
 
-        // Set default pools to use on Uniswap
-        lqtyToEthFee = 3000;
-        ethToDaiFee = 3000;
-        daiToLusdFee = 500;
+        // Liquidations pay ~10% over the debt offset, sell before half is lost
+        minLiquidationPremium = 500;
+
+        // Give the pools an hour to recover between capped sales
+        saleCapInterval = 3600;
 
-        // Allow 1% slippage by default
-        minExpectedSwapPercentage = 9900;
+        // Price LQTY over the last 30 minutes when selling it
+        priceConfig.lqtyTwapPeriod = 1800;
     }
 
     // Strategy should be able to receive ETH
@@ -99,12 +325,63 @@ contract Strategy is BaseStrategy {
         WETH.deposit{value: address(this).balance}();
     }
 
+    // Replace the whole swap configuration at once. The setters below change
+    // a single field and go through the same checks. The route flags follow
+    // the routes set and are kept as they are
+    function setSwapConfig(SwapConfig memory _swapConfig)
+        external
+        onlyEmergencyAuthorized
+    {
+        SwapConfig memory config = swapConfig;
+        _swapConfig.lqtyRouteSet = config.lqtyRouteSet;
+        _swapConfig.ethRouteSet = config.ethRouteSet;
+        _swapConfig.daiRouteSet = config.daiRouteSet;
+        _setSwapConfig(_swapConfig);
+    }
+
     // Switch between Uniswap v3 (low liquidity) and Curve to convert DAI->LUSD
+    // Choosing a venue overrides the selection of the best one
     function setConvertDAItoLUSDonCurve(bool _convertDAItoLUSDonCurve)
         external
         onlyEmergencyAuthorized
     {
-        convertDAItoLUSDonCurve = _convertDAItoLUSDonCurve;
+        SwapConfig memory config = swapConfig;
+        config.convertDAItoLUSDonCurve = _convertDAItoLUSDonCurve;
+        config.selectBestDAItoLUSDVenue = false;
+        _setSwapConfig(config);
+    }
+
+    // Quote DAI->LUSD on Curve and Uniswap v3 at harvest time and sell on the
+    // venue returning more LUSD instead of the one set above
+    function setSelectBestDAItoLUSDVenue(bool _selectBestDAItoLUSDVenue)
+        external
+        onlyEmergencyAuthorized
+    {
+        SwapConfig memory config = swapConfig;
+        config.selectBestDAItoLUSDVenue = _selectBestDAItoLUSDVenue;
+        _setSwapConfig(config);
+    }
+
+    // Merge the LQTY and ETH legs of the reward conversion into a single
+    // WETH->DAI swap (or WETH->DAI->LUSD when not converting on Curve)
+    function setConvertRewardsInSingleSwap(bool _convertRewardsInSingleSwap)
+        external
+        onlyEmergencyAuthorized
+    {
+        SwapConfig memory config = swapConfig;
+        config.convertRewardsInSingleSwap = _convertRewardsInSingleSwap;
+        _setSwapConfig(config);
+    }
+
+    // Skip the router and swap on the Uniswap v3 pools, which are paid in
+    // `uniswapV3SwapCallback`. This saves the router overhead per swap
+    function setSwapOnPoolsDirectly(bool _swapOnPoolsDirectly)
+        external
+        onlyEmergencyAuthorized
+    {
+        SwapConfig memory config = swapConfig;
+        config.swapOnPoolsDirectly = _swapOnPoolsDirectly;
+        _setSwapConfig(config);
     }
 
     // Take advantage of cheaper Uniswap pools
@@ -114,9 +391,145 @@ contract Strategy is BaseStrategy {
         uint24 _ethToDaiFee,
         uint24 _daiToLusdFee
     ) external onlyEmergencyAuthorized {
-        lqtyToEthFee = _lqtyToEthFee;
-        ethToDaiFee = _ethToDaiFee;
-        daiToLusdFee = _daiToLusdFee;
+        SwapConfig memory config = swapConfig;
+        config.lqtyToEthFee = _lqtyToEthFee;
+        config.ethToDaiFee = _ethToDaiFee;
+        config.daiToLusdFee = _daiToLusdFee;
+        _setSwapConfig(config);
+    }
+
+    // Split DAI->LUSD sales in `_steps` chunks across Curve and the Uniswap v3
+    // DAI-LUSD pools with `_fees`. This takes precedence over the venue chosen
+    // above. Quoting costs gas so it only pays off for large conversions
+    function setSplitOrder(uint24[] memory _fees, uint256 _steps)
+        external
+        onlyEmergencyAuthorized
+    {
+        require(_steps <= MAX_SPLIT_ORDER_STEPS); // dev: too many steps
+        splitOrderFees = _fees;
+        splitOrderSteps = _steps;
+    }
+
+    // Skip selling ETH, LQTY or DAI balances below these amounts. They are
+    // carried over until they are worth the gas of a swap
+    function setMinSellAmounts(
+        uint256 _minETHToSell,
+        uint256 _minLQTYToSell,
+        uint256 _minDAIToSell
+    ) external onlyEmergencyAuthorized {
+        minETHToSell = _minETHToSell;
+        minLQTYToSell = _minLQTYToSell;
+        minDAIToSell = _minDAIToSell;
+    }
+
+    // Cap the value in want of the ETH and LQTY sold by a harvest or tend
+    function setMaxSaleValues(
+        uint256 _maxETHSaleValue,
+        uint256 _maxLQTYSaleValue
+    ) external onlyEmergencyAuthorized {
+        maxETHSaleValue = _maxETHSaleValue;
+        maxLQTYSaleValue = _maxLQTYSaleValue;
+    }
+
+    // Time to wait after a capped sale before selling capped tokens again
+    function setSaleCapInterval(uint256 _saleCapInterval)
+        external
+        onlyEmergencyAuthorized
+    {
+        saleCapInterval = _saleCapInterval;
+    }
+
+    // Premium of ETH gains over the LUSD they offset below which harvestTrigger
+    // fires to sell them
+    function setMinLiquidationPremium(uint256 _minLiquidationPremium)
+        external
+        onlyEmergencyAuthorized
+    {
+        require(_minLiquidationPremium <= MAX_BPS); // dev: invalid premium
+        minLiquidationPremium = _minLiquidationPremium;
+    }
+
+    // Serve withdrawals up to `_idleBufferRatio` of the total debt from loose
+    // LUSD. The buffer is refilled on every harvest / tend and earns nothing
+    function setIdleBufferRatio(uint256 _idleBufferRatio)
+        external
+        onlyEmergencyAuthorized
+    {
+        require(_idleBufferRatio <= MAX_BPS); // dev: invalid ratio
+        idleBufferRatio = _idleBufferRatio;
+    }
+
+    // Choose where the ETH price used to protect ETH sales comes from. Every
+    // source other than fetchPrice avoids writing Liquity's PriceFeed storage
+    function setPriceSource(
+        PriceSource _source,
+        uint32 _maxPriceAge,
+        uint32 _twapPeriod
+    ) external onlyGovernance {
+        require(
+            _maxPriceAge > 0 ||
+                (_source != PriceSource.LastGoodPrice &&
+                    _source != PriceSource.Chainlink)
+        ); // dev: invalid max price age
+        require(_twapPeriod > 0 || _source != PriceSource.UniswapTWAP); // dev: invalid twap period
+
+        PriceConfig memory config = priceConfig;
+        config.source = _source;
+        config.maxPriceAge = _maxPriceAge;
+        config.twapPeriod = _twapPeriod;
+        priceConfig = config;
+    }
+
+    // Count LQTY at its average price less `_haircut` in
+    // estimatedTotalAssets. LQTY is only counted if its price is available
+    function setLQTYValuation(bool _enabled, uint16 _haircut)
+        external
+        onlyGovernance
+    {
+        require(_haircut <= MAX_BPS); // dev: invalid haircut
+        lqtyValuation.enabled = _enabled;
+        lqtyValuation.haircut = _haircut;
+    }
+
+    // Period over which the LQTY price is averaged to protect LQTY sales.
+    // 0 turns the protection off, e.g. if the pool cannot look back that far
+    function setLQTYTwapPeriod(uint32 _lqtyTwapPeriod) external onlyGovernance {
+        priceConfig.lqtyTwapPeriod = _lqtyTwapPeriod;
+    }
+
+    // Set the Uniswap v3 path used to sell LQTY, ETH (WETH) or DAI. The path is
+    // validated here once so swaps can use the stored bytes as they are.
+    // An empty path goes back to the default route built from the swap fees
+    function setRoute(address _tokenIn, bytes memory _path)
+        external
+        onlyGovernance
+    {
+        require(
+            _tokenIn == address(LQTY) ||
+                _tokenIn == address(WETH) ||
+                _tokenIn == address(DAI)
+        ); // dev: no route for token
+
+        if (_path.length > 0) {
+            SwapLib.validateRoute(
+                _path,
+                _tokenIn,
+                address(DAI),
+                address(want)
+            );
+        }
+
+        SwapConfig memory config = swapConfig;
+        if (_tokenIn == address(LQTY)) {
+            config.lqtyRouteSet = _path.length > 0;
+        } else if (_tokenIn == address(WETH)) {
+            config.ethRouteSet = _path.length > 0;
+        } else {
+            config.daiRouteSet = _path.length > 0;
+        }
+        _setSwapConfig(config);
+
+        routes[_tokenIn] = _path;
     }
 
     // Ideally we would receive fair market value by performing every swap
@@ -127,7 +540,67 @@ contract Strategy is BaseStrategy {
         external
         onlyEmergencyAuthorized
     {
-        minExpectedSwapPercentage = _minExpectedSwapPercentage;
+        require(_minExpectedSwapPercentage <= MAX_BPS); // dev: invalid percentage
+        SwapConfig memory config = swapConfig;
+        config.minExpectedSwapPercentage = uint16(_minExpectedSwapPercentage);
+        _setSwapConfig(config);
+    }
+
+    // Scale the slippage tolerated on a swap leg with the trade size, so that
+    // large sales go through and small ones are better protected
+    function setSlippagePolicy(SwapLeg _leg, SlippagePolicy memory _policy)
+        external
+        onlyEmergencyAuthorized
+    {
+        require(
+            _policy.baseSlippage <= _policy.maxSlippage &&
+                _policy.maxSlippage <= MAX_BPS
+        ); // dev: invalid slippage
+        slippagePolicies[_leg] = _policy;
+    }
+
+    function _setSwapConfig(SwapConfig memory _swapConfig) internal {
+        require(_swapConfig.minExpectedSwapPercentage <= MAX_BPS); // dev: invalid percentage
+        require(
+            _swapConfig.lqtyToEthFee < MAX_UNISWAP_FEE &&
+                _swapConfig.ethToDaiFee < MAX_UNISWAP_FEE &&
+                _swapConfig.daiToLusdFee < MAX_UNISWAP_FEE
+        ); // dev: invalid fee
+        swapConfig = _swapConfig;
+    }
+
+    // Getters for the fields of swapConfig
+
+    function convertDAItoLUSDonCurve() external view returns (bool) {
+        return swapConfig.convertDAItoLUSDonCurve;
+    }
+
+    function selectBestDAItoLUSDVenue() external view returns (bool) {
+        return swapConfig.selectBestDAItoLUSDVenue;
+    }
+
+    function convertRewardsInSingleSwap() external view returns (bool) {
+        return swapConfig.convertRewardsInSingleSwap;
+    }
+
+    function swapOnPoolsDirectly() external view returns (bool) {
+        return swapConfig.swapOnPoolsDirectly;
+    }
+
+    function lqtyToEthFee() external view returns (uint24) {
+        return swapConfig.lqtyToEthFee;
+    }
+
+    function ethToDaiFee() external view returns (uint24) {
+        return swapConfig.ethToDaiFee;
+    }
+
+    function daiToLusdFee() external view returns (uint24) {
+        return swapConfig.daiToLusdFee;
+    }
+
+    function minExpectedSwapPercentage() external view returns (uint256) {
+        return swapConfig.minExpectedSwapPercentage;
     }
 
     // Wrapper around `provideToSP` to allow forcing a deposit externally
@@ -155,10 +628,39 @@ contract Strategy is BaseStrategy {
 
     function estimatedTotalAssets() public view override returns (uint256) {
         // 1 LUSD = 1 USD *guaranteed* (TM)
-        return
-            totalLUSDBalance().add(
-                totalETHBalance().mul(priceFeed.lastGoodPrice()).div(1e18)
+        uint256 ethPrice = priceFeed.lastGoodPrice();
+        uint256 totalAssets =
+            totalLUSDBalance().add(totalETHBalance().mul(ethPrice).div(1e18));
+
+        // DAI carried over to the next harvest, valued as LUSD
+        if (minDAIToSell > 0) {
+            totalAssets = totalAssets.add(DAI.balanceOf(address(this)));
+        }
+
+        LQTYValuation memory valuation = lqtyValuation;
+        if (valuation.enabled) {
+            totalAssets = totalAssets.add(
+                _lqtyValue(valuation, totalLQTYBalance(), ethPrice)
             );
+        }
+        return totalAssets;
+    }
+
+    // Value in want of `_amount` LQTY counted in estimatedTotalAssets, with
+    // `_ethPrice` the lastGoodPrice of Liquity
+    function _lqtyValue(
+        LQTYValuation memory _valuation,
+        uint256 _amount,
+        uint256 _ethPrice
+    ) internal view returns (uint256) {
+        // Same as lqtyToWant(1e18) without reading lastGoodPrice again
+        uint256 lqtyPrice = _lqtyTwapInETH().mul(_ethPrice).div(1e18);
+        return
+            _amount
+                .mul(lqtyPrice)
+                .mul(MAX_BPS.sub(_valuation.haircut))
+                .div(MAX_BPS)
+                .div(1e18);
     }
 
     function prepareReturn(uint256 _debtOutstanding)
@@ -173,11 +675,26 @@ contract Strategy is BaseStrategy {
         // How much do we owe to the LUSD vault?
         uint256 totalDebt = vault.strategies(address(this)).totalDebt;
 
+        // Read the position in the Stability Pool only once
+        Snapshot memory position = _snapshotWithGains();
+
         // Claim LQTY/ETH and sell them for more LUSD
-        _claimRewards();
+        _claimRewards(position);
+
+        // At this point all ETH and LQTY above dust and below the sale caps
+        // has been converted to LUSD. The ETH left offsets LUSD lost to
+        // liquidations so it is valued as in estimatedTotalAssets
+        uint256 totalAssetsAfterClaim =
+            position.looseWant.add(position.deposit).add(
+                ethToWant(address(this).balance.add(position.ethGain))
+            );
 
-        // At this point all ETH and LQTY has been converted to LUSD
-        uint256 totalAssetsAfterClaim = totalLUSDBalance();
+        // DAI below minDAIToSell is carried over too and valued as LUSD
+        if (minDAIToSell > 0) {
+            totalAssetsAfterClaim = totalAssetsAfterClaim.add(
+                DAI.balanceOf(address(this))
+            );
+        }
 
         if (totalAssetsAfterClaim > totalDebt) {
             _profit = totalAssetsAfterClaim.sub(totalDebt);
@@ -190,19 +707,47 @@ contract Strategy is BaseStrategy {
         // We cannot incur in additional losses during liquidatePosition because they
         // have already been accounted for in the check above, so we ignore them
         uint256 _amountFreed;
-        (_amountFreed, ) = liquidatePosition(_debtOutstanding.add(_profit));
-        _debtPayment = Math.min(_debtOutstanding, _amountFreed);
+        (_amountFreed, ) = _liquidatePosition(
+            _debtOutstanding.add(_profit),
+            position
+        );
+
+        // Profit still held in ETH is only paid out in LUSD, so it is reported
+        // as far as the LUSD freed allows and the rest once the ETH is sold
+        _profit = Math.min(_profit, _amountFreed);
+        _debtPayment = Math.min(_debtOutstanding, _amountFreed.sub(_profit));
     }
 
     function adjustPosition(uint256 _debtOutstanding) internal override {
+        // tend() compounds the gains without reporting to the vault. During a
+        // harvest they were already converted in prepareReturn
+        if (msg.sig == this.tend.selector) {
+            _claimRewards(_snapshotWithGains());
+        }
+
+        // Keep the idle buffer on top of what is owed to the vault
+        uint256 wantToKeep = _debtOutstanding;
+        uint256 bufferRatio = idleBufferRatio;
+        if (bufferRatio > 0) {
+            uint256 totalDebt = vault.strategies(address(this)).totalDebt;
+            wantToKeep = wantToKeep.add(
+                totalDebt.mul(bufferRatio).div(MAX_BPS)
+            );
+        }
+
         // Provide any leftover balance to the stability pool
         // Use zero address for frontend as we are interacting with the contracts directly
         uint256 wantBalance = balanceOfWant();
-        if (wantBalance > _debtOutstanding) {
-            stabilityPool.provideToSP(
-                wantBalance.sub(_debtOutstanding),
-                address(0)
-            );
+        if (wantBalance > wantToKeep) {
+            stabilityPool.provideToSP(wantBalance.sub(wantToKeep), address(0));
+        } else if (wantBalance < wantToKeep && bufferRatio > 0) {
+            // Refill the buffer after it served withdrawals
+            Snapshot memory position = _snapshot();
+            uint256 amountToWithdraw =
+                Math.min(wantToKeep.sub(wantBalance), position.deposit);
+            if (amountToWithdraw > 0) {
+                _withdrawFromSP(position, amountToWithdraw);
+            }
         }
     }
 
@@ -211,24 +756,39 @@ contract Strategy is BaseStrategy {
         override
         returns (uint256 _liquidatedAmount, uint256 _loss)
     {
-        uint256 balance = balanceOfWant();
+        // Check if we can handle it without reading the Stability Pool
+        uint256 looseWant = balanceOfWant();
+        if (looseWant >= _amountNeeded) {
+            return (_amountNeeded, 0);
+        }
+
+        Snapshot memory position;
+        position.looseWant = looseWant;
+        position.deposit = stabilityPool.getCompoundedLUSDDeposit(
+            address(this)
+        );
+        return _liquidatePosition(_amountNeeded, position);
+    }
 
+    function _liquidatePosition(
+        uint256 _amountNeeded,
+        Snapshot memory _position
+    ) internal returns (uint256 _liquidatedAmount, uint256 _loss) {
         // Check if we can handle it without withdrawing from stability pool
-        if (balance >= _amountNeeded) {
+        if (_position.looseWant >= _amountNeeded) {
             return (_amountNeeded, 0);
         }
 
         // Only need to free the amount of want not readily available
-        uint256 amountToWithdraw = _amountNeeded.sub(balance);
-
         // Cannot withdraw more than what we have in deposit
-        amountToWithdraw = Math.min(
-            amountToWithdraw,
-            stabilityPool.getCompoundedLUSDDeposit(address(this))
-        );
+        uint256 amountToWithdraw =
+            Math.min(
+                _amountNeeded.sub(_position.looseWant),
+                _position.deposit
+            );
 
         if (amountToWithdraw > 0) {
-            stabilityPool.withdrawFromSP(amountToWithdraw);
+            _withdrawFromSP(_position, amountToWithdraw);
         }
 
         // After withdrawing from the stability pool it could happen that we have
@@ -236,7 +796,7 @@ contract Strategy is BaseStrategy {
         // However, doing a swap at this point could make withdrawals insecure
         // and front-runnable, so we assume LUSD that cannot be returned is a
         // realized loss.
-        uint256 looseWant = balanceOfWant();
+        uint256 looseWant = _position.looseWant;
         if (_amountNeeded > looseWant) {
             _liquidatedAmount = looseWant;
             _loss = _amountNeeded.sub(looseWant);
@@ -251,20 +811,26 @@ contract Strategy is BaseStrategy {
         override
         returns (uint256 _amountFreed)
     {
-        (_amountFreed, ) = liquidatePosition(estimatedTotalAssets());
+        // Withdrawing the whole deposit frees every LUSD we own. ETH and LQTY
+        // gains are paid out too but are not converted to avoid unsafe swaps
+        Snapshot memory position = _snapshot();
+        if (position.deposit > 0) {
+            _withdrawFromSP(position, position.deposit);
+        }
+        _amountFreed = position.looseWant;
     }
 
     function prepareMigration(address _newStrategy) internal override {
-        if (stabilityPool.getCompoundedLUSDDeposit(address(this)) <= 0) {
+        uint256 deposit =
+            stabilityPool.getCompoundedLUSDDeposit(address(this));
+        if (deposit == 0) {
             return;
         }
 
         // Withdraw entire LUSD balance from Stability Pool
         // ETH + LQTY gains should be harvested before migrating
         // `migrate` will automatically forward all `want` in this strategy to the new one
-        stabilityPool.withdrawFromSP(
-            stabilityPool.getCompoundedLUSDDeposit(address(this))
-        );
+        stabilityPool.withdrawFromSP(deposit);
     }
 
     function protectedTokens()
@@ -274,6 +840,134 @@ contract Strategy is BaseStrategy {
         returns (address[] memory)
     {}
 
+    // Harvest when the gains, including pending LQTY, pay for the harvest
+    // `profitFactor` times over or when ETH gains are about to lose their
+    // premium. Otherwise the same conditions as BaseStrategy apply
+    function harvestTrigger(uint256 callCostInWei)
+        public
+        view
+        override
+        returns (bool)
+    {
+        StrategyParams memory params = vault.strategies(address(this));
+
+        // Should not trigger if strategy is not active or was just harvested
+        if (
+            params.activation == 0 ||
+            block.timestamp.sub(params.lastReport) < minReportDelay
+        ) {
+            return false;
+        }
+
+        // Should trigger if it hasn't been called in a while or to pay debt
+        if (
+            block.timestamp.sub(params.lastReport) >= maxReportDelay ||
+            vault.debtOutstanding() > debtThreshold
+        ) {
+            return true;
+        }
+
+        uint256 lusdBalance = totalLUSDBalance();
+        uint256 ethValue = ethToWant(totalETHBalance());
+        uint256 total = lusdBalance.add(ethValue);
+
+        // Trigger if we have a loss to report
+        if (total.add(debtThreshold) < params.totalDebt) {
+            return true;
+        }
+
+        // Gains left over by a capped sale are not sold again, so they do not
+        // count until the sale cap interval has passed
+        (uint256 ethToSell, uint256 lqtyToSell) =
+            _saleCapTriggerValues(ethValue);
+
+        uint256 callCost = ethToWant(callCostInWei);
+        if (
+            _liquidationPremiumAtRisk(
+                params.totalDebt,
+                lusdBalance.add(ethValue.sub(ethToSell)),
+                ethToSell,
+                callCost
+            )
+        ) {
+            return true;
+        }
+
+        // Otherwise, only trigger if the gains pay for the harvest
+        total = lusdBalance.add(ethToSell).add(lqtyToSell);
+        uint256 profit =
+            total > params.totalDebt ? total.sub(params.totalDebt) : 0;
+        return profitFactor.mul(callCost) < vault.creditAvailable().add(profit);
+    }
+
+    // Tend when the pending ETH and LQTY are worth `profitFactor` times the
+    // cost of converting them back to LUSD, or before the ETH gains lose their
+    // premium. Tending does not report to the vault so it is much cheaper
+    function tendTrigger(uint256 callCostInWei)
+        public
+        view
+        override
+        returns (bool)
+    {
+        StrategyParams memory params = vault.strategies(address(this));
+        if (params.activation == 0 || emergencyExit) {
+            return false;
+        }
+
+        uint256 callCost = ethToWant(callCostInWei);
+        uint256 ethValue = ethToWant(totalETHBalance());
+        (uint256 ethToSell, uint256 lqtyToSell) =
+            _saleCapTriggerValues(ethValue);
+        if (
+            _liquidationPremiumAtRisk(
+                params.totalDebt,
+                totalLUSDBalance().add(ethValue.sub(ethToSell)),
+                ethToSell,
+                callCost
+            )
+        ) {
+            return true;
+        }
+
+        return profitFactor.mul(callCost) < ethToSell.add(lqtyToSell);
+    }
+
+    // Value in want of the ETH, worth `_ethValue`, and of the LQTY that the
+    // next harvest or tend would sell, as far as the triggers are concerned.
+    // Capped tokens waiting for the sale cap interval are worth nothing
+    function _saleCapTriggerValues(uint256 _ethValue)
+        internal
+        view
+        returns (uint256 _ethToSell, uint256 _lqtyToSell)
+    {
+        bool pending = _saleCapPending();
+        if (!pending || maxETHSaleValue == 0) {
+            _ethToSell = _ethValue;
+        }
+        if (!pending || maxLQTYSaleValue == 0) {
+            _lqtyToSell = _lqtyToWantAtSpotPrice(totalLQTYBalance());
+        }
+    }
+
+    // LUSD offset by liquidations is paid back in ETH at a discount, which is
+    // at risk when it falls below minLiquidationPremium. Selling the ETH has
+    // to be worth the cost of the call too
+    function _liquidationPremiumAtRisk(
+        uint256 _totalDebt,
+        uint256 _lusdBalance,
+        uint256 _ethValue,
+        uint256 _callCost
+    ) internal view returns (bool) {
+        if (_ethValue <= _callCost || _totalDebt <= _lusdBalance) {
+            return false;
+        }
+
+        uint256 lusdOffset = _totalDebt.sub(_lusdBalance);
+        return
+            _ethValue.mul(MAX_BPS) <
+            lusdOffset.mul(MAX_BPS.add(minLiquidationPremium));
+    }
+
     function ethToWant(uint256 _amtInWei)
         public
         view
@@ -284,6 +978,153 @@ contract Strategy is BaseStrategy {
         return _amtInWei.mul(priceFeed.lastGoodPrice()).div(1e18);
     }
 
+    // LQTY valued at the spot price of the LQTY-WETH pool used to sell it.
+    // Cheap but easy to manipulate, only good to decide when to harvest
+    function _lqtyToWantAtSpotPrice(uint256 _amount)
+        internal
+        view
+        returns (uint256)
+    {
+        address pool =
+            _poolAddress(address(LQTY), address(WETH), swapConfig.lqtyToEthFee);
+        if (_amount == 0 || !pool.isContract()) {
+            return 0;
+        }
+
+        (uint160 sqrtPriceX96, , , , , , ) = IUniswapV3Pool(pool).slot0();
+        uint256 lqtyInETH =
+            _priceAtSqrtRatio(sqrtPriceX96, address(LQTY), address(WETH));
+        return ethToWant(_amount.mul(lqtyInETH).div(1e18));
+    }
+
+    // Price of `_base` in `_quote`, both with 18 decimals, at the sqrt price
+    // of their Uniswap v3 pool. sqrtPriceX96 is far from 2^128 for the tokens
+    // used by the strategy so squaring it does not overflow
+    function _priceAtSqrtRatio(
+        uint160 _sqrtPriceX96,
+        address _base,
+        address _quote
+    ) internal pure returns (uint256) {
+        // Price of token0 in token1 with 18 decimals
+        uint256 price =
+            uint256(_sqrtPriceX96).mul(_sqrtPriceX96).div(2**64).mul(1e18).div(
+                2**128
+            );
+        if (price == 0) {
+            return 0;
+        }
+        return _base < _quote ? price : uint256(1e36).div(price);
+    }
+
+    // ETH price used to set the minimum output of ETH sales
+    function _ethPrice() internal returns (uint256 _price) {
+        PriceConfig memory config = priceConfig;
+        if (config.source == PriceSource.LastGoodPrice) {
+            if (block.timestamp <= config.lastPriceFetch + config.maxPriceAge) {
+                return priceFeed.lastGoodPrice();
+            }
+            priceConfig.lastPriceFetch = uint64(block.timestamp);
+        } else if (config.source == PriceSource.Chainlink) {
+            _price = _chainlinkPrice(config.maxPriceAge);
+        } else if (config.source == PriceSource.UniswapTWAP) {
+            _price = _twapPrice(
+                address(WETH),
+                address(DAI),
+                swapConfig.ethToDaiFee,
+                config.twapPeriod
+            );
+        }
+
+        if (_price == 0) {
+            // Liquity falls back to Tellor if Chainlink is not working
+            _price = priceFeed.fetchPrice();
+        }
+    }
+
+    // Chainlink ETH:USD answer with 18 decimals, 0 if invalid or stale
+    function _chainlinkPrice(uint256 _maxPriceAge)
+        internal
+        view
+        returns (uint256)
+    {
+        try ethUsdAggregator.latestRoundData() returns (
+            uint80,
+            int256 _answer,
+            uint256,
+            uint256 _updatedAt,
+            uint80
+        ) {
+            if (
+                _answer <= 0 ||
+                _updatedAt.add(_maxPriceAge) < block.timestamp
+            ) {
+                return 0;
+            }
+            return uint256(_answer).mul(chainlinkPriceScale);
+        } catch {
+            return 0;
+        }
+    }
+
+    // LQTY valued at its time weighted average price in ETH. Harder to
+    // manipulate than the spot price. 0 if the LQTY price is not available
+    function lqtyToWant(uint256 _amount) public view returns (uint256) {
+        return ethToWant(_amount.mul(_lqtyTwapInETH()).div(1e18));
+    }
+
+    // LQTY price in ETH with 18 decimals averaged over lqtyTwapPeriod by the
+    // pool used to sell LQTY. 0 if the LQTY price protection is off
+    function _lqtyTwapInETH() internal view returns (uint256) {
+        uint32 period = priceConfig.lqtyTwapPeriod;
+        if (period == 0) {
+            return 0;
+        }
+        return
+            _twapPrice(
+                address(LQTY),
+                address(WETH),
+                swapConfig.lqtyToEthFee,
+                period
+            );
+    }
+
+    // Price of `_base` in `_quote` averaged over the last `_period` seconds by
+    // their pool with `_fee`. 0 if the pool does not exist or cannot look
+    // that far back
+    function _twapPrice(
+        address _base,
+        address _quote,
+        uint24 _fee,
+        uint32 _period
+    ) internal view returns (uint256) {
+        address pool = _poolAddress(_base, _quote, _fee);
+        if (!pool.isContract()) {
+            return 0;
+        }
+
+        uint32[] memory secondsAgos = new uint32[](2);
+        secondsAgos[0] = _period;
+        try IUniswapV3Pool(pool).observe(secondsAgos) returns (
+            int56[] memory _tickCumulatives,
+            uint160[] memory
+        ) {
+            // Average tick rounded to negative infinity, as Uniswap does
+            int56 delta = _tickCumulatives[1] - _tickCumulatives[0];
+            int24 tick = int24(delta / int56(_period));
+            if (delta < 0 && delta % int56(_period) != 0) {
+                tick--;
+            }
+            return
+                _priceAtSqrtRatio(
+                    TickMath.getSqrtRatioAtTick(tick),
+                    _base,
+                    _quote
+                );
+        } catch {
+            return 0;
+        }
+    }
+
     // ----------------- PUBLIC BALANCES -----------------
 
     function balanceOfWant() public view returns (uint256) {
@@ -311,6 +1152,51 @@ contract Strategy is BaseStrategy {
             );
     }
 
+    // Balances, gains, price and swap configuration in a single call, so
+    // that polling the whole state is one round trip
+    function getStrategyState()
+        external
+        view
+        returns (StrategyState memory _state)
+    {
+        Snapshot memory position = _snapshotWithGains();
+        _state.wantBalance = position.looseWant;
+        _state.lusdDeposit = position.deposit;
+        _state.totalLUSDBalance = position.looseWant.add(position.deposit);
+
+        _state.ethBalance = address(this).balance;
+        _state.ethGain = position.ethGain;
+        _state.totalETHBalance = _state.ethBalance.add(position.ethGain);
+
+        _state.lqtyBalance = LQTY.balanceOf(address(this));
+        _state.lqtyGain = position.lqtyGain;
+        _state.totalLQTYBalance = _state.lqtyBalance.add(position.lqtyGain);
+
+        _state.daiBalance = DAI.balanceOf(address(this));
+        _state.lastGoodPrice = priceFeed.lastGoodPrice();
+        _state.swapConfig = swapConfig;
+
+        // As estimatedTotalAssets
+        _state.estimatedTotalAssets = _state.totalLUSDBalance.add(
+            _state.totalETHBalance.mul(_state.lastGoodPrice).div(1e18)
+        );
+        if (minDAIToSell > 0) {
+            _state.estimatedTotalAssets = _state.estimatedTotalAssets.add(
+                _state.daiBalance
+            );
+        }
+        LQTYValuation memory valuation = lqtyValuation;
+        if (valuation.enabled) {
+            _state.estimatedTotalAssets = _state.estimatedTotalAssets.add(
+                _lqtyValue(
+                    valuation,
+                    _state.totalLQTYBalance,
+                    _state.lastGoodPrice
+                )
+            );
+        }
+    }
+
     // ----------------- SUPPORT FUNCTIONS ----------
 
     function _checkAllowance(
@@ -324,122 +1210,748 @@ contract Strategy is BaseStrategy {
         }
     }
 
-    function _claimRewards() internal {
+    // Position in the Stability Pool without pending gains.
+    // This is all that is needed to serve withdrawals
+    function _snapshot() internal view returns (Snapshot memory _position) {
+        _position.deposit = stabilityPool.getCompoundedLUSDDeposit(
+            address(this)
+        );
+        _position.looseWant = balanceOfWant();
+    }
+
+    function _snapshotWithGains()
+        internal
+        view
+        returns (Snapshot memory _position)
+    {
+        _position = _snapshot();
+        _position.ethGain = stabilityPool.getDepositorETHGain(address(this));
+        _position.lqtyGain = stabilityPool.getDepositorLQTYGain(address(this));
+    }
+
+    // Withdrawing from the Stability Pool pays out all pending gains and sends
+    // min(_amount, deposit) LUSD, so the snapshot can be updated without reading it again
+    function _withdrawFromSP(Snapshot memory _position, uint256 _amount)
+        internal
+    {
+        stabilityPool.withdrawFromSP(_amount);
+
+        _amount = Math.min(_amount, _position.deposit);
+        _position.deposit = _position.deposit.sub(_amount);
+        _position.looseWant = _position.looseWant.add(_amount);
+        _position.ethGain = 0;
+        _position.lqtyGain = 0;
+    }
+
+    function _claimRewards(Snapshot memory _position) internal {
+        uint256 ethAmount = address(this).balance;
+        uint256 lqtyAmount = LQTY.balanceOf(address(this));
+
         // Withdraw minimum amount to force LQTY and ETH to be claimed
-        if (stabilityPool.getCompoundedLUSDDeposit(address(this)) > 0) {
-            stabilityPool.withdrawFromSP(0);
+        // There is nothing to claim if there are no pending gains, and gains
+        // that would not be sold are left in the Stability Pool
+        if (
+            (_position.ethGain > 0 &&
+                ethAmount.add(_position.ethGain) >= minETHToSell) ||
+            (_position.lqtyGain > 0 &&
+                lqtyAmount.add(_position.lqtyGain) >= minLQTYToSell)
+        ) {
+            _withdrawFromSP(_position, 0);
+            ethAmount = address(this).balance;
+            lqtyAmount = LQTY.balanceOf(address(this));
         }
 
-        // Convert LQTY rewards to DAI
-        if (LQTY.balanceOf(address(this)) > 0) {
-            _sellLQTYforDAI();
+        // Dust is carried over to the next harvest
+        ethAmount = _sellableAmount(ethAmount, minETHToSell);
+        lqtyAmount = _sellableAmount(lqtyAmount, minLQTYToSell);
+
+        // And so is whatever exceeds the sale caps
+        (ethAmount, lqtyAmount) = _capSales(ethAmount, lqtyAmount);
+
+        // Read the swap configuration and the ETH price only once. The
+        // configured price source protects ETH sales, which includes the ETH
+        // bought with LQTY in a single swap. Selling LQTY for DAI only needs
+        // the price to express its minimum output in DAI
+        SwapConfig memory config = swapConfig;
+        uint256 ethPrice;
+        if (
+            ethAmount > 0 ||
+            (lqtyAmount > 0 && config.convertRewardsInSingleSwap)
+        ) {
+            ethPrice = _ethPrice();
+        } else if (lqtyAmount > 0) {
+            ethPrice = priceFeed.lastGoodPrice();
         }
 
-        // Convert ETH obtained from liquidations to DAI
-        if (address(this).balance > 0) {
-            _sellETHforDAI();
+        if (config.convertRewardsInSingleSwap) {
+            // LUSD received when the WETH swap goes straight to LUSD
+            _position.looseWant = _position.looseWant.add(
+                _sellRewardsInSingleSwap(
+                    config,
+                    ethPrice,
+                    ethAmount,
+                    lqtyAmount
+                )
+            );
+        } else {
+            // Convert LQTY rewards to DAI (or LUSD)
+            if (lqtyAmount > 0) {
+                _position.looseWant = _position.looseWant.add(
+                    _sellLQTYforDAI(config, ethPrice, lqtyAmount)
+                );
+            }
+
+            // Convert ETH obtained from liquidations to DAI (or LUSD)
+            if (ethAmount > 0) {
+                _position.looseWant = _position.looseWant.add(
+                    _sellETHforDAI(config, ethPrice, ethAmount)
+                );
+            }
         }
 
         // Convert all outstanding DAI back to LUSD
-        if (DAI.balanceOf(address(this)) > 0) {
-            _sellDAIforLUSD();
+        if (_sellableAmount(DAI.balanceOf(address(this)), minDAIToSell) > 0) {
+            _sellDAIforLUSD(config);
+            _position.looseWant = balanceOfWant();
         }
     }
 
-    // ----------------- TOKEN CONVERSIONS -----------------
+    // Balances below the minimum sell amount are not worth selling
+    function _sellableAmount(uint256 _balance, uint256 _minSellAmount)
+        internal
+        pure
+        returns (uint256)
+    {
+        return _balance >= _minSellAmount ? _balance : 0;
+    }
+
+    // ETH and LQTY sold within the sale caps. Capped tokens are not sold at
+    // all until saleCapInterval has passed since the last capped sale. Spot
+    // prices are good enough to size the sales, minimum outputs still apply
+    function _capSales(uint256 _ethAmount, uint256 _lqtyAmount)
+        internal
+        returns (uint256 _ethSold, uint256 _lqtySold)
+    {
+        uint256 maxETHValue = maxETHSaleValue;
+        uint256 maxLQTYValue = maxLQTYSaleValue;
+        if (maxETHValue == 0 && maxLQTYValue == 0) {
+            return (_ethAmount, _lqtyAmount);
+        }
 
-    function _sellLQTYforDAI() internal {
-        _checkAllowance(address(router), LQTY, LQTY.balanceOf(address(this)));
+        if (_saleCapPending()) {
+            return (
+                maxETHValue > 0 ? 0 : _ethAmount,
+                maxLQTYValue > 0 ? 0 : _lqtyAmount
+            );
+        }
 
-        bytes memory path =
-            abi.encodePacked(
+        _ethSold = _ethAmount;
+        if (maxETHValue > 0 && _ethAmount > 0) {
+            _ethSold = _cappedSale(
+                _ethAmount,
+                maxETHValue,
+                priceFeed.lastGoodPrice()
+            );
+        }
+        _lqtySold = _lqtyAmount;
+        if (maxLQTYValue > 0 && _lqtyAmount > 0) {
+            _lqtySold = _cappedSale(
+                _lqtyAmount,
+                maxLQTYValue,
+                _lqtyToWantAtSpotPrice(1e18)
+            );
+        }
+
+        if (_ethSold < _ethAmount || _lqtySold < _lqtyAmount) {
+            lastCappedSale = block.timestamp;
+        }
+    }
+
+    // Whether capped tokens are waiting for saleCapInterval to pass since the
+    // last capped sale
+    function _saleCapPending() internal view returns (bool) {
+        return block.timestamp < lastCappedSale.add(saleCapInterval);
+    }
+
+    // Amount of a token worth at most `_maxValue` of want at `_price`. Sales
+    // are not capped when the price is not available
+    function _cappedSale(
+        uint256 _amount,
+        uint256 _maxValue,
+        uint256 _price
+    ) internal pure returns (uint256) {
+        if (_price == 0) {
+            return _amount;
+        }
+        return Math.min(_amount, _maxValue.mul(1e18).div(_price));
+    }
+
+    // ----------------- TOKEN CONVERSIONS -----------------
+
+    // Returns the LUSD obtained if the LQTY route ends in LUSD
+    function _sellLQTYforDAI(
+        SwapConfig memory _config,
+        uint256 _ethPrice,
+        uint256 _lqtyAmount
+    ) internal returns (uint256 _lusdOut) {
+        bytes memory path;
+        if (_config.lqtyRouteSet) {
+            path = routes[address(LQTY)];
+        } else {
+            path = abi.encodePacked(
                 address(LQTY), // LQTY-ETH
-                lqtyToEthFee,
+                _config.lqtyToEthFee,
                 address(WETH), // ETH-DAI
-                ethToDaiFee,
+                _config.ethToDaiFee,
                 address(DAI)
             );
+        }
+
+        uint256 minExpected = _minExpectedLQTYinETH(_config, _lqtyAmount);
+        if (minExpected > 0) {
+            // 1 DAI = 1 LUSD is assumed when the route ends in LUSD
+            minExpected = minExpected.mul(_ethPrice).div(1e18);
+        }
+        return _swapOnRoute(_config, path, _lqtyAmount, minExpected, 0);
+    }
+
+    // LQTY value in ETH at its average price * Swap Percentage. Without the
+    // LQTY price, proceeds from LQTY are not subject to
+    // minExpectedSwapPercentage and could get sandwiched
+    function _minExpectedLQTYinETH(
+        SwapConfig memory _config,
+        uint256 _lqtyAmount
+    ) internal view returns (uint256) {
+        return
+            _lqtyAmount
+                .mul(_lqtyTwapInETH())
+                .mul(_config.minExpectedSwapPercentage)
+                .div(MAX_BPS)
+                .div(1e18);
+    }
+
+    // Returns the LUSD obtained if the ETH route ends in LUSD
+    function _sellETHforDAI(
+        SwapConfig memory _config,
+        uint256 _ethPrice,
+        uint256 _ethAmount
+    ) internal returns (uint256 _lusdOut) {
+        uint256 percentage =
+            _minExpectedPercentage(
+                _config,
+                SwapLeg.ETHtoDAI,
+                _config.ethToDaiFee,
+                _ethAmount
+            );
 
-        // Proceeds from LQTY are not subject to minExpectedSwapPercentage
-        // so they could get sandwiched if we end up in an uncle block
-        router.exactInput(
-            ISwapRouter.ExactInputParams(
-                path,
-                address(this),
-                now,
-                LQTY.balanceOf(address(this)),
-                0
-            )
+        // Amount * Price * Swap Percentage (adjusted to 18 decimals)
+        uint256 minExpected =
+            _ethAmount.mul(_ethPrice).mul(percentage).div(MAX_BPS).div(1e18);
+
+        if (_config.ethRouteSet) {
+            return
+                _swapOnRoute(
+                    _config,
+                    routes[address(WETH)],
+                    _ethAmount,
+                    minExpected,
+                    _ethAmount
+                );
+        }
+
+        _swapExactInputSingle(
+            _config,
+            address(WETH), // tokenIn
+            address(DAI), // tokenOut
+            _config.ethToDaiFee, // ETH-DAI fee
+            _ethAmount, // amountIn
+            minExpected, // amountOut
+            _ethAmount // ETH to wrap
         );
     }
 
-    function _sellETHforDAI() internal {
-        uint256 ethUSD = priceFeed.fetchPrice();
-        uint256 ethBalance = address(this).balance;
+    // ETH is wrapped and LQTY sold for WETH so that both rewards are converted
+    // by a single WETH swap. Returns the LUSD obtained if that swap ends in LUSD
+    function _sellRewardsInSingleSwap(
+        SwapConfig memory _config,
+        uint256 _ethPrice,
+        uint256 _ethAmount,
+        uint256 _lqtyAmount
+    ) internal returns (uint256 _lusdOut) {
+        uint256 wethAmount = _ethAmount;
+        if (wethAmount > 0) {
+            WETH.deposit{value: wethAmount}();
+        }
+
+        if (_lqtyAmount > 0) {
+            // The WETH swap below enforces minExpectedSwapPercentage on the
+            // LQTY proceeds as well
+            wethAmount = wethAmount.add(
+                _swapExactInputSingle(
+                    _config,
+                    address(LQTY), // tokenIn
+                    address(WETH), // tokenOut
+                    _config.lqtyToEthFee, // LQTY-ETH fee
+                    _lqtyAmount, // amountIn
+                    _minExpectedLQTYinETH(_config, _lqtyAmount), // amountOut
+                    0 // ETH to wrap
+                )
+            );
+        }
+
+        if (wethAmount == 0) {
+            return 0;
+        }
+
+        uint256 percentage =
+            _minExpectedPercentage(
+                _config,
+                SwapLeg.ETHtoDAI,
+                _config.ethToDaiFee,
+                wethAmount
+            );
 
-        // Balance * Price * Swap Percentage (adjusted to 18 decimals)
+        // WETH * Price * Swap Percentage (adjusted to 18 decimals)
+        // 1 DAI = 1 LUSD is assumed when swapping all the way to LUSD
         uint256 minExpected =
-            ethBalance
-                .mul(ethUSD)
-                .mul(minExpectedSwapPercentage)
-                .div(MAX_BPS)
-                .div(1e18);
+            wethAmount.mul(_ethPrice).mul(percentage).div(MAX_BPS).div(1e18);
+
+        if (_config.ethRouteSet) {
+            return
+                _swapOnRoute(
+                    _config,
+                    routes[address(WETH)],
+                    wethAmount,
+                    minExpected,
+                    0
+                );
+        }
 
-        ISwapRouter.ExactInputSingleParams memory params =
-            ISwapRouter.ExactInputSingleParams(
+        // DAI is converted to LUSD afterwards unless Uniswap was chosen for it
+        if (
+            _config.convertDAItoLUSDonCurve ||
+            _config.selectBestDAItoLUSDVenue ||
+            splitOrderSteps > 0
+        ) {
+            _swapExactInputSingle(
+                _config,
                 address(WETH), // tokenIn
                 address(DAI), // tokenOut
-                ethToDaiFee, // ETH-DAI fee
-                address(this), // recipient
-                now, // deadline
-                ethBalance, // amountIn
+                _config.ethToDaiFee, // ETH-DAI fee
+                wethAmount, // amountIn
                 minExpected, // amountOut
-                0 // sqrtPriceLimitX96
+                0 // ETH to wrap
             );
+            return 0;
+        }
 
-        router.exactInputSingle{value: address(this).balance}(params);
-        router.refundETH();
+        bytes memory path =
+            abi.encodePacked(
+                address(WETH), // ETH-DAI
+                _config.ethToDaiFee,
+                address(DAI), // DAI-LUSD
+                _config.daiToLusdFee,
+                address(want)
+            );
+        return _swapOnRoute(_config, path, wethAmount, minExpected, 0);
     }
 
-    function _sellDAIforLUSD() internal {
+    function _sellDAIforLUSD(SwapConfig memory _config) internal {
+        uint256 daiBalance = DAI.balanceOf(address(this));
+        if (splitOrderSteps > 0) {
+            _sellDAIforLUSDinSplitOrder(_config, daiBalance);
+            return;
+        }
+
+        bool onCurve = _config.convertDAItoLUSDonCurve;
+        if (_config.selectBestDAItoLUSDVenue) {
+            // Ties go to Curve, which has deeper liquidity
+            onCurve =
+                curvePool.get_dy_underlying(1, 0, daiBalance) >=
+                _quoteDAIforLUSDonUniswap(_config, daiBalance);
+        }
+
         // These methods will assume 1 DAI = 1 LUSD and attempt to enforce
-        // min output to be at least minExpectedSwapPercentage of balance
-        if (convertDAItoLUSDonCurve) {
-            _sellDAIforLUSDonCurve();
+        // min output to be at least the expected percentage of balance
+        if (onCurve) {
+            _sellDAIforLUSDonCurve(_config, daiBalance);
         } else {
-            _sellDAIforLUSDonUniswap();
+            _sellDAIforLUSDonUniswap(_config);
         }
     }
 
-    function _sellDAIforLUSDonCurve() internal {
-        uint256 daiBalance = DAI.balanceOf(address(this));
+    // Sells the DAI balance across the venues in the split planned by
+    // SwapLib.splitOrder, each share in a single swap
+    function _sellDAIforLUSDinSplitOrder(
+        SwapConfig memory _config,
+        uint256 _daiBalance
+    ) internal {
+        uint24[] memory fees = splitOrderFees;
+        uint256[] memory amountIn =
+            SwapLib.splitOrder(
+                SwapLib.SplitOrderVenues(
+                    curvePool,
+                    quoter,
+                    address(DAI),
+                    address(want),
+                    fees
+                ),
+                splitOrderSteps,
+                _daiBalance
+            );
+
+        if (amountIn[0] > 0) {
+            _sellDAIforLUSDonCurve(_config, amountIn[0]);
+        }
+        for (uint256 venue = 1; venue < amountIn.length; venue++) {
+            if (amountIn[venue] > 0) {
+                _sellDAIforLUSDonPool(
+                    _config,
+                    fees[venue - 1],
+                    amountIn[venue]
+                );
+            }
+        }
+    }
+
+    // LUSD received for `_daiAmount` on the Uniswap route used to sell DAI.
+    // The quoter reverts for non-existent pools, which are quoted as 0
+    function _quoteDAIforLUSDonUniswap(
+        SwapConfig memory _config,
+        uint256 _daiAmount
+    ) internal returns (uint256) {
+        bytes memory path;
+        if (_config.daiRouteSet) {
+            path = routes[address(DAI)];
+        } else {
+            path = abi.encodePacked(
+                address(DAI),
+                _config.daiToLusdFee,
+                address(want)
+            );
+        }
 
-        _checkAllowance(address(curvePool), DAI, daiBalance);
+        return SwapLib.quoteExactInput(quoter, path, _daiAmount);
+    }
 
-        curvePool.exchange_underlying(
-            1, // from DAI index
-            0, // to LUSD index
-            daiBalance, // amount
-            daiBalance.mul(minExpectedSwapPercentage).div(MAX_BPS) // minDy
+    function _sellDAIforLUSDonCurve(
+        SwapConfig memory _config,
+        uint256 _daiAmount
+    ) internal {
+        _checkAllowance(address(curvePool), DAI, _daiAmount);
+
+        uint256 percentage =
+            _minExpectedPercentage(
+                _config,
+                SwapLeg.DAItoLUSDonCurve,
+                0,
+                _daiAmount
+            );
+        uint256 minExpected = _daiAmount.mul(percentage).div(MAX_BPS);
+        uint256 lusdOut =
+            curvePool.exchange_underlying(
+                1, // from DAI index
+                0, // to LUSD index
+                _daiAmount, // amount
+                minExpected // minDy
+            );
+        emit Swapped(
+            address(DAI),
+            address(want),
+            address(curvePool),
+            _daiAmount,
+            lusdOut,
+            minExpected
         );
     }
 
-    function _sellDAIforLUSDonUniswap() internal {
+    function _sellDAIforLUSDonUniswap(SwapConfig memory _config) internal {
         uint256 daiBalance = DAI.balanceOf(address(this));
 
-        _checkAllowance(address(router), DAI, daiBalance);
+        if (!_config.daiRouteSet) {
+            _sellDAIforLUSDonPool(_config, _config.daiToLusdFee, daiBalance);
+            return;
+        }
+
+        // Routes are bounded by the depth of the DAI-LUSD pool used by default
+        uint256 percentage =
+            _minExpectedPercentage(
+                _config,
+                SwapLeg.DAItoLUSDonUniswap,
+                _config.daiToLusdFee,
+                daiBalance
+            );
+        uint256 minExpected = daiBalance.mul(percentage).div(MAX_BPS);
+        _swapOnRoute(
+            _config,
+            routes[address(DAI)],
+            daiBalance,
+            minExpected,
+            0
+        );
+    }
 
-        ISwapRouter.ExactInputSingleParams memory params =
-            ISwapRouter.ExactInputSingleParams(
-                address(DAI), // tokenIn
-                address(want), // tokenOut
-                daiToLusdFee, // DAI-LUSD fee
-                address(this), // recipient
-                now, // deadline
-                daiBalance, // amountIn
-                daiBalance.mul(minExpectedSwapPercentage).div(MAX_BPS), // amountOut
-                0 // sqrtPriceLimitX96
+    // Sells DAI on the Uniswap v3 DAI-LUSD pool with `_fee`
+    function _sellDAIforLUSDonPool(
+        SwapConfig memory _config,
+        uint24 _fee,
+        uint256 _daiAmount
+    ) internal {
+        uint256 percentage =
+            _minExpectedPercentage(
+                _config,
+                SwapLeg.DAItoLUSDonUniswap,
+                _fee,
+                _daiAmount
+            );
+        uint256 minExpected = _daiAmount.mul(percentage).div(MAX_BPS);
+        _swapExactInputSingle(
+            _config,
+            address(DAI), // tokenIn
+            address(want), // tokenOut
+            _fee, // DAI-LUSD fee
+            _daiAmount, // amountIn
+            minExpected, // amountOut
+            0 // ETH to wrap
+        );
+    }
+
+    // Minimum output of a swap leg selling `_amountIn`, relative to MAX_BPS
+    // representing 100%. See SlippagePolicy
+    function _minExpectedPercentage(
+        SwapConfig memory _config,
+        SwapLeg _leg,
+        uint24 _fee,
+        uint256 _amountIn
+    ) internal view returns (uint256) {
+        SlippagePolicy memory policy = slippagePolicies[_leg];
+        if (!policy.enabled) {
+            return _config.minExpectedSwapPercentage;
+        }
+
+        uint256 depth = _swapLegDepth(_leg, _fee);
+        if (depth == 0) {
+            return _config.minExpectedSwapPercentage;
+        }
+
+        // Share of the reserve taken by the trade in a constant product pool
+        uint256 slippage =
+            uint256(policy.baseSlippage).add(
+                _amountIn.mul(policy.impactFactor).div(depth.add(_amountIn))
+            );
+        return MAX_BPS.sub(Math.min(slippage, policy.maxSlippage));
+    }
+
+    // Depth of the pool traded by a swap leg, in the token sold. 0 if the
+    // pool does not exist. Curve is as deep as the LUSD balance of the
+    // metapool, assuming 1 DAI = 1 LUSD
+    function _swapLegDepth(SwapLeg _leg, uint24 _fee)
+        internal
+        view
+        returns (uint256)
+    {
+        if (_leg == SwapLeg.DAItoLUSDonCurve) {
+            return curvePool.balances(0);
+        }
+
+        (address tokenIn, address tokenOut) =
+            _leg == SwapLeg.ETHtoDAI
+                ? (address(WETH), address(DAI))
+                : (address(DAI), address(want));
+        return
+            SwapLib.uniswapDepth(
+                _poolAddress(tokenIn, tokenOut, _fee),
+                tokenIn < tokenOut
+            );
+    }
+
+    // ----------------- SWAP EXECUTION -----------------
+
+    // Swaps through a multi-hop path and returns the amount received if the
+    // path ends in LUSD. Otherwise it ends in DAI and 0 is returned
+    function _swapOnRoute(
+        SwapConfig memory _config,
+        bytes memory _path,
+        uint256 _amountIn,
+        uint256 _minOut,
+        uint256 _value
+    ) internal returns (uint256 _lusdOut) {
+        uint256 amountOut =
+            _swapExactInput(_config, _path, _amountIn, _minOut, _value);
+
+        if (SwapLib.toAddress(_path, _path.length - 20) == address(want)) {
+            return amountOut;
+        }
+    }
+
+    // Swaps on a single Uniswap v3 pool, through the router or directly.
+    // `_value` is the amount of ETH to be wrapped to pay for WETH
+    function _swapExactInputSingle(
+        SwapConfig memory _config,
+        address _tokenIn,
+        address _tokenOut,
+        uint24 _fee,
+        uint256 _amountIn,
+        uint256 _minOut,
+        uint256 _value
+    ) internal returns (uint256 _amountOut) {
+        if (_config.swapOnPoolsDirectly) {
+            if (_value > 0) {
+                WETH.deposit{value: _value}();
+            }
+            _amountOut = _swapOnPool(_tokenIn, _tokenOut, _fee, _amountIn);
+            require(_amountOut >= _minOut); // dev: too little received
+        } else {
+            if (_value == 0) {
+                _checkAllowance(address(router), IERC20(_tokenIn), _amountIn);
+            }
+
+            _amountOut = router.exactInputSingle{value: _value}(
+                ISwapRouter.ExactInputSingleParams(
+                    _tokenIn,
+                    _tokenOut,
+                    _fee,
+                    address(this), // recipient
+                    now, // deadline
+                    _amountIn,
+                    _minOut,
+                    0 // sqrtPriceLimitX96
+                )
+            );
+
+            if (_value > 0) {
+                router.refundETH();
+            }
+        }
+
+        emit Swapped(
+            _tokenIn,
+            _tokenOut,
+            uniswapFactory,
+            _amountIn,
+            _amountOut,
+            _minOut
+        );
+    }
+
+    // Swaps along a Uniswap v3 path, through the router or directly on each
+    // pool. `_value` is the amount of ETH to be wrapped to pay for WETH
+    function _swapExactInput(
+        SwapConfig memory _config,
+        bytes memory _path,
+        uint256 _amountIn,
+        uint256 _minOut,
+        uint256 _value
+    ) internal returns (uint256 _amountOut) {
+        if (_config.swapOnPoolsDirectly) {
+            if (_value > 0) {
+                WETH.deposit{value: _value}();
+            }
+
+            // The strategy receives and pays every intermediate hop
+            _amountOut = _amountIn;
+            for (uint256 i = 0; i < _path.length - 20; i += 23) {
+                _amountOut = _swapOnPool(
+                    SwapLib.toAddress(_path, i),
+                    SwapLib.toAddress(_path, i + 23),
+                    SwapLib.toUint24(_path, i + 20),
+                    _amountOut
+                );
+            }
+            require(_amountOut >= _minOut); // dev: too little received
+        } else {
+            if (_value == 0) {
+                _checkAllowance(
+                    address(router),
+                    IERC20(SwapLib.toAddress(_path, 0)),
+                    _amountIn
+                );
+            }
+
+            _amountOut = router.exactInput{value: _value}(
+                ISwapRouter.ExactInputParams(
+                    _path,
+                    address(this),
+                    now,
+                    _amountIn,
+                    _minOut
+                )
+            );
+
+            if (_value > 0) {
+                router.refundETH();
+            }
+        }
+
+        emit Swapped(
+            SwapLib.toAddress(_path, 0),
+            SwapLib.toAddress(_path, _path.length - 20),
+            uniswapFactory,
+            _amountIn,
+            _amountOut,
+            _minOut
+        );
+    }
+
+    // Exact input swap on a pool, which pulls the input through
+    // `uniswapV3SwapCallback`. The output is received by the strategy
+    function _swapOnPool(
+        address _tokenIn,
+        address _tokenOut,
+        uint24 _fee,
+        uint256 _amountIn
+    ) internal returns (uint256) {
+        bool zeroForOne = _tokenIn < _tokenOut;
+        (int256 amount0, int256 amount1) =
+            IUniswapV3Pool(_poolAddress(_tokenIn, _tokenOut, _fee)).swap(
+                address(this),
+                zeroForOne,
+                int256(_amountIn),
+                zeroForOne ? MIN_SQRT_RATIO + 1 : MAX_SQRT_RATIO - 1,
+                abi.encode(_tokenIn, _tokenOut, _fee)
+            );
+        return uint256(-(zeroForOne ? amount1 : amount0));
+    }
+
+    // Pools can only be called back from a swap started by the strategy, so
+    // checking that the caller is the pool for the tokens and fee is enough
+    function uniswapV3SwapCallback(
+        int256 _amount0Delta,
+        int256 _amount1Delta,
+        bytes calldata _data
+    ) external override {
+        (address tokenIn, address tokenOut, uint24 fee) =
+            abi.decode(_data, (address, address, uint24));
+        address pool = _poolAddress(tokenIn, tokenOut, fee);
+        require(msg.sender == pool); // dev: invalid pool
+
+        IERC20(tokenIn).safeTransfer(
+            msg.sender,
+            _amount0Delta > 0 ? uint256(_amount0Delta) : uint256(_amount1Delta)
+        );
+    }
+
+    // Address of a pool deployed by the Uniswap v3 factory, computed as
+    // Uniswap's PoolAddress library does
+    function _poolAddress(
+        address _tokenA,
+        address _tokenB,
+        uint24 _fee
+    ) internal view returns (address) {
+        (address token0, address token1) =
+            _tokenA < _tokenB ? (_tokenA, _tokenB) : (_tokenB, _tokenA);
+        return
+            address(
+                uint256(
+                    keccak256(
+                        abi.encodePacked(
+                            hex"ff",
+                            uniswapFactory,
+                            keccak256(abi.encode(token0, token1, _fee)),
+                            poolInitCodeHash
+                        )
+                    )
+                )
             );
-        router.exactInputSingle(params);
     }
 }
@@ -0,0 +1,44 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "../interfaces/chainlink/AggregatorV3Interface.sol";
+
+// Chainlink ETH:USD aggregator stand-in returning an answer set by the tests
+contract TestChainlinkAggregator is AggregatorV3Interface {
+    uint8 public constant override decimals = 8;
+
+    uint80 public roundId;
+    int256 public answer;
+    uint256 public updatedAt;
+
+    constructor(int256 _answer) public {
+        setAnswer(_answer);
+    }
+
+    function setAnswer(int256 _answer) public {
+        roundId++;
+        answer = _answer;
+        updatedAt = block.timestamp;
+    }
+
+    // Allows simulating a stale feed
+    function setUpdatedAt(uint256 _updatedAt) external {
+        updatedAt = _updatedAt;
+    }
+
+    function latestRoundData()
+        external
+        view
+        override
+        returns (
+            uint80,
+            int256,
+            uint256,
+            uint256,
+            uint80
+        )
+    {
+        return (roundId, answer, updatedAt, updatedAt, roundId);
+    }
+}
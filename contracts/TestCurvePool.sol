@@ -0,0 +1,122 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/math/SafeMath.sol";
+import {
+    SafeERC20,
+    IERC20
+} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+
+import "../interfaces/curve/IStableSwapExchange.sol";
+
+// LUSD3CRV metapool stand-in. Only the LUSD (0) and DAI (1) underlying coins are
+// supported and they are traded directly through the StableSwap invariant over
+// virtual balances set by the tests. Output tokens are paid from the pool balance,
+// which has to be funded beforehand.
+contract TestCurvePool is IStableSwapExchange {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    uint256 internal constant N_COINS = 2;
+    uint256 internal constant FEE_DENOMINATOR = 1e10;
+
+    IERC20[2] public coins;
+    uint256[2] public override balances;
+
+    uint256 public A;
+    uint256 public fee;
+
+    constructor(
+        address _lusd,
+        address _dai,
+        uint256 _A,
+        uint256 _fee
+    ) public {
+        coins[0] = IERC20(_lusd);
+        coins[1] = IERC20(_dai);
+        A = _A;
+        fee = _fee;
+    }
+
+    function setBalances(uint256 _lusdBalance, uint256 _daiBalance) external {
+        balances[0] = _lusdBalance;
+        balances[1] = _daiBalance;
+    }
+
+    function get_dy_underlying(
+        int128 i,
+        int128 j,
+        uint256 dx
+    ) public view override returns (uint256) {
+        require(
+            (i == 0 && j == 1) || (i == 1 && j == 0),
+            "TestCurvePool: unsupported coins"
+        );
+        uint256 x = balances[uint256(i)].add(dx);
+        uint256 y = _getY(x, balances[uint256(j)], _getD());
+        uint256 dy = balances[uint256(j)].sub(y).sub(1);
+        return dy.sub(dy.mul(fee).div(FEE_DENOMINATOR));
+    }
+
+    function exchange_underlying(
+        int128 i,
+        int128 j,
+        uint256 dx,
+        uint256 min_dy
+    ) external override returns (uint256 dy) {
+        dy = get_dy_underlying(i, j, dx);
+        require(dy >= min_dy, "Exchange resulted in fewer coins than expected");
+
+        balances[uint256(i)] = balances[uint256(i)].add(dx);
+        balances[uint256(j)] = balances[uint256(j)].sub(dy);
+
+        coins[uint256(i)].safeTransferFrom(msg.sender, address(this), dx);
+        coins[uint256(j)].safeTransfer(msg.sender, dy);
+    }
+
+    // StableSwap invariant D for the current balances
+    function _getD() internal view returns (uint256 D) {
+        uint256 S = balances[0].add(balances[1]);
+        if (S == 0) {
+            return 0;
+        }
+
+        uint256 Ann = A.mul(N_COINS);
+        D = S;
+        for (uint256 k = 0; k < 255; k++) {
+            uint256 D_P = D;
+            D_P = D_P.mul(D).div(balances[0].mul(N_COINS));
+            D_P = D_P.mul(D).div(balances[1].mul(N_COINS));
+            uint256 Dprev = D;
+            D = Ann.mul(S).add(D_P.mul(N_COINS)).mul(D).div(
+                Ann.sub(1).mul(D).add(D_P.mul(N_COINS + 1))
+            );
+            if (D > Dprev ? D - Dprev <= 1 : Dprev - D <= 1) {
+                break;
+            }
+        }
+    }
+
+    // Balance of the other coin that keeps D constant when one of them is `_x`
+    function _getY(
+        uint256 _x,
+        uint256 _yBalance,
+        uint256 _D
+    ) internal view returns (uint256 y) {
+        uint256 Ann = A.mul(N_COINS);
+        uint256 c = _D.mul(_D).div(_x.mul(N_COINS));
+        c = c.mul(_D).div(Ann.mul(N_COINS));
+        uint256 b = _x.add(_D.div(Ann));
+
+        y = _D;
+        for (uint256 k = 0; k < 255; k++) {
+            uint256 yPrev = y;
+            y = y.mul(y).add(c).div(y.mul(2).add(b).sub(_D));
+            if (y > yPrev ? y - yPrev <= 1 : yPrev - y <= 1) {
+                break;
+            }
+        }
+        require(y < _yBalance, "TestCurvePool: not enough liquidity");
+    }
+}
@@ -0,0 +1,41 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/math/SafeMath.sol";
+
+// Same default limits and checks as yearn's CommonHealthCheck
+contract TestHealthCheck {
+    using SafeMath for uint256;
+
+    uint256 internal constant MAX_BPS = 10000;
+
+    uint256 public profitLimitRatio = 100;
+    uint256 public lossLimitRatio = 1;
+
+    function setProfitLimitRatio(uint256 _profitLimitRatio) external {
+        require(_profitLimitRatio < MAX_BPS);
+        profitLimitRatio = _profitLimitRatio;
+    }
+
+    function setLossLimitRatio(uint256 _lossLimitRatio) external {
+        require(_lossLimitRatio < MAX_BPS);
+        lossLimitRatio = _lossLimitRatio;
+    }
+
+    function check(
+        uint256 _profit,
+        uint256 _loss,
+        uint256 _debtPayment,
+        uint256 _debtOutstanding,
+        uint256 _totalDebt
+    ) external view returns (bool) {
+        if (_profit > _totalDebt.mul(profitLimitRatio).div(MAX_BPS)) {
+            return false;
+        }
+        if (_loss > _totalDebt.mul(lossLimitRatio).div(MAX_BPS)) {
+            return false;
+        }
+        return true;
+    }
+}
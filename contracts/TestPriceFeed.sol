@@ -0,0 +1,25 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "../interfaces/liquity/IPriceFeed.sol";
+
+// Liquity PriceFeed stand-in returning a price set by the tests
+contract TestPriceFeed is IPriceFeed {
+    uint256 public override lastGoodPrice;
+
+    constructor(uint256 _price) public {
+        lastGoodPrice = _price;
+    }
+
+    function setPrice(uint256 _price) external {
+        lastGoodPrice = _price;
+        emit LastGoodPriceUpdated(_price);
+    }
+
+    // Liquity writes the price on every fetch, so do we
+    function fetchPrice() external override returns (uint256) {
+        emit LastGoodPriceUpdated(lastGoodPrice);
+        return lastGoodPrice;
+    }
+}
@@ -0,0 +1,81 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "../interfaces/uniswap/IQuoter.sol";
+import "./TestUniswapV3Factory.sol";
+
+// Uniswap v3 quoter stand-in. Quotes are read from the pools of the factory
+// instead of simulating the swaps. As the real quoter, quoting a swap on a
+// non-existent pool reverts.
+contract TestQuoter is IQuoter {
+    TestUniswapV3Factory public immutable factory;
+
+    constructor(address _factory) public {
+        factory = TestUniswapV3Factory(_factory);
+    }
+
+    function quoteExactInput(bytes memory path, uint256 amountIn)
+        external
+        override
+        returns (uint256 amountOut)
+    {
+        amountOut = amountIn;
+        for (uint256 i = 0; i < path.length - 20; i += 23) {
+            amountOut = _quote(
+                _toAddress(path, i),
+                _toAddress(path, i + 23),
+                _toUint24(path, i + 20),
+                amountOut
+            );
+        }
+    }
+
+    function quoteExactInputSingle(
+        address tokenIn,
+        address tokenOut,
+        uint24 fee,
+        uint256 amountIn,
+        uint160
+    ) external override returns (uint256) {
+        return _quote(tokenIn, tokenOut, fee, amountIn);
+    }
+
+    function _quote(
+        address _tokenIn,
+        address _tokenOut,
+        uint24 _fee,
+        uint256 _amountIn
+    ) internal view returns (uint256) {
+        address pool = factory.getPool(_tokenIn, _tokenOut, _fee);
+        require(pool != address(0), "TestQuoter: no pool");
+        return
+            TestUniswapV3Pool(pool).getAmountOut(
+                _tokenIn < _tokenOut,
+                _amountIn
+            );
+    }
+
+    function _toAddress(bytes memory _bytes, uint256 _start)
+        internal
+        pure
+        returns (address _address)
+    {
+        assembly {
+            _address := div(
+                mload(add(add(_bytes, 0x20), _start)),
+                0x1000000000000000000000000
+            )
+        }
+    }
+
+    function _toUint24(bytes memory _bytes, uint256 _start)
+        internal
+        pure
+        returns (uint24 _uint24)
+    {
+        assembly {
+            _uint24 := and(mload(add(add(_bytes, 0x3), _start)), 0xffffff)
+        }
+    }
+}
@@ -0,0 +1,474 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/math/Math.sol";
+import "@openzeppelin/contracts/math/SafeMath.sol";
+
+import "../interfaces/liquity/IStabilityPool.sol";
+import "./TestToken.sol";
+
+// Stability Pool stand-in that keeps Liquity's P/S/G accounting (epochs, scales
+// and error correction) so compounded deposits and gains behave as on mainnet.
+// Front ends and the trove system are not modelled: liquidations are simulated
+// by calling `offset` (or `liquidate`) and LQTY is issued at a constant rate
+contract TestStabilityPool is IStabilityPool {
+    using SafeMath for uint256;
+
+    uint256 internal constant DECIMAL_PRECISION = 1e18;
+    uint256 internal constant SCALE_FACTOR = 1e9;
+
+    TestToken public lusdToken;
+    TestToken public lqtyToken;
+
+    // Tracked separately from the balance, as Liquity does
+    uint256 internal ETH;
+    uint256 internal totalLUSDDeposits;
+
+    struct Deposit {
+        uint256 initialValue;
+        address frontEndTag;
+    }
+
+    struct Snapshots {
+        uint256 S;
+        uint256 P;
+        uint256 G;
+        uint128 scale;
+        uint128 epoch;
+    }
+
+    mapping(address => Deposit) public deposits;
+    mapping(address => Snapshots) public depositSnapshots;
+
+    uint256 public P = DECIMAL_PRECISION;
+    uint128 public currentScale;
+    uint128 public currentEpoch;
+
+    // ETH gain sum S and LQTY gain sum G for every epoch and scale
+    mapping(uint128 => mapping(uint128 => uint256)) public epochToScaleToSum;
+    mapping(uint128 => mapping(uint128 => uint256)) public epochToScaleToG;
+
+    uint256 public lastLQTYError;
+    uint256 public lastETHError_Offset;
+    uint256 public lastLUSDLossError_Offset;
+
+    uint256 public lqtyIssuancePerSecond;
+    uint256 public lastLQTYIssuanceTime;
+
+    constructor(address _lusdToken, address _lqtyToken) public {
+        lusdToken = TestToken(_lusdToken);
+        lqtyToken = TestToken(_lqtyToken);
+        lastLQTYIssuanceTime = block.timestamp;
+    }
+
+    // Collateral for `offset` is sent beforehand
+    receive() external payable {}
+
+    function setLQTYIssuancePerSecond(uint256 _lqtyIssuancePerSecond)
+        external
+    {
+        _triggerLQTYIssuance();
+        lqtyIssuancePerSecond = _lqtyIssuancePerSecond;
+    }
+
+    // ----------------- DEPOSITS -----------------
+
+    function provideToSP(uint256 _amount, address _frontEndTag)
+        external
+        override
+    {
+        require(_frontEndTag == address(0), "TestStabilityPool: no front ends");
+        require(_amount > 0, "StabilityPool: Amount must be non-zero");
+
+        uint256 initialDeposit = deposits[msg.sender].initialValue;
+
+        _triggerLQTYIssuance();
+
+        uint256 depositorETHGain = getDepositorETHGain(msg.sender);
+        uint256 compoundedLUSDDeposit = getCompoundedLUSDDeposit(msg.sender);
+        uint256 LUSDLoss = initialDeposit.sub(compoundedLUSDDeposit);
+
+        _payOutLQTYGains(msg.sender);
+
+        lusdToken.transferFrom(msg.sender, address(this), _amount);
+        totalLUSDDeposits = totalLUSDDeposits.add(_amount);
+        emit StabilityPoolLUSDBalanceUpdated(totalLUSDDeposits);
+
+        uint256 newDeposit = compoundedLUSDDeposit.add(_amount);
+        _updateDepositAndSnapshots(msg.sender, newDeposit);
+        emit UserDepositChanged(msg.sender, newDeposit);
+
+        emit ETHGainWithdrawn(msg.sender, depositorETHGain, LUSDLoss);
+        _sendETHGainToDepositor(depositorETHGain);
+    }
+
+    function withdrawFromSP(uint256 _amount) external override {
+        uint256 initialDeposit = deposits[msg.sender].initialValue;
+        require(
+            initialDeposit > 0,
+            "StabilityPool: User must have a non-zero deposit"
+        );
+
+        _triggerLQTYIssuance();
+
+        uint256 depositorETHGain = getDepositorETHGain(msg.sender);
+        uint256 compoundedLUSDDeposit = getCompoundedLUSDDeposit(msg.sender);
+        uint256 LUSDtoWithdraw = Math.min(_amount, compoundedLUSDDeposit);
+        uint256 LUSDLoss = initialDeposit.sub(compoundedLUSDDeposit);
+
+        _payOutLQTYGains(msg.sender);
+
+        if (LUSDtoWithdraw > 0) {
+            totalLUSDDeposits = totalLUSDDeposits.sub(LUSDtoWithdraw);
+            emit StabilityPoolLUSDBalanceUpdated(totalLUSDDeposits);
+            lusdToken.transfer(msg.sender, LUSDtoWithdraw);
+        }
+
+        uint256 newDeposit = compoundedLUSDDeposit.sub(LUSDtoWithdraw);
+        _updateDepositAndSnapshots(msg.sender, newDeposit);
+        emit UserDepositChanged(msg.sender, newDeposit);
+
+        emit ETHGainWithdrawn(msg.sender, depositorETHGain, LUSDLoss);
+        _sendETHGainToDepositor(depositorETHGain);
+    }
+
+    // ----------------- LIQUIDATIONS -----------------
+
+    // Cancels `_debtToOffset` LUSD from the pool against `_collToAdd` ETH,
+    // which must have been sent to the pool already
+    function offset(uint256 _debtToOffset, uint256 _collToAdd)
+        public
+        override
+    {
+        uint256 totalLUSD = totalLUSDDeposits;
+        if (totalLUSD == 0 || _debtToOffset == 0) {
+            return;
+        }
+        require(
+            _debtToOffset <= totalLUSD,
+            "TestStabilityPool: debt larger than deposits"
+        );
+        require(
+            address(this).balance >= ETH.add(_collToAdd),
+            "TestStabilityPool: collateral not received"
+        );
+
+        _triggerLQTYIssuance();
+
+        (uint256 ETHGainPerUnitStaked, uint256 LUSDLossPerUnitStaked) =
+            _computeRewardsPerUnitStaked(_collToAdd, _debtToOffset, totalLUSD);
+        _updateRewardSumAndProduct(ETHGainPerUnitStaked, LUSDLossPerUnitStaked);
+
+        totalLUSDDeposits = totalLUSD.sub(_debtToOffset);
+        emit StabilityPoolLUSDBalanceUpdated(totalLUSDDeposits);
+        lusdToken.burn(address(this), _debtToOffset);
+
+        ETH = ETH.add(_collToAdd);
+        emit StabilityPoolETHBalanceUpdated(ETH);
+    }
+
+    // Liquidates a trove with `_debt` LUSD debt and `msg.value` collateral
+    function liquidate(uint256 _debt) external payable {
+        offset(_debt, msg.value);
+    }
+
+    function _computeRewardsPerUnitStaked(
+        uint256 _collToAdd,
+        uint256 _debtToOffset,
+        uint256 _totalLUSDDeposits
+    )
+        internal
+        returns (uint256 ETHGainPerUnitStaked, uint256 LUSDLossPerUnitStaked)
+    {
+        uint256 ETHNumerator =
+            _collToAdd.mul(DECIMAL_PRECISION).add(lastETHError_Offset);
+
+        if (_debtToOffset == _totalLUSDDeposits) {
+            // When the pool depletes to 0, so does each deposit
+            LUSDLossPerUnitStaked = DECIMAL_PRECISION;
+            lastLUSDLossError_Offset = 0;
+        } else {
+            uint256 LUSDLossNumerator =
+                _debtToOffset.mul(DECIMAL_PRECISION).sub(
+                    lastLUSDLossError_Offset
+                );
+            // Round up so the loss per unit staked is never underestimated
+            LUSDLossPerUnitStaked = LUSDLossNumerator
+                .div(_totalLUSDDeposits)
+                .add(1);
+            lastLUSDLossError_Offset = LUSDLossPerUnitStaked
+                .mul(_totalLUSDDeposits)
+                .sub(LUSDLossNumerator);
+        }
+
+        ETHGainPerUnitStaked = ETHNumerator.div(_totalLUSDDeposits);
+        lastETHError_Offset = ETHNumerator.sub(
+            ETHGainPerUnitStaked.mul(_totalLUSDDeposits)
+        );
+    }
+
+    function _updateRewardSumAndProduct(
+        uint256 _ETHGainPerUnitStaked,
+        uint256 _LUSDLossPerUnitStaked
+    ) internal {
+        uint256 currentP = P;
+        uint256 newP;
+
+        uint256 newProductFactor = DECIMAL_PRECISION.sub(_LUSDLossPerUnitStaked);
+
+        uint128 currentScaleCached = currentScale;
+        uint128 currentEpochCached = currentEpoch;
+        uint256 newS =
+            epochToScaleToSum[currentEpochCached][currentScaleCached].add(
+                _ETHGainPerUnitStaked.mul(currentP)
+            );
+        epochToScaleToSum[currentEpochCached][currentScaleCached] = newS;
+        emit S_Updated(newS, currentEpochCached, currentScaleCached);
+
+        if (newProductFactor == 0) {
+            // The pool was emptied: start a new epoch
+            currentEpoch = currentEpochCached + 1;
+            emit EpochUpdated(currentEpoch);
+            currentScale = 0;
+            emit ScaleUpdated(currentScale);
+            newP = DECIMAL_PRECISION;
+        } else if (
+            currentP.mul(newProductFactor).div(DECIMAL_PRECISION) < SCALE_FACTOR
+        ) {
+            // P would lose too much precision: move to the next scale
+            newP = currentP.mul(newProductFactor).mul(SCALE_FACTOR).div(
+                DECIMAL_PRECISION
+            );
+            currentScale = currentScaleCached + 1;
+            emit ScaleUpdated(currentScale);
+        } else {
+            newP = currentP.mul(newProductFactor).div(DECIMAL_PRECISION);
+        }
+
+        assert(newP > 0);
+        P = newP;
+        emit P_Updated(newP);
+    }
+
+    // ----------------- LQTY ISSUANCE -----------------
+
+    function _triggerLQTYIssuance() internal {
+        uint256 issuance =
+            block.timestamp.sub(lastLQTYIssuanceTime).mul(
+                lqtyIssuancePerSecond
+            );
+        lastLQTYIssuanceTime = block.timestamp;
+
+        uint256 totalLUSD = totalLUSDDeposits;
+        if (totalLUSD == 0 || issuance == 0) {
+            return;
+        }
+
+        uint256 LQTYNumerator =
+            issuance.mul(DECIMAL_PRECISION).add(lastLQTYError);
+        uint256 LQTYPerUnitStaked = LQTYNumerator.div(totalLUSD);
+        lastLQTYError = LQTYNumerator.sub(LQTYPerUnitStaked.mul(totalLUSD));
+
+        uint256 newG =
+            epochToScaleToG[currentEpoch][currentScale].add(
+                LQTYPerUnitStaked.mul(P)
+            );
+        epochToScaleToG[currentEpoch][currentScale] = newG;
+        emit G_Updated(newG, currentEpoch, currentScale);
+    }
+
+    function _payOutLQTYGains(address _depositor) internal {
+        uint256 depositorLQTYGain = getDepositorLQTYGain(_depositor);
+        if (depositorLQTYGain > 0) {
+            lqtyToken.mint(_depositor, depositorLQTYGain);
+            emit LQTYPaidToDepositor(_depositor, depositorLQTYGain);
+        }
+    }
+
+    // ----------------- GETTERS -----------------
+
+    function getETH() external view override returns (uint256) {
+        return ETH;
+    }
+
+    function getTotalLUSDDeposits() external view override returns (uint256) {
+        return totalLUSDDeposits;
+    }
+
+    function getDepositorETHGain(address _depositor)
+        public
+        view
+        override
+        returns (uint256)
+    {
+        uint256 initialDeposit = deposits[_depositor].initialValue;
+        if (initialDeposit == 0) {
+            return 0;
+        }
+        return
+            _getGainFromSnapshots(
+                initialDeposit,
+                epochToScaleToSum,
+                depositSnapshots[_depositor].S,
+                depositSnapshots[_depositor]
+            );
+    }
+
+    function getDepositorLQTYGain(address _depositor)
+        public
+        view
+        override
+        returns (uint256)
+    {
+        uint256 initialDeposit = deposits[_depositor].initialValue;
+        if (initialDeposit == 0) {
+            return 0;
+        }
+        return
+            _getGainFromSnapshots(
+                initialDeposit,
+                epochToScaleToG,
+                depositSnapshots[_depositor].G,
+                depositSnapshots[_depositor]
+            );
+    }
+
+    function getCompoundedLUSDDeposit(address _depositor)
+        public
+        view
+        override
+        returns (uint256)
+    {
+        uint256 initialDeposit = deposits[_depositor].initialValue;
+        if (initialDeposit == 0) {
+            return 0;
+        }
+
+        Snapshots memory snapshots = depositSnapshots[_depositor];
+
+        // The deposit was emptied by a liquidation in a previous epoch
+        if (snapshots.epoch < currentEpoch) {
+            return 0;
+        }
+
+        uint256 compoundedDeposit;
+        uint128 scaleDiff = currentScale - snapshots.scale;
+        if (scaleDiff == 0) {
+            compoundedDeposit = initialDeposit.mul(P).div(snapshots.P);
+        } else if (scaleDiff == 1) {
+            compoundedDeposit = initialDeposit.mul(P).div(snapshots.P).div(
+                SCALE_FACTOR
+            );
+        }
+
+        // Treat deposits depleted beyond precision as empty
+        if (compoundedDeposit < initialDeposit.div(1e9)) {
+            return 0;
+        }
+        return compoundedDeposit;
+    }
+
+    // Gains can span at most two scales from the snapshot, as in Liquity
+    function _getGainFromSnapshots(
+        uint256 _initialDeposit,
+        mapping(uint128 => mapping(uint128 => uint256)) storage _sums,
+        uint256 _sumSnapshot,
+        Snapshots storage _snapshots
+    ) internal view returns (uint256) {
+        uint128 epochSnapshot = _snapshots.epoch;
+        uint128 scaleSnapshot = _snapshots.scale;
+
+        uint256 firstPortion =
+            _sums[epochSnapshot][scaleSnapshot].sub(_sumSnapshot);
+        uint256 secondPortion =
+            _sums[epochSnapshot][scaleSnapshot + 1].div(SCALE_FACTOR);
+
+        return
+            _initialDeposit
+                .mul(firstPortion.add(secondPortion))
+                .div(_snapshots.P)
+                .div(DECIMAL_PRECISION);
+    }
+
+    function _updateDepositAndSnapshots(address _depositor, uint256 _newValue)
+        internal
+    {
+        deposits[_depositor].initialValue = _newValue;
+
+        if (_newValue == 0) {
+            delete depositSnapshots[_depositor];
+            emit DepositSnapshotUpdated(_depositor, 0, 0, 0);
+            return;
+        }
+
+        uint128 currentScaleCached = currentScale;
+        uint128 currentEpochCached = currentEpoch;
+        uint256 currentP = P;
+        uint256 currentS =
+            epochToScaleToSum[currentEpochCached][currentScaleCached];
+        uint256 currentG =
+            epochToScaleToG[currentEpochCached][currentScaleCached];
+
+        depositSnapshots[_depositor] = Snapshots(
+            currentS,
+            currentP,
+            currentG,
+            currentScaleCached,
+            currentEpochCached
+        );
+        emit DepositSnapshotUpdated(_depositor, currentP, currentS, currentG);
+    }
+
+    function _sendETHGainToDepositor(uint256 _amount) internal {
+        if (_amount == 0) {
+            return;
+        }
+        ETH = ETH.sub(_amount);
+        emit StabilityPoolETHBalanceUpdated(ETH);
+        emit EtherSent(msg.sender, _amount);
+
+        (bool success, ) = msg.sender.call{value: _amount}("");
+        require(success, "StabilityPool: sending ETH failed");
+    }
+
+    // ----------------- NOT SUPPORTED -----------------
+
+    function setAddresses(
+        address,
+        address,
+        address,
+        address,
+        address,
+        address,
+        address
+    ) external override {
+        revert("TestStabilityPool: not supported");
+    }
+
+    function withdrawETHGainToTrove(address, address) external override {
+        revert("TestStabilityPool: not supported");
+    }
+
+    function registerFrontEnd(uint256) external override {
+        revert("TestStabilityPool: not supported");
+    }
+
+    function getFrontEndLQTYGain(address)
+        external
+        view
+        override
+        returns (uint256)
+    {
+        return 0;
+    }
+
+    function getCompoundedFrontEndStake(address)
+        external
+        view
+        override
+        returns (uint256)
+    {
+        return 0;
+    }
+}
@@ -7,21 +7,56 @@ import "./Strategy.sol";
 // The purpose of this wrapper contract is to expose internal functions
 // that may contain application logic and therefore need to be tested
 contract TestStrategy is Strategy {
-    constructor(address _vault) public Strategy(_vault) {}
+    constructor(address _vault, ProtocolAddresses memory _protocol)
+        public
+        Strategy(_vault, _protocol)
+    {}
 
-    function sellLQTYforDAI() public {
-        _sellLQTYforDAI();
+    // Minimum outputs above 100% make every swap revert, which the setters
+    // do not allow
+    function setMinExpectedSwapPercentageUnchecked(
+        uint16 _minExpectedSwapPercentage
+    ) public {
+        swapConfig.minExpectedSwapPercentage = _minExpectedSwapPercentage;
     }
 
-    function sellETHforDAI() public {
-        _sellETHforDAI();
+    function minExpectedPercentage(
+        SwapLeg _leg,
+        uint24 _fee,
+        uint256 _amountIn
+    ) public view returns (uint256) {
+        return _minExpectedPercentage(swapConfig, _leg, _fee, _amountIn);
+    }
+
+    function sellLQTYforDAI() public returns (uint256) {
+        return
+            _sellLQTYforDAI(
+                swapConfig,
+                _ethPrice(),
+                LQTY.balanceOf(address(this))
+            );
+    }
+
+    function sellETHforDAI() public returns (uint256) {
+        return
+            _sellETHforDAI(swapConfig, _ethPrice(), address(this).balance);
     }
 
     function sellDAIforLUSD() public {
-        _sellDAIforLUSD();
+        _sellDAIforLUSD(swapConfig);
+    }
+
+    function sellRewardsInSingleSwap() public returns (uint256) {
+        return
+            _sellRewardsInSingleSwap(
+                swapConfig,
+                _ethPrice(),
+                address(this).balance,
+                LQTY.balanceOf(address(this))
+            );
     }
 
     function claimRewards() public {
-        _claimRewards();
+        _claimRewards(_snapshotWithGains());
     }
 }
@@ -0,0 +1,246 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/math/SafeMath.sol";
+import {
+    SafeERC20,
+    IERC20
+} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+
+import "../interfaces/uniswap/ISwapRouter.sol";
+import "../interfaces/weth/IWETH9.sol";
+import "./TestUniswapV3Factory.sol";
+
+// Uniswap v3 router stand-in. Swaps go through the pools of the factory, which
+// pull the input through `uniswapV3SwapCallback`, as the real router does.
+// `setPool` creates pools as needed and sets their virtual reserves, so prices
+// and price impact are configurable. Exact output swaps are not supported.
+contract TestSwapRouter is ISwapRouter {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    uint160 internal constant MIN_SQRT_RATIO = 4295128739;
+    uint160 internal constant MAX_SQRT_RATIO =
+        1461446703485210103287273052203988822378723970342;
+
+    TestUniswapV3Factory public immutable factory;
+    IWETH9 public immutable WETH9;
+
+    constructor(address _factory, address _weth) public {
+        factory = TestUniswapV3Factory(_factory);
+        WETH9 = IWETH9(_weth);
+    }
+
+    receive() external payable {}
+
+    function setPool(
+        address _tokenA,
+        address _tokenB,
+        uint24 _fee,
+        uint256 _reserveA,
+        uint256 _reserveB
+    ) external {
+        address pool = factory.getPool(_tokenA, _tokenB, _fee);
+        if (pool == address(0)) {
+            pool = factory.createPool(_tokenA, _tokenB, _fee);
+        }
+
+        if (_tokenA < _tokenB) {
+            TestUniswapV3Pool(pool).setReserves(_reserveA, _reserveB);
+        } else {
+            TestUniswapV3Pool(pool).setReserves(_reserveB, _reserveA);
+        }
+    }
+
+    function getReserves(
+        address _tokenIn,
+        address _tokenOut,
+        uint24 _fee
+    ) public view returns (uint256 _reserveIn, uint256 _reserveOut) {
+        TestUniswapV3Pool pool = _getPool(_tokenIn, _tokenOut, _fee);
+        if (_tokenIn < _tokenOut) {
+            return (pool.reserve0(), pool.reserve1());
+        }
+        return (pool.reserve1(), pool.reserve0());
+    }
+
+    function getAmountOut(
+        address _tokenIn,
+        address _tokenOut,
+        uint24 _fee,
+        uint256 _amountIn
+    ) public view returns (uint256) {
+        return
+            _getPool(_tokenIn, _tokenOut, _fee).getAmountOut(
+                _tokenIn < _tokenOut,
+                _amountIn
+            );
+    }
+
+    // ----------------- SWAPS -----------------
+
+    function exactInputSingle(ExactInputSingleParams calldata params)
+        external
+        payable
+        override
+        returns (uint256 amountOut)
+    {
+        require(block.timestamp <= params.deadline, "Transaction too old");
+
+        amountOut = _swap(
+            params.tokenIn,
+            params.tokenOut,
+            params.fee,
+            params.amountIn,
+            params.recipient,
+            msg.sender
+        );
+        require(amountOut >= params.amountOutMinimum, "Too little received");
+    }
+
+    function exactInput(ExactInputParams calldata params)
+        external
+        payable
+        override
+        returns (uint256 amountOut)
+    {
+        require(block.timestamp <= params.deadline, "Transaction too old");
+
+        bytes memory path = params.path;
+        // token (20 bytes) + n * (fee (3 bytes) + token (20 bytes))
+        require(
+            path.length >= 43 && (path.length - 20) % 23 == 0,
+            "TestSwapRouter: invalid path"
+        );
+
+        // Intermediate hops are received and paid by the router
+        amountOut = params.amountIn;
+        for (uint256 i = 0; i < path.length - 20; i += 23) {
+            bool lastHop = i + 43 == path.length;
+            amountOut = _swap(
+                _toAddress(path, i),
+                _toAddress(path, i + 23),
+                _toUint24(path, i + 20),
+                amountOut,
+                lastHop ? params.recipient : address(this),
+                i == 0 ? msg.sender : address(this)
+            );
+        }
+        require(amountOut >= params.amountOutMinimum, "Too little received");
+    }
+
+    function exactOutputSingle(ExactOutputSingleParams calldata)
+        external
+        payable
+        override
+        returns (uint256)
+    {
+        revert("TestSwapRouter: not supported");
+    }
+
+    function exactOutput(ExactOutputParams calldata)
+        external
+        payable
+        override
+        returns (uint256)
+    {
+        revert("TestSwapRouter: not supported");
+    }
+
+    function uniswapV3SwapCallback(
+        int256 amount0Delta,
+        int256 amount1Delta,
+        bytes calldata data
+    ) external override {
+        (address tokenIn, address tokenOut, uint24 fee, address payer) =
+            abi.decode(data, (address, address, uint24, address));
+        require(
+            msg.sender == address(_getPool(tokenIn, tokenOut, fee)),
+            "TestSwapRouter: invalid pool"
+        );
+
+        uint256 amountToPay =
+            amount0Delta > 0 ? uint256(amount0Delta) : uint256(amount1Delta);
+        _pay(tokenIn, payer, msg.sender, amountToPay);
+    }
+
+    function refundETH() external payable override {
+        if (address(this).balance > 0) {
+            (bool sent, ) = msg.sender.call{value: address(this).balance}("");
+            require(sent, "STE");
+        }
+    }
+
+    // ----------------- INTERNAL -----------------
+
+    function _getPool(
+        address _tokenIn,
+        address _tokenOut,
+        uint24 _fee
+    ) internal view returns (TestUniswapV3Pool) {
+        address pool = factory.getPool(_tokenIn, _tokenOut, _fee);
+        require(pool != address(0), "TestSwapRouter: no pool");
+        return TestUniswapV3Pool(pool);
+    }
+
+    function _swap(
+        address _tokenIn,
+        address _tokenOut,
+        uint24 _fee,
+        uint256 _amountIn,
+        address _recipient,
+        address _payer
+    ) internal returns (uint256 _amountOut) {
+        bool zeroForOne = _tokenIn < _tokenOut;
+        (int256 amount0, int256 amount1) =
+            _getPool(_tokenIn, _tokenOut, _fee).swap(
+                _recipient,
+                zeroForOne,
+                int256(_amountIn),
+                zeroForOne ? MIN_SQRT_RATIO + 1 : MAX_SQRT_RATIO - 1,
+                abi.encode(_tokenIn, _tokenOut, _fee, _payer)
+            );
+        return uint256(-(zeroForOne ? amount1 : amount0));
+    }
+
+    // As the real router, ETH sent along a WETH swap is wrapped
+    function _pay(
+        address _token,
+        address _payer,
+        address _recipient,
+        uint256 _amount
+    ) internal {
+        if (_token == address(WETH9) && address(this).balance >= _amount) {
+            WETH9.deposit{value: _amount}();
+            WETH9.transfer(_recipient, _amount);
+        } else if (_payer == address(this)) {
+            IERC20(_token).safeTransfer(_recipient, _amount);
+        } else {
+            IERC20(_token).safeTransferFrom(_payer, _recipient, _amount);
+        }
+    }
+
+    function _toAddress(bytes memory _bytes, uint256 _start)
+        internal
+        pure
+        returns (address _address)
+    {
+        assembly {
+            _address := div(
+                mload(add(add(_bytes, 0x20), _start)),
+                0x1000000000000000000000000
+            )
+        }
+    }
+
+    function _toUint24(bytes memory _bytes, uint256 _start)
+        internal
+        pure
+        returns (uint24 _uint24)
+    {
+        assembly {
+            _uint24 := and(mload(add(add(_bytes, 0x3), _start)), 0xffffff)
+        }
+    }
+}
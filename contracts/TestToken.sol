@@ -0,0 +1,22 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+
+// Freely mintable and burnable ERC20 used to stand in for LUSD, LQTY and DAI
+// when running the test suite without a mainnet fork
+contract TestToken is ERC20 {
+    constructor(string memory _name, string memory _symbol)
+        public
+        ERC20(_name, _symbol)
+    {}
+
+    function mint(address _account, uint256 _amount) external {
+        _mint(_account, _amount);
+    }
+
+    function burn(address _account, uint256 _amount) external {
+        _burn(_account, _amount);
+    }
+}
@@ -0,0 +1,51 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "./TestUniswapV3Pool.sol";
+
+// Uniswap v3 factory stand-in. Pools are deployed with CREATE2 from the sorted
+// tokens and fee as in Uniswap, so their addresses can be computed from the
+// factory address and `poolInitCodeHash`.
+contract TestUniswapV3Factory {
+    struct Parameters {
+        address factory;
+        address token0;
+        address token1;
+        uint24 fee;
+    }
+
+    // Read by the pool being deployed
+    Parameters public parameters;
+
+    mapping(address => mapping(address => mapping(uint24 => address)))
+        public getPool;
+
+    function createPool(
+        address _tokenA,
+        address _tokenB,
+        uint24 _fee
+    ) external returns (address _pool) {
+        (address token0, address token1) =
+            _tokenA < _tokenB ? (_tokenA, _tokenB) : (_tokenB, _tokenA);
+        require(
+            getPool[token0][token1][_fee] == address(0),
+            "TestUniswapV3Factory: pool exists"
+        );
+
+        parameters = Parameters(address(this), token0, token1, _fee);
+        _pool = address(
+            new TestUniswapV3Pool{
+                salt: keccak256(abi.encode(token0, token1, _fee))
+            }()
+        );
+        delete parameters;
+
+        getPool[token0][token1][_fee] = _pool;
+        getPool[token1][token0][_fee] = _pool;
+    }
+
+    function poolInitCodeHash() external pure returns (bytes32) {
+        return keccak256(type(TestUniswapV3Pool).creationCode);
+    }
+}
@@ -0,0 +1,206 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/math/SafeMath.sol";
+import {
+    SafeERC20,
+    IERC20
+} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+
+import "../interfaces/uniswap/IUniswapV3Pool.sol";
+import "../interfaces/uniswap/IUniswapV3SwapCallback.sol";
+import "./libraries/TickMath.sol";
+
+interface ITestPoolDeployer {
+    function parameters()
+        external
+        view
+        returns (
+            address factory,
+            address token0,
+            address token1,
+            uint24 fee
+        );
+}
+
+// Uniswap v3 pool stand-in. The pool is modelled as a constant product pool over
+// virtual reserves set by the tests, so prices and price impact are configurable.
+// As the real pool, it pays the output first and then asks the caller to pay
+// the input through `uniswapV3SwapCallback`. Output tokens are paid from the
+// pool balance, which has to be funded beforehand. Only exact input swaps are
+// supported and price limits are ignored. The oracle reports the price set
+// with the reserves as if it had never changed, so swaps do not move it.
+contract TestUniswapV3Pool is IUniswapV3Pool {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    // Uniswap fees are expressed in hundredths of a bip
+    uint256 internal constant FEE_DENOMINATOR = 1e6;
+
+    address public immutable factory;
+    address public immutable token0;
+    address public immutable token1;
+    uint24 public immutable fee;
+
+    uint256 public reserve0;
+    uint256 public reserve1;
+
+    // Tick of the price reported by the oracle
+    int24 public oracleTick;
+
+    // Constructor arguments are read from the factory so that the pool address
+    // only depends on the tokens and fee, as in Uniswap
+    constructor() public {
+        (address _factory, address _token0, address _token1, uint24 _fee) =
+            ITestPoolDeployer(msg.sender).parameters();
+        factory = _factory;
+        token0 = _token0;
+        token1 = _token1;
+        fee = _fee;
+    }
+
+    function setReserves(uint256 _reserve0, uint256 _reserve1) external {
+        reserve0 = _reserve0;
+        reserve1 = _reserve1;
+        oracleTick = _tickAtSqrtRatio(_sqrtPriceX96());
+    }
+
+    // Spot price of the virtual reserves. Only sqrtPriceX96 is meaningful
+    function slot0()
+        external
+        view
+        override
+        returns (
+            uint160 sqrtPriceX96,
+            int24,
+            uint16,
+            uint16,
+            uint16,
+            uint8,
+            bool unlocked
+        )
+    {
+        sqrtPriceX96 = _sqrtPriceX96();
+        unlocked = true;
+    }
+
+    // In-range liquidity of the virtual reserves, sqrt(reserve0 * reserve1)
+    function liquidity() external view override returns (uint128) {
+        return uint128(_sqrt(reserve0.mul(reserve1)));
+    }
+
+    function observe(uint32[] calldata _secondsAgos)
+        external
+        view
+        override
+        returns (
+            int56[] memory tickCumulatives,
+            uint160[] memory secondsPerLiquidityCumulativeX128s
+        )
+    {
+        int56 tick = oracleTick;
+
+        tickCumulatives = new int56[](_secondsAgos.length);
+        secondsPerLiquidityCumulativeX128s = new uint160[](
+            _secondsAgos.length
+        );
+        for (uint256 i = 0; i < _secondsAgos.length; i++) {
+            tickCumulatives[i] =
+                tick *
+                int56(block.timestamp.sub(_secondsAgos[i]));
+        }
+    }
+
+    function getAmountOut(bool _zeroForOne, uint256 _amountIn)
+        public
+        view
+        returns (uint256)
+    {
+        (uint256 reserveIn, uint256 reserveOut) =
+            _zeroForOne ? (reserve0, reserve1) : (reserve1, reserve0);
+        require(
+            reserveIn > 0 && reserveOut > 0,
+            "TestUniswapV3Pool: no liquidity"
+        );
+
+        uint256 amountInLessFee =
+            _amountIn.mul(FEE_DENOMINATOR.sub(fee)).div(FEE_DENOMINATOR);
+        return
+            reserveOut.mul(amountInLessFee).div(
+                reserveIn.add(amountInLessFee)
+            );
+    }
+
+    function swap(
+        address _recipient,
+        bool _zeroForOne,
+        int256 _amountSpecified,
+        uint160,
+        bytes calldata _data
+    ) external override returns (int256 _amount0, int256 _amount1) {
+        require(_amountSpecified > 0, "TestUniswapV3Pool: not supported");
+
+        uint256 amountIn = uint256(_amountSpecified);
+        uint256 amountOut = getAmountOut(_zeroForOne, amountIn);
+
+        IERC20 tokenIn;
+        if (_zeroForOne) {
+            tokenIn = IERC20(token0);
+            reserve0 = reserve0.add(amountIn);
+            reserve1 = reserve1.sub(amountOut);
+            (_amount0, _amount1) = (_amountSpecified, -int256(amountOut));
+            IERC20(token1).safeTransfer(_recipient, amountOut);
+        } else {
+            tokenIn = IERC20(token1);
+            reserve1 = reserve1.add(amountIn);
+            reserve0 = reserve0.sub(amountOut);
+            (_amount0, _amount1) = (-int256(amountOut), _amountSpecified);
+            IERC20(token0).safeTransfer(_recipient, amountOut);
+        }
+
+        uint256 balanceBefore = tokenIn.balanceOf(address(this));
+        IUniswapV3SwapCallback(msg.sender).uniswapV3SwapCallback(
+            _amount0,
+            _amount1,
+            _data
+        );
+        require(
+            tokenIn.balanceOf(address(this)) >= balanceBefore.add(amountIn),
+            "IIA"
+        );
+    }
+
+    // sqrt(reserve1 / reserve0) * 2^96, split to avoid overflows
+    function _sqrtPriceX96() internal view returns (uint160) {
+        return uint160(_sqrt(reserve1.mul(2**96).div(reserve0)).mul(2**48));
+    }
+
+    // Greatest tick whose price is at most `_sqrtPriceX96`, found by bisection
+    function _tickAtSqrtRatio(uint160 _sqrtPriceX96)
+        internal
+        pure
+        returns (int24)
+    {
+        int256 low = TickMath.MIN_TICK;
+        int256 high = TickMath.MAX_TICK;
+        while (low < high) {
+            int256 mid = (low + high + 1) / 2;
+            if (TickMath.getSqrtRatioAtTick(int24(mid)) <= _sqrtPriceX96) {
+                low = mid;
+            } else {
+                high = mid - 1;
+            }
+        }
+        return int24(low);
+    }
+
+    function _sqrt(uint256 _x) internal pure returns (uint256 y) {
+        uint256 z = (_x + 1) / 2;
+        y = _x;
+        while (z < y) {
+            y = z;
+            z = (_x / z + z) / 2;
+        }
+    }
+}
@@ -0,0 +1,29 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+
+// Minimal WETH9 replacement. `mint` allows funding swap reserves without
+// locking ETH, so only minted balances are not backed by ETH
+contract TestWETH is ERC20 {
+    constructor() public ERC20("Wrapped Ether", "WETH") {}
+
+    receive() external payable {
+        deposit();
+    }
+
+    function deposit() public payable {
+        _mint(msg.sender, msg.value);
+    }
+
+    function withdraw(uint256 _wad) external {
+        _burn(msg.sender, _wad);
+        (bool sent, ) = msg.sender.call{value: _wad}("");
+        require(sent); // dev: could not send ether
+    }
+
+    function mint(address _account, uint256 _amount) external {
+        _mint(_account, _amount);
+    }
+}
@@ -0,0 +1,198 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import {SafeMath} from "@openzeppelin/contracts/math/SafeMath.sol";
+import {Address} from "@openzeppelin/contracts/utils/Address.sol";
+
+import "../../interfaces/curve/IStableSwapExchange.sol";
+import "../../interfaces/uniswap/IQuoter.sol";
+import "../../interfaces/uniswap/IUniswapV3Pool.sol";
+
+// Split order planning, pool depths and Uniswap v3 path handling for the
+// token conversions of Strategy. The external functions are deployed once
+// and linked rather than copied into the strategy bytecode, which keeps it
+// under the EIP-170 size limit. They run in the context of the caller
+library SwapLib {
+    using SafeMath for uint256;
+    using Address for address;
+
+    // Venues of a split order. Venue 0 is Curve and venue i the Uniswap
+    // DAI-LUSD pool with fees[i - 1]
+    struct SplitOrderVenues {
+        IStableSwapExchange curvePool;
+        IQuoter quoter;
+        address dai;
+        address lusd;
+        uint24[] fees;
+    }
+
+    // ----------------- SPLIT ORDERS -----------------
+
+    // Allocates `_daiAmount` to the venues one chunk at a time, each chunk
+    // going to the venue paying the most LUSD for it on top of what was
+    // allocated there. The output of every venue is concave in the amount
+    // sold, so this is the best split for the chunk size
+    function splitOrder(
+        SplitOrderVenues memory _venues,
+        uint256 _steps,
+        uint256 _daiAmount
+    ) external returns (uint256[] memory _amountIn) {
+        _amountIn = new uint256[](_venues.fees.length + 1);
+        uint256[] memory amountOut = new uint256[](_venues.fees.length + 1);
+
+        uint256 chunk = _daiAmount.div(_steps);
+        for (uint256 i = 0; i < _steps; i++) {
+            // Last chunk takes the remainder of the division
+            if (i == _steps - 1) {
+                chunk = _daiAmount.sub(chunk.mul(_steps - 1));
+            }
+
+            (uint256 venue, uint256 out) =
+                _bestVenue(_venues, _amountIn, amountOut, chunk);
+            _amountIn[venue] = _amountIn[venue].add(chunk);
+            amountOut[venue] = out;
+        }
+    }
+
+    // Venue paying the most LUSD for `_chunk` on top of what was allocated to
+    // it, and its output for the new allocation. Ties, venues that cannot be
+    // quoted and chunks that no venue pays more for go to Curve
+    function _bestVenue(
+        SplitOrderVenues memory _venues,
+        uint256[] memory _amountIn,
+        uint256[] memory _amountOut,
+        uint256 _chunk
+    ) internal returns (uint256 _venue, uint256 _out) {
+        uint256 bestGain;
+        for (uint256 venue = 0; venue < _amountIn.length; venue++) {
+            uint256 out =
+                _quoteVenue(_venues, venue, _amountIn[venue].add(_chunk));
+            if (venue == 0) {
+                // Curve output with the chunk, in case no venue improves
+                _out = out;
+            }
+            if (out > _amountOut[venue] && out - _amountOut[venue] > bestGain) {
+                _venue = venue;
+                _out = out;
+                bestGain = out - _amountOut[venue];
+            }
+        }
+    }
+
+    // LUSD received for `_daiAmount` on a split order venue. The quoter
+    // reverts for non-existent pools, which are quoted as 0
+    function _quoteVenue(
+        SplitOrderVenues memory _venues,
+        uint256 _venue,
+        uint256 _daiAmount
+    ) internal returns (uint256) {
+        if (_venue == 0) {
+            return _venues.curvePool.get_dy_underlying(1, 0, _daiAmount);
+        }
+
+        try
+            _venues.quoter.quoteExactInputSingle(
+                _venues.dai,
+                _venues.lusd,
+                _venues.fees[_venue - 1],
+                _daiAmount,
+                0
+            )
+        returns (uint256 _lusdOut) {
+            return _lusdOut;
+        } catch {
+            return 0;
+        }
+    }
+
+    // Amount received for `_amountIn` along a Uniswap v3 path. The quoter
+    // reverts for non-existent pools, which are quoted as 0
+    function quoteExactInput(
+        IQuoter _quoter,
+        bytes memory _path,
+        uint256 _amountIn
+    ) external returns (uint256) {
+        try _quoter.quoteExactInput(_path, _amountIn) returns (
+            uint256 _amountOut
+        ) {
+            return _amountOut;
+        } catch {
+            return 0;
+        }
+    }
+
+    // ----------------- SLIPPAGE -----------------
+
+    // Depth of a Uniswap v3 pool in the token sold. 0 if the pool does not
+    // exist. Pools are as deep as the virtual reserves backing their
+    // in-range liquidity
+    function uniswapDepth(address _pool, bool _zeroForOne)
+        external
+        view
+        returns (uint256)
+    {
+        if (!_pool.isContract()) {
+            return 0;
+        }
+
+        (uint160 sqrtPriceX96, , , , , , ) = IUniswapV3Pool(_pool).slot0();
+        uint256 liquidity = IUniswapV3Pool(_pool).liquidity();
+        if (sqrtPriceX96 == 0) {
+            return 0;
+        }
+
+        // L / sqrt(P) of token0 and L * sqrt(P) of token1. Shifted so that
+        // neither product overflows
+        if (_zeroForOne) {
+            return (liquidity << 96) / sqrtPriceX96;
+        }
+        return liquidity.mul(sqrtPriceX96 >> 32) >> 64;
+    }
+
+    // ----------------- PATHS -----------------
+
+    // Validates a Uniswap v3 path set as the route to sell `_tokenIn`. DAI
+    // can only be sold for LUSD, other tokens for LUSD or DAI
+    function validateRoute(
+        bytes memory _path,
+        address _tokenIn,
+        address _dai,
+        address _lusd
+    ) external pure {
+        require(
+            _path.length >= 43 && (_path.length - 20) % 23 == 0
+        ); // dev: invalid path
+        require(toAddress(_path, 0) == _tokenIn); // dev: invalid first token
+
+        address tokenOut = toAddress(_path, _path.length - 20);
+        require(
+            tokenOut == _lusd || (tokenOut == _dai && _tokenIn != _dai)
+        ); // dev: invalid last token
+    }
+
+    // Reads the token address starting at byte `_start` of a Uniswap v3 path
+    function toAddress(bytes memory _bytes, uint256 _start)
+        internal
+        pure
+        returns (address _address)
+    {
+        assembly {
+            _address := div(
+                mload(add(add(_bytes, 0x20), _start)),
+                0x1000000000000000000000000
+            )
+        }
+    }
+
+    // Reads the pool fee starting at byte `_start` of a Uniswap v3 path
+    function toUint24(bytes memory _bytes, uint256 _start)
+        internal
+        pure
+        returns (uint24 _uint24)
+    {
+        assembly {
+            _uint24 := and(mload(add(add(_bytes, 0x3), _start)), 0xffffff)
+        }
+    }
+}
@@ -3,6 +3,8 @@
 pragma solidity 0.6.12;
 
 interface IStableSwapExchange {
+    function balances(uint256 i) external view returns (uint256);
+
     function get_dy_underlying(
         int128 i,
         int128 j,
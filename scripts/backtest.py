@@ -0,0 +1,193 @@
+import heapq
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from scripts.simulator import (
+    DAY,
+    DEFAULT_POLICY,
+    YEAR,
+    HarvestPolicy,
+    Results,
+    StabilityPool,
+    StrategyModel,
+    grid,
+    lqty_issued,
+)
+
+# Start of LQTY issuance to the Stability Pool
+LIQUITY_LAUNCH = 1617611537
+
+# Rows read at a time from Parquet files
+PARQUET_BATCH_SIZE = 65_536
+
+# Records replayed, one per line of JSONL files or row of Parquet files, in
+# timestamp order within each file. Amounts are in wei, as integers or
+# decimal strings, and prices in LUSD:
+#
+#   {"timestamp": 1620000000, "type": "price", "eth": 3000.0, "lqty": 7.5,
+#    "gas_price": 50000000000}
+#       Prices from then on. lqty and gas_price may be left out
+#   {"timestamp": 1620000000, "type": "offset", "debt": ..., "collateral": ...,
+#    "total_deposits": ...}
+#       A liquidation offsetting `debt` LUSD against `collateral` ETH, with
+#       the LUSD in the Stability Pool before it. Until the first offset or
+#       deposits record, the Stability Pool only holds the strategy
+#   {"timestamp": 1620000000, "type": "deposits", "total_deposits": ...}
+#       LUSD in the Stability Pool after deposits and withdrawals
+#   {"timestamp": 1620000000, "type": "withdrawal", "share": 0.1}
+#       Share of the debt of the strategy withdrawn from the vault
+#
+# The strategy is added on top of the recorded Stability Pool: it absorbs
+# its share of each liquidation and the rest of the pool is as recorded
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_parquet(path, batch_size=PARQUET_BATCH_SIZE):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow is needed to read Parquet files") from None
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+
+def read_records(paths):
+    """
+    Records of every file in `paths` merged in timestamp order. Files are
+    read lazily, a line or a batch of rows at a time.
+    """
+    readers = [
+        read_parquet(path) if Path(path).suffix == ".parquet" else read_jsonl(path)
+        for path in paths
+    ]
+    return heapq.merge(*readers, key=lambda record: record["timestamp"])
+
+
+def _policy_size(policy):
+    return max(np.size(value) for value in policy)
+
+
+def _select(policy, indices):
+    n = _policy_size(policy)
+    return HarvestPolicy(
+        *[np.broadcast_to(np.asarray(value), (n,))[indices] for value in policy]
+    )
+
+
+def replay(
+    paths,
+    policy=DEFAULT_POLICY,
+    deposit=1_000_000 * 10 ** 18,
+    launch=LIQUITY_LAUNCH,
+    step=DAY,
+):
+    """
+    Replays the records in `paths` through the strategy once for every entry
+    of `policy`, whose harvest intervals are in `step` seconds. Harvests are
+    due at the first record after each interval, once prices are known. LQTY
+    is issued to the Stability Pool between records.
+
+    Memory does not grow with the length of the records.
+    """
+    n = _policy_size(policy)
+    pool = StabilityPool(n)
+    strategy = StrategyModel(pool, policy, deposit)
+    interval = strategy.policy.harvest_interval * step
+
+    eth_price = lqty_price = None
+    gas_price = 0
+    start = last = last_harvest = None
+
+    for record in read_records(paths):
+        timestamp = record["timestamp"]
+        if start is None:
+            start = last = last_harvest = timestamp
+        pool.issue(lqty_issued(timestamp - launch) - lqty_issued(last - launch))
+        last = timestamp
+
+        # Harvests due by now go first
+        if eth_price is not None:
+            due = timestamp - last_harvest >= interval
+            if np.any(due):
+                harvested = strategy.harvest(due, eth_price, lqty_price, gas_price)
+                last_harvest = np.where(harvested, timestamp, last_harvest)
+
+        kind = record["type"]
+        if kind == "price":
+            eth_price = float(record["eth"])
+            if record.get("lqty") is not None:
+                lqty_price = float(record["lqty"])
+            elif lqty_price is None:
+                lqty_price = 0.0
+            if record.get("gas_price") is not None:
+                gas_price = float(record["gas_price"])
+        elif kind == "offset":
+            # Scaled to the recorded pool with the strategy in it
+            recorded = float(record["total_deposits"])
+            share = float(record["debt"]) / recorded
+            coll_share = float(record["collateral"]) / recorded
+            total = pool.total_deposits = recorded + pool.compounded_deposit()
+            pool.offset(np.minimum(total * share, total), total * coll_share)
+        elif kind == "deposits":
+            pool.total_deposits = (
+                float(record["total_deposits"]) + pool.compounded_deposit()
+            )
+        elif kind == "withdrawal":
+            strategy.liquidate_position(strategy.total_debt * float(record["share"]))
+        else:
+            raise ValueError(f"unknown record type: {kind}")
+
+    if start is None:
+        raise ValueError("no records to replay")
+    years = (last - start) / YEAR
+    return strategy.results(eth_price or 0.0, lqty_price or 0.0, years)
+
+
+def backtest(paths, policy=DEFAULT_POLICY, processes=None, **kwargs):
+    """
+    Replays the records in `paths` for every entry of `policy`, split across
+    `processes` (one per core by default). Each process reads the records on
+    its own.
+    """
+    n = _policy_size(policy)
+    chunks = np.array_split(np.arange(n), min(processes or os.cpu_count(), n))
+
+    with ProcessPoolExecutor(len(chunks)) as executor:
+        futures = [
+            executor.submit(replay, paths, _select(policy, chunk), **kwargs)
+            for chunk in chunks
+        ]
+        results = [future.result() for future in futures]
+
+    return Results(*[np.concatenate(values) for values in zip(*results)])
+
+
+def main(*paths):
+    # `brownie run backtest main <records> [<records> ...]`
+    intervals = [1, 3, 7, 14, 30]
+    combinations, policy = grid(1, harvest_interval=intervals)
+    results = backtest(paths, policy)
+
+    print(
+        f"{'interval':>8} {'apy':>8} {'net apy':>8} {'premium':>8} "
+        f"{'gas':>10} {'harvests':>8}"
+    )
+    for i, (interval,) in enumerate(combinations):
+        loss = results.lusd_loss[i]
+        premium = results.eth_proceeds[i] / loss - 1 if loss else 0.0
+        print(
+            f"{interval:>8} {results.apy[i]:>8.2%} {results.net_apy[i]:>8.2%} "
+            f"{premium:>8.2%} {results.gas_spent[i] / 1e18:>10.2f} "
+            f"{results.harvests[i]:>8.0f}"
+        )
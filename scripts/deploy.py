@@ -1,10 +1,26 @@
 from pathlib import Path
 
-from brownie import Strategy, accounts, config, network, project, web3
+from brownie import Strategy, SwapLib, accounts, config, network, project, web3
 from eth_utils import is_checksum_address
 import click
 
 API_VERSION = config["dependencies"][0].split("@")[-1]
+
+# Strategy.ProtocolAddresses on mainnet
+PROTOCOL_ADDRESSES = [
+    "0x6DEA81C8171D0bA574754EF6F8b412F2Ed88c54D",  # LQTY
+    "0x66017D22b0f8556afDd19FC67041899Eb65a21bb",  # Stability Pool
+    "0x4c517D4e2C851CA76d7eC94B805269Df0f2201De",  # Liquity PriceFeed
+    "0xE592427A0AEce92De3Edee1F18E0157C05861564",  # Uniswap v3 router
+    "0xEd279fDD11cA84bEef15AF5D39BB4d4bEE23F0cA",  # LUSD3CRV Curve metapool
+    "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2",  # WETH
+    "0x6B175474E89094C44Da98b954EedeAC495271d0F",  # DAI
+    "0x1F98431c8aD98523631AE4a59f267346ea31F984",  # Uniswap v3 factory
+    # Uniswap v3 pool init code hash
+    "0xe34f199b19b2b4f47f68442619d555527d244f78a3297ea89325f843f87b8b54",
+    "0xb27308f9F90D607463bb33eA1BeBb41C27CE5AB6",  # Uniswap v3 quoter
+    "0x5f4eC3Df9cbd43714FE2740F5E3616155c5b8419",  # Chainlink ETH:USD
+]
 Vault = project.load(
     Path.home() / ".brownie" / "packages" / config["dependencies"][0]
 ).Vault
@@ -55,4 +71,10 @@ def main():
     if input("Deploy Strategy? y/[N]: ").lower() != "y":
         return
 
-    strategy = Strategy.deploy(vault, {"from": dev}, publish_source=publish_source)
+    # Strategy is linked to the last SwapLib deployed on the network
+    if len(SwapLib) == 0:
+        SwapLib.deploy({"from": dev}, publish_source=publish_source)
+
+    strategy = Strategy.deploy(
+        vault, PROTOCOL_ADDRESSES, {"from": dev}, publish_source=publish_source
+    )
@@ -0,0 +1,159 @@
+from collections import defaultdict
+from pathlib import Path
+
+from brownie import Strategy, SwapLib, Wei, accounts, chain, config, network, project
+
+from scripts.mock_protocol import deploy_mock_protocol, protocol_addresses
+
+# Number of harvests profiled by `brownie run gas_profile --network development`
+RUNS = 20
+
+REPORTS_PATH = Path(__file__).parent.parent / "reports"
+
+
+def step_costs(trace):
+    """
+    Gas consumed by every step of `tx.trace`, computed from the gas left
+    before each step so it does not depend on how the node reports the cost
+    of CALL opcodes. A step entering another contract is charged the call
+    overhead only; gas used by the callee is charged to the callee steps.
+    """
+    costs = [step["gasCost"] for step in trace]
+    # Steps that entered a call which has not returned yet
+    calls = []
+
+    for i in range(len(trace) - 1):
+        step, next_step = trace[i], trace[i + 1]
+        if next_step["depth"] == step["depth"]:
+            costs[i] = step["gas"] - next_step["gas"]
+        elif next_step["depth"] > step["depth"]:
+            calls.append(i)
+        elif calls:
+            call = calls.pop()
+            used = trace[call]["gas"] - next_step["gas"]
+            costs[call] = used - sum(costs[call + 1 : i + 1])
+
+    return costs
+
+
+def folded_stacks(trace):
+    """
+    Attribute the gas of `tx.trace` to the stack of internal and external
+    calls each step was executed in, e.g.
+
+        "Strategy.harvest;Strategy.prepareReturn;TestCurvePool.exchange_underlying"
+
+    Gas is execution gas: the intrinsic cost and storage refunds of the
+    transaction are not included.
+    """
+    gas = defaultdict(int)
+    # (depth, jumpDepth, stack) of the active frames
+    frames = []
+
+    for step, cost in zip(trace, step_costs(trace)):
+        frame = (step["depth"], step["jumpDepth"])
+        while frames and frames[-1][:2] > frame:
+            frames.pop()
+
+        if not frames or frames[-1][:2] != frame:
+            parent = frames[-1][2] if frames else None
+            stack = f"{parent};{step['fn']}" if parent else step["fn"]
+            frames.append((*frame, stack))
+
+        gas[frames[-1][2]] += cost
+
+    return dict(gas)
+
+
+def aggregate(profiles):
+    # Sum folded stacks over several transactions
+    total = defaultdict(int)
+    for profile in profiles:
+        for stack, gas in profile.items():
+            total[stack] += gas
+    return dict(total)
+
+
+def function_costs(stacks):
+    # Gas spent in each function alone (self) and including its callees
+    costs = defaultdict(lambda: {"self": 0, "total": 0})
+    for stack, gas in stacks.items():
+        functions = stack.split(";")
+        costs[functions[-1]]["self"] += gas
+        # Recursive calls are only counted once per stack
+        for fn in set(functions):
+            costs[fn]["total"] += gas
+    return dict(costs)
+
+
+def format_report(stacks, runs):
+    costs = function_costs(stacks)
+    lines = [
+        f"{'function':<60} {'self':>12} {'total':>12} {'% of tx':>8}",
+        "-" * 95,
+    ]
+    tx_gas = sum(stacks.values())
+    for fn, cost in sorted(costs.items(), key=lambda item: -item[1]["total"]):
+        lines.append(
+            f"{fn:<60} {cost['self'] // runs:>12} {cost['total'] // runs:>12} "
+            f"{cost['total'] / tx_gas * 100:>7.2f}%"
+        )
+    lines.append("-" * 95)
+    lines.append(f"average gas over {runs} transactions: {tx_gas // runs}")
+    return "\n".join(lines) + "\n"
+
+
+def format_folded(stacks):
+    # One "frame;frame;frame gas" line per stack, the input of flamegraph.pl
+    return "".join(
+        f"{stack} {gas}\n" for stack, gas in sorted(stacks.items()) if gas > 0
+    )
+
+
+def write_reports(name, profiles):
+    stacks = aggregate(profiles)
+    REPORTS_PATH.mkdir(exist_ok=True)
+    report = REPORTS_PATH / f"{name}.txt"
+    report.write_text(format_report(stacks, len(profiles)))
+    folded = REPORTS_PATH / f"{name}.folded"
+    folded.write_text(format_folded(stacks))
+    return report, folded
+
+
+def main(runs=RUNS):
+    print(f"You are using the '{network.show_active()}' network")
+    gov, user = accounts[9], accounts[0]
+    protocol = deploy_mock_protocol(gov, accounts[6], accounts[7], accounts[8])
+    lusd, stability_pool = protocol["lusd"], protocol["stability_pool"]
+
+    Vault = project.load(
+        Path.home() / ".brownie" / "packages" / config["dependencies"][0]
+    ).Vault
+    vault = gov.deploy(Vault)
+    vault.initialize(lusd, gov, gov, "", "", gov, gov)
+    vault.setDepositLimit(2 ** 256 - 1, {"from": gov})
+
+    gov.deploy(SwapLib)
+    strategy = gov.deploy(Strategy, vault, protocol_addresses(protocol))
+    strategy.setHealthCheck(protocol["health_check"], {"from": gov})
+    vault.addStrategy(strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+
+    amount = 100_000 * 10 ** 18
+    lusd.transfer(user, amount, {"from": protocol["lusd_whale"]})
+    lusd.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    strategy.harvest({"from": gov})
+
+    profiles = []
+    for _ in range(runs):
+        # A day of LQTY issuance and a liquidation at 150% collateral ratio
+        chain.sleep(24 * 3600)
+        stability_pool.liquidate(
+            1_000_000 * 10 ** 18, {"from": gov, "value": Wei("500 ether")}
+        )
+        tx = strategy.harvest({"from": gov})
+        profiles.append(folded_stacks(tx.trace))
+
+    report, folded = write_reports("harvest_gas", profiles)
+    print(report.read_text())
+    print(f"Report written to {report}, flamegraph input to {folded}")
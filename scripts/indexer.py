@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import sqlite3
+
+import aiohttp
+from brownie import network, web3
+from eth_utils import event_signature_to_log_topic, to_checksum_address
+
+try:
+    from eth_abi import decode as decode_abi
+except ImportError:
+    # eth-abi < 4, installed with eth-brownie < 1.20
+    from eth_abi import decode_abi
+
+from scripts.keeper import RPC, RPCError, VAULT, decode, eth_call
+
+logger = logging.getLogger(__name__)
+
+STABILITY_POOL = "0x66017D22b0f8556afDd19FC67041899Eb65a21bb"
+
+# Blocks per eth_getLogs request. Ranges whose request fails, usually because
+# the node caps the number of results, are split in halves and later chunks
+# shrink to match. Chunks double again after a round without failures
+INITIAL_CHUNK_SIZE = 2_000
+MAX_CHUNK_SIZE = 100_000
+
+# eth_getLogs requests in flight at the same time
+CONCURRENCY = 4
+
+# Blocks behind the head left unindexed so that reorgs do not reach the
+# database
+CONFIRMATIONS = 12
+
+
+def topic(signature):
+    return "0x" + event_signature_to_log_topic(signature).hex()
+
+
+def address_topic(address):
+    return "0x" + address[2:].lower().rjust(64, "0")
+
+
+# Vault.StrategyReported, StabilityPool.ETHGainWithdrawn and
+# LQTYPaidToDepositor, and Strategy.Swapped. Only the data types of each
+# event are listed, the indexed values are read from the topics
+STRATEGY_REPORTED = topic(
+    "StrategyReported(address,uint256,uint256,uint256,uint256,uint256,uint256,"
+    "uint256,uint256)"
+)
+STRATEGY_REPORTED_TYPES = ["uint256"] * 8
+ETH_GAIN_WITHDRAWN = topic("ETHGainWithdrawn(address,uint256,uint256)")
+ETH_GAIN_WITHDRAWN_TYPES = ["uint256", "uint256"]
+LQTY_PAID_TO_DEPOSITOR = topic("LQTYPaidToDepositor(address,uint256)")
+LQTY_PAID_TO_DEPOSITOR_TYPES = ["uint256"]
+SWAPPED = topic("Swapped(address,address,address,uint256,uint256,uint256)")
+SWAPPED_TYPES = ["uint256", "uint256", "uint256"]
+
+# Amounts are uint256 and do not fit SQLite integers, so they are stored as
+# exact decimal strings. Arithmetic on them in queries is done in floating
+# point, e.g. `CAST(amount_out AS REAL) / CAST(amount_in AS REAL)`
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    gain TEXT NOT NULL,
+    loss TEXT NOT NULL,
+    debt_paid TEXT NOT NULL,
+    total_gain TEXT NOT NULL,
+    total_loss TEXT NOT NULL,
+    total_debt TEXT NOT NULL,
+    debt_added TEXT NOT NULL,
+    debt_ratio TEXT NOT NULL,
+    PRIMARY KEY (block, log_index)
+);
+CREATE INDEX IF NOT EXISTS reports_strategy ON reports (strategy, block);
+
+CREATE TABLE IF NOT EXISTS gains (
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    token TEXT NOT NULL, -- ETH or LQTY
+    amount TEXT NOT NULL,
+    lusd_loss TEXT, -- LUSD offset by the ETH gain, NULL for LQTY
+    PRIMARY KEY (block, log_index)
+);
+CREATE INDEX IF NOT EXISTS gains_strategy ON gains (strategy, token, block);
+
+CREATE TABLE IF NOT EXISTS swaps (
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    token_in TEXT NOT NULL,
+    token_out TEXT NOT NULL,
+    venue TEXT NOT NULL,
+    amount_in TEXT NOT NULL,
+    amount_out TEXT NOT NULL,
+    min_amount_out TEXT NOT NULL,
+    PRIMARY KEY (block, log_index)
+);
+CREATE INDEX IF NOT EXISTS swaps_strategy ON swaps (strategy, token_in, token_out);
+CREATE INDEX IF NOT EXISTS swaps_block ON swaps (block);
+
+-- Timestamps of the blocks with indexed events
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    timestamp INTEGER NOT NULL
+);
+
+-- Last block indexed for each strategy
+CREATE TABLE IF NOT EXISTS checkpoints (
+    strategy TEXT PRIMARY KEY,
+    block INTEGER NOT NULL
+);
+"""
+
+
+def connect(path):
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    return db
+
+
+class Indexer:
+    """
+    Indexes the reports of a strategy to its vault, the gains it withdraws
+    from the Stability Pool and its swaps into an SQLite database.
+
+    Logs are fetched in block range chunks, `concurrency` chunks at a time.
+    Each round of chunks is inserted in a single transaction along with the
+    checkpoint, so an interrupted run resumes after the last round stored.
+    """
+
+    def __init__(
+        self,
+        rpc,
+        db,
+        strategy,
+        stability_pool=STABILITY_POOL,
+        chunk_size=INITIAL_CHUNK_SIZE,
+        max_chunk_size=MAX_CHUNK_SIZE,
+        concurrency=CONCURRENCY,
+        confirmations=CONFIRMATIONS,
+    ):
+        self.rpc = rpc
+        self.db = db
+        self.strategy = to_checksum_address(strategy)
+        self.stability_pool = to_checksum_address(stability_pool)
+        self.chunk_size = chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.concurrency = concurrency
+        self.confirmations = confirmations
+        # Immutable, read with the first run
+        self.vault = None
+        # Whether a request of the current round had to be split
+        self._split = False
+
+    def checkpoint(self):
+        """
+        Last block indexed, or None if the strategy was never indexed.
+        """
+        row = self.db.execute(
+            "SELECT block FROM checkpoints WHERE strategy = ?", (self.strategy,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    async def index(self, from_block=0, to_block=None):
+        """
+        Indexes the blocks after the checkpoint, or from `from_block` the
+        first time, up to `to_block` (`confirmations` behind the head by
+        default). Returns the last block indexed.
+        """
+        if self.vault is None:
+            method, params = eth_call(self.strategy, VAULT)
+            vault = await self.rpc.request(method, *params)
+            self.vault = to_checksum_address(decode("address", vault))
+
+        if to_block is None:
+            head = int(await self.rpc.request("eth_blockNumber"), 16)
+            to_block = head - self.confirmations
+
+        checkpoint = self.checkpoint()
+        start = from_block if checkpoint is None else max(from_block, checkpoint + 1)
+        while start <= to_block:
+            ranges = []
+            while len(ranges) < self.concurrency and start <= to_block:
+                end = min(start + self.chunk_size - 1, to_block)
+                ranges.append((start, end))
+                start = end + 1
+
+            self._split = False
+            chunks = await asyncio.gather(
+                *[self._get_logs(first, last) for first, last in ranges]
+            )
+            logs = [log for chunk in chunks for log in chunk]
+            timestamps = await self._get_timestamps(logs)
+            self._store(logs, timestamps, ranges[-1][1])
+            logger.info(
+                "%s: indexed blocks %d-%d, %d events",
+                self.strategy,
+                ranges[0][0],
+                ranges[-1][1],
+                len(logs),
+            )
+
+            if not self._split:
+                self.chunk_size = min(self.chunk_size * 2, self.max_chunk_size)
+
+        return self.checkpoint()
+
+    def _filters(self, first, last):
+        blocks = {"fromBlock": hex(first), "toBlock": hex(last)}
+        strategy = address_topic(self.strategy)
+        return [
+            {**blocks, "address": self.vault, "topics": [STRATEGY_REPORTED, strategy]},
+            {
+                **blocks,
+                "address": self.stability_pool,
+                "topics": [[ETH_GAIN_WITHDRAWN, LQTY_PAID_TO_DEPOSITOR], strategy],
+            },
+            {**blocks, "address": self.strategy, "topics": [SWAPPED]},
+        ]
+
+    async def _get_logs(self, first, last):
+        # The logs of the vault, the Stability Pool and the strategy are read
+        # in a single batch
+        try:
+            results = await self.rpc.batch(
+                [("eth_getLogs", [filter_]) for filter_ in self._filters(first, last)]
+            )
+            for result in results:
+                if isinstance(result, RPCError):
+                    raise result
+        except (RPCError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if first == last:
+                raise
+            logger.info("Blocks %d-%d split: %s", first, last, e)
+            self._split = True
+            self.chunk_size = min(self.chunk_size, max((last - first + 1) // 2, 1))
+            middle = (first + last) // 2
+            halves = await asyncio.gather(
+                self._get_logs(first, middle), self._get_logs(middle + 1, last)
+            )
+            return halves[0] + halves[1]
+
+        return [log for result in results for log in result]
+
+    async def _get_timestamps(self, logs):
+        blocks = sorted({log["blockNumber"] for log in logs})
+        results = await self.rpc.batch(
+            [("eth_getBlockByNumber", [block, False]) for block in blocks]
+        )
+        for result in results:
+            if isinstance(result, RPCError):
+                raise result
+        return [
+            (int(block["number"], 16), int(block["timestamp"], 16)) for block in results
+        ]
+
+    def _store(self, logs, timestamps, last):
+        reports, gains, swaps = [], [], []
+        for log in logs:
+            row = (
+                int(log["blockNumber"], 16),
+                int(log["logIndex"], 16),
+                log["transactionHash"],
+                self.strategy,
+            )
+            topics = log["topics"]
+            data = bytes.fromhex(log["data"][2:])
+
+            if topics[0] == STRATEGY_REPORTED:
+                values = decode_abi(STRATEGY_REPORTED_TYPES, data)
+                reports.append(row + tuple(str(value) for value in values))
+            elif topics[0] == ETH_GAIN_WITHDRAWN:
+                eth, lusd_loss = decode_abi(ETH_GAIN_WITHDRAWN_TYPES, data)
+                gains.append(row + ("ETH", str(eth), str(lusd_loss)))
+            elif topics[0] == LQTY_PAID_TO_DEPOSITOR:
+                (lqty,) = decode_abi(LQTY_PAID_TO_DEPOSITOR_TYPES, data)
+                gains.append(row + ("LQTY", str(lqty), None))
+            elif topics[0] == SWAPPED:
+                tokens = [to_checksum_address("0x" + t[-40:]) for t in topics[1:4]]
+                values = decode_abi(SWAPPED_TYPES, data)
+                swaps.append(row + tuple(tokens) + tuple(str(v) for v in values))
+
+        # Rows already indexed by an earlier run from an older block are kept
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO reports VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                reports,
+            )
+            self.db.executemany(
+                "INSERT OR IGNORE INTO gains VALUES (?, ?, ?, ?, ?, ?, ?)", gains
+            )
+            self.db.executemany(
+                "INSERT OR IGNORE INTO swaps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                swaps,
+            )
+            self.db.executemany(
+                "INSERT OR IGNORE INTO blocks VALUES (?, ?)", timestamps
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?)",
+                (self.strategy, last),
+            )
+
+
+async def run(url, strategy, database, from_block=0, stability_pool=STABILITY_POOL):
+    db = connect(database)
+    try:
+        async with aiohttp.ClientSession() as session:
+            indexer = Indexer(RPC(url, session), db, strategy, stability_pool)
+            return await indexer.index(from_block)
+    finally:
+        db.close()
+
+
+def main(strategy, database="indexer.db", from_block=0):
+    # `brownie run indexer main <strategy> [<database>] [<from block>]
+    #     --network <network>`
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    print(f"You are using the '{network.show_active()}' network")
+    block = asyncio.run(
+        run(web3.provider.endpoint_uri, strategy, database, int(from_block))
+    )
+    print(f"Indexed up to block {block} into {database}")
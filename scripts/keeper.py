@@ -0,0 +1,384 @@
+import asyncio
+import itertools
+import logging
+
+import aiohttp
+import click
+from brownie import accounts, network, web3
+from eth_account import Account
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+
+try:
+    from eth_abi import decode as decode_abi, encode as encode_abi
+except ImportError:
+    # eth-abi < 4, installed with eth-brownie < 1.20
+    from eth_abi import decode_abi, encode_abi
+
+from scripts.strategy_state import GET_STRATEGY_STATE_SELECTOR, decode_strategy_state
+
+logger = logging.getLogger(__name__)
+
+# Gas used to price a harvest and a tend in the triggers, about what the gas
+# benchmarks measure for a profitable harvest and a tend
+HARVEST_GAS = 1_500_000
+TEND_GAS = 1_000_000
+
+# Seconds between checks for a new block
+POLL_INTERVAL = 5
+
+# Gas limit of the transactions sent over their gas estimate
+GAS_LIMIT_MARGIN = 1.2
+
+# Blocks to wait for the receipt of a transaction before giving up on it, in
+# case it was dropped or replaced
+PENDING_TIMEOUT = 50
+
+HARVEST = function_signature_to_4byte_selector("harvest()")
+TEND = function_signature_to_4byte_selector("tend()")
+HARVEST_TRIGGER = function_signature_to_4byte_selector("harvestTrigger(uint256)")
+TEND_TRIGGER = function_signature_to_4byte_selector("tendTrigger(uint256)")
+WANT = function_signature_to_4byte_selector("want()")
+VAULT = function_signature_to_4byte_selector("vault()")
+
+
+class RPCError(Exception):
+    pass
+
+
+class RPC:
+    """
+    Minimal asynchronous JSON-RPC client. Requests are sent in batches so that
+    reading the state of many strategies takes a single round trip.
+    """
+
+    def __init__(self, url, session):
+        self.url = url
+        self.session = session
+        self._ids = itertools.count()
+
+    async def batch(self, requests):
+        """
+        Sends `(method, params)` requests in a single batch. Results come back
+        in the same order, with failed requests as RPCError instances.
+        """
+        if not requests:
+            return []
+
+        ids = [next(self._ids) for _ in requests]
+        payload = [
+            {"jsonrpc": "2.0", "id": id_, "method": method, "params": params}
+            for id_, (method, params) in zip(ids, requests)
+        ]
+        async with self.session.post(self.url, json=payload) as response:
+            response.raise_for_status()
+            try:
+                replies = await response.json(content_type=None)
+            except ValueError as e:
+                raise RPCError(f"invalid JSON reply: {e}") from None
+
+        # Nodes that cannot handle the batch answer with a single error
+        if isinstance(replies, dict) and "error" in replies:
+            raise RPCError(replies["error"])
+
+        # Batches may be answered in any order
+        try:
+            replies = {reply["id"]: reply for reply in replies}
+        except (KeyError, TypeError):
+            raise RPCError(f"malformed batch reply: {replies!r}") from None
+
+        results = []
+        for id_ in ids:
+            reply = replies.get(id_)
+            if isinstance(reply, dict) and "error" in reply:
+                results.append(RPCError(reply["error"]))
+            elif isinstance(reply, dict) and "result" in reply:
+                results.append(reply["result"])
+            else:
+                raise RPCError(f"no reply to request {id_}")
+        return results
+
+    async def request(self, method, *params):
+        (result,) = await self.batch([(method, list(params))])
+        if isinstance(result, RPCError):
+            raise result
+        return result
+
+
+def eth_call(to, data, block="latest"):
+    return ("eth_call", [{"to": to, "data": "0x" + data.hex()}, block])
+
+
+def decode(type_, result):
+    (value,) = decode_abi([type_], bytes.fromhex(result[2:]))
+    return value
+
+
+def describe(strategy):
+    # Position of a strategy as of its last StrategyState, logged along with
+    # the transactions sent for it
+    state = strategy.state
+    return (
+        f"{state.estimatedTotalAssets / 1e18:,.2f} {strategy.want} in vault "
+        f"{strategy.vault}, {state.totalETHBalance / 1e18:,.4f} ETH and "
+        f"{state.totalLQTYBalance / 1e18:,.2f} LQTY to sell"
+    )
+
+
+class MonitoredStrategy:
+    def __init__(self, address):
+        self.address = to_checksum_address(address)
+        # Immutable, read with the first poll
+        self.want = None
+        self.vault = None
+        # StrategyState read with the last poll
+        self.state = None
+        # Hash of the last transaction sent until it is mined, and the block
+        # it was sent at
+        self.pending = None
+        self.pending_block = None
+
+
+class Keeper:
+    """
+    Polls the triggers and state of many strategies once per block and sends
+    a harvest, or else a tend, for each strategy whose trigger fires.
+
+    Transactions are sent from `sender`, which has to be unlocked by the node
+    unless its `private_key` is given to sign them locally.
+    """
+
+    def __init__(
+        self,
+        rpc,
+        strategies,
+        sender,
+        private_key=None,
+        harvest_gas=HARVEST_GAS,
+        tend_gas=TEND_GAS,
+        pending_timeout=PENDING_TIMEOUT,
+    ):
+        self.rpc = rpc
+        self.strategies = [MonitoredStrategy(address) for address in strategies]
+        self.sender = to_checksum_address(sender)
+        self.private_key = private_key
+        self.harvest_gas = harvest_gas
+        self.tend_gas = tend_gas
+        self.pending_timeout = pending_timeout
+        # Last block polled
+        self.block = None
+        # Immutable, read once when signing locally
+        self.chain_id = None
+        # Next nonce of the sender when signing locally
+        self.nonce = None
+        self._nonce_lock = asyncio.Lock()
+
+    async def poll(self):
+        """
+        Polls every strategy at the latest block. Returns the block and the
+        action taken for each strategy ("harvest", "tend" or None), or None if
+        the block was already polled.
+        """
+        pending = [strategy for strategy in self.strategies if strategy.pending]
+        unloaded = [strategy for strategy in self.strategies if strategy.want is None]
+
+        # Receipts of the transactions sent and immutables not read yet go
+        # along with the block number and gas price
+        results = await self.rpc.batch(
+            [("eth_blockNumber", []), ("eth_gasPrice", [])]
+            + [("eth_getTransactionReceipt", [s.pending]) for s in pending]
+            + [
+                eth_call(s.address, selector)
+                for s in unloaded
+                for selector in [WANT, VAULT]
+            ]
+        )
+        for result in results[:2]:
+            if isinstance(result, RPCError):
+                raise result
+        block, gas_price = int(results[0], 16), int(results[1], 16)
+
+        receipts = results[2 : 2 + len(pending)]
+        for strategy, receipt in zip(pending, receipts):
+            if receipt is not None and not isinstance(receipt, RPCError):
+                status = "mined" if int(receipt["status"], 16) else "reverted"
+                logger.info("%s: %s %s", strategy.address, strategy.pending, status)
+                strategy.pending = None
+            elif block - strategy.pending_block >= self.pending_timeout:
+                # Dropped or replaced. The strategy is polled again, and the
+                # nonce read again in case it was not used
+                logger.warning(
+                    "%s: %s not mined after %d blocks",
+                    strategy.address,
+                    strategy.pending,
+                    block - strategy.pending_block,
+                )
+                strategy.pending = None
+                self.nonce = None
+
+        immutables = results[2 + len(pending) :]
+        for i, strategy in enumerate(unloaded):
+            want, vault = immutables[2 * i : 2 * i + 2]
+            if isinstance(want, RPCError) or isinstance(vault, RPCError):
+                logger.warning("%s: not a strategy", strategy.address)
+                continue
+            strategy.want = to_checksum_address(decode("address", want))
+            strategy.vault = to_checksum_address(decode("address", vault))
+            logger.info(
+                "%s: vault %s, want %s",
+                strategy.address,
+                strategy.vault,
+                strategy.want,
+            )
+
+        if block == self.block:
+            return None
+        self.block = block
+
+        actions = await self._poll_strategies(hex(block), gas_price)
+        return block, actions
+
+    async def _poll_strategies(self, block, gas_price):
+        # Triggers are given the cost of the call they would pay for
+        harvest_cost = encode_abi(["uint256"], [gas_price * self.harvest_gas])
+        tend_cost = encode_abi(["uint256"], [gas_price * self.tend_gas])
+        results = await self.rpc.batch(
+            [
+                call
+                for strategy in self.strategies
+                for call in [
+                    eth_call(strategy.address, HARVEST_TRIGGER + harvest_cost, block),
+                    eth_call(strategy.address, TEND_TRIGGER + tend_cost, block),
+                    eth_call(strategy.address, GET_STRATEGY_STATE_SELECTOR, block),
+                ]
+            ]
+        )
+
+        actions = {}
+        for i, strategy in enumerate(self.strategies):
+            harvest, tend, state = results[3 * i : 3 * i + 3]
+            actions[strategy.address] = None
+            if any(isinstance(result, RPCError) for result in [harvest, tend, state]):
+                logger.warning("%s: could not be polled", strategy.address)
+                continue
+
+            strategy.state = decode_strategy_state(state)
+            if strategy.pending:
+                continue
+            if decode("bool", harvest):
+                actions[strategy.address] = "harvest"
+            elif decode("bool", tend):
+                actions[strategy.address] = "tend"
+
+        # Strategies are harvested and tended concurrently
+        to_send = [(s, actions[s.address]) for s in self.strategies]
+        to_send = [(strategy, action) for strategy, action in to_send if action]
+        sent = await asyncio.gather(
+            *[self._send(strategy, action, gas_price) for strategy, action in to_send],
+            return_exceptions=True,
+        )
+        for (strategy, action), result in zip(to_send, sent):
+            if isinstance(result, Exception):
+                logger.warning("%s: %s failed: %s", strategy.address, action, result)
+                actions[strategy.address] = None
+            else:
+                logger.info(
+                    "%s: %s sent in %s with %s",
+                    strategy.address,
+                    action,
+                    result,
+                    describe(strategy),
+                )
+
+        return actions
+
+    async def _send(self, strategy, action, gas_price):
+        tx = {
+            "from": self.sender,
+            "to": strategy.address,
+            "data": "0x" + (HARVEST if action == "harvest" else TEND).hex(),
+        }
+        gas = int(
+            int(await self.rpc.request("eth_estimateGas", tx), 16) * GAS_LIMIT_MARGIN
+        )
+
+        if self.private_key is None:
+            tx_hash = await self.rpc.request(
+                "eth_sendTransaction",
+                {**tx, "gas": hex(gas), "gasPrice": hex(gas_price)},
+            )
+        else:
+            tx_hash = await self._send_signed(tx, gas, gas_price)
+
+        strategy.pending = tx_hash
+        strategy.pending_block = self.block
+        return tx_hash
+
+    async def _send_signed(self, tx, gas, gas_price):
+        # Nonces are handed out one transaction at a time
+        async with self._nonce_lock:
+            if self.chain_id is None or self.nonce is None:
+                chain_id, nonce = await self.rpc.batch(
+                    [
+                        ("eth_chainId", []),
+                        ("eth_getTransactionCount", [self.sender, "pending"]),
+                    ]
+                )
+                self.chain_id, self.nonce = int(chain_id, 16), int(nonce, 16)
+
+            signed = Account.sign_transaction(
+                {
+                    "to": tx["to"],
+                    "data": tx["data"],
+                    "value": 0,
+                    "gas": gas,
+                    "gasPrice": gas_price,
+                    "nonce": self.nonce,
+                    "chainId": self.chain_id,
+                },
+                self.private_key,
+            )
+            # Renamed in eth-account 0.13
+            raw_transaction = getattr(signed, "raw_transaction", None)
+            if raw_transaction is None:
+                raw_transaction = signed.rawTransaction
+            try:
+                tx_hash = await self.rpc.request(
+                    "eth_sendRawTransaction", "0x" + bytes(raw_transaction).hex()
+                )
+            except RPCError:
+                # Read the nonce again in case it is out of sync
+                self.nonce = None
+                raise
+            self.nonce += 1
+            return tx_hash
+
+
+async def run(url, strategies, sender, private_key=None, poll_interval=POLL_INTERVAL):
+    async with aiohttp.ClientSession() as session:
+        keeper = Keeper(RPC(url, session), strategies, sender, private_key)
+        while True:
+            try:
+                await keeper.poll()
+            except (aiohttp.ClientError, asyncio.TimeoutError, RPCError) as e:
+                logger.warning("Poll failed: %s", e)
+            await asyncio.sleep(poll_interval)
+
+
+def main(*strategies):
+    # `brownie run keeper main <strategy> [<strategy> ...] --network <network>`
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    print(f"You are using the '{network.show_active()}' network")
+    if network.show_active() == "development":
+        # Unlocked, it has to be a keeper of the strategies
+        account = accounts[0]
+    else:
+        account = accounts.load(
+            click.prompt("Account", type=click.Choice(accounts.load()))
+        )
+    print(f"You are using: [{account.address}]")
+
+    # Unlocked development accounts have no private key
+    private_key = getattr(account, "private_key", None)
+    asyncio.run(
+        run(web3.provider.endpoint_uri, strategies, account.address, private_key)
+    )
@@ -0,0 +1,115 @@
+from brownie import (
+    TestChainlinkAggregator,
+    TestCurvePool,
+    TestHealthCheck,
+    TestPriceFeed,
+    TestQuoter,
+    TestStabilityPool,
+    TestSwapRouter,
+    TestToken,
+    TestUniswapV3Factory,
+    TestWETH,
+    ZERO_ADDRESS,
+    accounts,
+    network,
+)
+
+# Order of the fields in Strategy.ProtocolAddresses
+PROTOCOL_ADDRESSES = [
+    "lqty",
+    "stability_pool",
+    "price_feed",
+    "router",
+    "curve_pool",
+    "weth",
+    "dai",
+    "uniswap_factory",
+    "pool_init_code_hash",
+    "quoter",
+    "eth_usd_aggregator",
+]
+
+# Market used by the local stack, roughly mainnet at the time of writing
+ETH_PRICE = 3_000 * 10 ** 18
+
+
+def protocol_addresses(protocol):
+    # Strategy.ProtocolAddresses constructor argument
+    return [
+        getattr(protocol[key], "address", protocol[key]) for key in PROTOCOL_ADDRESSES
+    ]
+
+
+def deploy_mock_protocol(deployer, lusd_whale, dai_whale, lqty_whale):
+    lusd = deployer.deploy(TestToken, "LUSD Stablecoin", "LUSD")
+    lqty = deployer.deploy(TestToken, "LQTY", "LQTY")
+    dai = deployer.deploy(TestToken, "Dai Stablecoin", "DAI")
+    weth = deployer.deploy(TestWETH)
+    price_feed = deployer.deploy(TestPriceFeed, ETH_PRICE)
+    # Chainlink answers have 8 decimals
+    eth_usd_aggregator = deployer.deploy(TestChainlinkAggregator, ETH_PRICE // 10 ** 10)
+    stability_pool = deployer.deploy(TestStabilityPool, lusd, lqty)
+    uniswap_factory = deployer.deploy(TestUniswapV3Factory)
+    router = deployer.deploy(TestSwapRouter, uniswap_factory, weth)
+    quoter = deployer.deploy(TestQuoter, uniswap_factory)
+    curve_pool = deployer.deploy(TestCurvePool, lusd, dai, 200, 4_000_000)
+    health_check = deployer.deploy(TestHealthCheck)
+
+    for whale, token in [(lusd_whale, lusd), (dai_whale, dai), (lqty_whale, lqty)]:
+        token.mint(whale, 1_000_000_000 * 10 ** 18, {"from": deployer})
+
+    # ETH "whale" used by tests to simulate liquidation gains
+    weth.deposit({"from": deployer, "value": "10000 ether"})
+
+    # Other depositors own most of the Stability Pool, as on mainnet
+    lusd.approve(stability_pool, 2 ** 256 - 1, {"from": lusd_whale})
+    stability_pool.provideToSP(
+        500_000_000 * 10 ** 18, ZERO_ADDRESS, {"from": lusd_whale}
+    )
+    stability_pool.setLQTYIssuancePerSecond(10 ** 18, {"from": deployer})
+
+    # Virtual reserves set the prices, actual balances pay for the swaps
+    for token_a, token_b, fee, reserve_a, reserve_b in [
+        (lqty, weth, 3000, 1_000_000, 2_500),
+        (weth, dai, 3000, 100_000, 300_000_000),
+        (dai, lusd, 500, 10_000_000, 10_000_000),
+        (dai, lusd, 100, 2_000_000, 2_000_000),
+    ]:
+        router.setPool(
+            token_a, token_b, fee, reserve_a * 10 ** 18, reserve_b * 10 ** 18
+        )
+        pool = uniswap_factory.getPool(token_a, token_b, fee)
+        token_a.mint(pool, 1_000_000_000 * 10 ** 18, {"from": deployer})
+        token_b.mint(pool, 1_000_000_000 * 10 ** 18, {"from": deployer})
+
+    curve_pool.setBalances(50_000_000 * 10 ** 18, 50_000_000 * 10 ** 18)
+    for token in [lusd, dai]:
+        token.mint(curve_pool, 1_000_000_000 * 10 ** 18, {"from": deployer})
+
+    return {
+        "lqty": lqty,
+        "stability_pool": stability_pool,
+        "price_feed": price_feed,
+        "router": router,
+        "curve_pool": curve_pool,
+        "weth": weth,
+        "dai": dai,
+        "uniswap_factory": uniswap_factory,
+        "pool_init_code_hash": uniswap_factory.poolInitCodeHash(),
+        "quoter": quoter,
+        "eth_usd_aggregator": eth_usd_aggregator,
+        "lusd": lusd,
+        "health_check": health_check,
+        "lusd_whale": lusd_whale,
+        "dai_whale": dai_whale,
+        "lqty_whale": lqty_whale,
+    }
+
+
+def main():
+    # `brownie run mock_protocol --network development` deploys the local stack
+    print(f"You are using the '{network.show_active()}' network")
+    protocol = deploy_mock_protocol(accounts[9], accounts[6], accounts[7], accounts[8])
+    for key, contract in protocol.items():
+        print(f"{key:>19}: {getattr(contract, 'address', contract)}")
+    print(f"ProtocolAddresses: {protocol_addresses(protocol)}")
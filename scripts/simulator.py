@@ -0,0 +1,674 @@
+from collections import namedtuple
+from itertools import product
+
+import numpy as np
+
+DECIMAL_PRECISION = 10 ** 18
+SCALE_FACTOR = 10 ** 9
+
+DAY = 24 * 60 * 60
+YEAR = 365 * DAY
+
+# LQTY issued to the Stability Pool over its lifetime, halving every year
+LQTY_SUPPLY_CAP = 32_000_000 * 10 ** 18
+
+
+# Amounts paid out to the depositor by a deposit operation
+Gains = namedtuple("Gains", ["lusd", "eth", "lqty", "lusd_loss"])
+
+
+class StabilityPool:
+    """
+    Liquity's Stability Pool as seen by a single depositor, over `n`
+    independent paths at once. Every value is an array with one entry per
+    path and every operation applies to all the paths, or to those in `mask`.
+
+    The P/S/G accounting follows TestStabilityPool line by line, epochs,
+    scales and error correction included. With `exact` the arrays hold Python
+    integers and the results match the contract to the wei. Otherwise they
+    are float64, which is orders of magnitude faster and accurate enough for
+    Monte Carlo simulations.
+
+    LQTY issuance is given to the operations that trigger it, as the amount
+    issued since it was last triggered.
+    """
+
+    def __init__(
+        self,
+        n,
+        exact=False,
+        total_deposits=0,
+        P=DECIMAL_PRECISION,
+        scale=0,
+        epoch=0,
+        S=0,
+        G=0,
+        last_eth_error=0,
+        last_lusd_loss_error=0,
+        last_lqty_error=0,
+    ):
+        self.n = n
+        self.exact = exact
+
+        self.total_deposits = self.array(total_deposits)
+        self.P = self.array(P)
+        self.scale = np.full(n, scale, dtype=np.int64)
+        self.epoch = np.full(n, epoch, dtype=np.int64)
+        # Sums at the current epoch and scale
+        self.S = self.array(S)
+        self.G = self.array(G)
+        self.last_eth_error = self.array(last_eth_error)
+        self.last_lusd_loss_error = self.array(last_lusd_loss_error)
+        self.last_lqty_error = self.array(last_lqty_error)
+
+        # Deposit and snapshots of the depositor
+        self.initial_deposit = self.array(0)
+        self.snapshot_P = self.array(0)
+        self.snapshot_S = self.array(0)
+        self.snapshot_G = self.array(0)
+        self.snapshot_scale = np.zeros(n, dtype=np.int64)
+        self.snapshot_epoch = np.zeros(n, dtype=np.int64)
+        # Sums at the epoch and scale of the snapshots and at the next scale,
+        # the only ones the gains of the depositor depend on
+        self.first_S = self.array(0)
+        self.second_S = self.array(0)
+        self.first_G = self.array(0)
+        self.second_G = self.array(0)
+
+    def array(self, value):
+        """
+        `value` broadcast to one entry per path, as Python integers when
+        exact and as float64 otherwise.
+        """
+        if self.exact:
+            values = np.broadcast_to(np.asarray(value, dtype=object), (self.n,))
+            return np.array([int(v) for v in values], dtype=object)
+        return np.broadcast_to(np.asarray(value, dtype=np.float64), (self.n,)).copy()
+
+    def _mask(self, mask):
+        return np.ones(self.n, dtype=bool) if mask is None else np.asarray(mask)
+
+    # ----------------- VIEWS -----------------
+
+    def compounded_deposit(self):
+        # getCompoundedLUSDDeposit
+        initial = self.initial_deposit
+        snapshot_P = np.where(initial > 0, self.snapshot_P, 1)
+        scale_diff = self.scale - self.snapshot_scale
+
+        compounded = np.where(
+            scale_diff == 0,
+            initial * self.P // snapshot_P,
+            initial * self.P // snapshot_P // SCALE_FACTOR,
+        )
+        compounded = np.where(
+            (initial == 0)
+            | (self.snapshot_epoch < self.epoch)
+            | (scale_diff > 1)
+            | (compounded < initial // 10 ** 9),
+            0,
+            compounded,
+        )
+        return compounded
+
+    def eth_gain(self):
+        # getDepositorETHGain
+        return self._gain(self.first_S, self.second_S, self.snapshot_S)
+
+    def lqty_gain(self):
+        # getDepositorLQTYGain
+        return self._gain(self.first_G, self.second_G, self.snapshot_G)
+
+    def _gain(self, first_sum, second_sum, sum_snapshot):
+        initial = self.initial_deposit
+        snapshot_P = np.where(initial > 0, self.snapshot_P, 1)
+        portions = first_sum - sum_snapshot + second_sum // SCALE_FACTOR
+        gain = initial * portions // snapshot_P // DECIMAL_PRECISION
+        return np.where(initial > 0, gain, 0)
+
+    # ----------------- DEPOSITS -----------------
+
+    def provide(self, amount, issuance=0, mask=None):
+        """
+        provideToSP(amount): pays out the ETH and LQTY gains of the depositor
+        and compounds its deposit before adding `amount`.
+        """
+        amount = self.array(amount)
+        active = self._mask(mask) & (amount > 0)
+
+        self.issue(np.where(active, self.array(issuance), 0))
+        gains = self._gains(active)
+        compounded = self.compounded_deposit()
+
+        self.total_deposits = np.where(
+            active, self.total_deposits + amount, self.total_deposits
+        )
+        self._update_deposit(compounded + amount, active)
+        return gains._replace(lusd=self.array(0))
+
+    def withdraw(self, amount, issuance=0, mask=None):
+        """
+        withdrawFromSP(amount): pays out the ETH and LQTY gains of the
+        depositor and up to `amount` of its compounded deposit.
+        """
+        amount = self.array(amount)
+        active = self._mask(mask) & (self.initial_deposit > 0)
+
+        self.issue(np.where(active, self.array(issuance), 0))
+        gains = self._gains(active)
+        compounded = self.compounded_deposit()
+        withdrawn = np.where(active, np.minimum(amount, compounded), 0)
+
+        self.total_deposits = self.total_deposits - withdrawn
+        self._update_deposit(compounded - withdrawn, active)
+        return gains._replace(lusd=withdrawn)
+
+    def _gains(self, active):
+        return Gains(
+            lusd=None,
+            eth=np.where(active, self.eth_gain(), 0),
+            lqty=np.where(active, self.lqty_gain(), 0),
+            lusd_loss=np.where(
+                active, self.initial_deposit - self.compounded_deposit(), 0
+            ),
+        )
+
+    def _update_deposit(self, new_value, mask):
+        # _updateDepositAndSnapshots. Snapshots are deleted with the deposit
+        keep = mask & (new_value > 0)
+        self.initial_deposit = np.where(mask, new_value, self.initial_deposit)
+        for name, current in [
+            ("snapshot_P", self.P),
+            ("snapshot_S", self.S),
+            ("snapshot_G", self.G),
+            ("snapshot_scale", self.scale),
+            ("snapshot_epoch", self.epoch),
+            ("first_S", self.S),
+            ("first_G", self.G),
+            ("second_S", 0),
+            ("second_G", 0),
+        ]:
+            value = getattr(self, name)
+            setattr(self, name, np.where(keep, current, np.where(mask, 0, value)))
+
+    # ----------------- LIQUIDATIONS -----------------
+
+    def offset(self, debt, collateral, issuance=0, mask=None):
+        """
+        offset(debt, collateral): cancels `debt` LUSD from the pool against
+        `collateral` ETH.
+        """
+        debt = self.array(debt)
+        collateral = self.array(collateral)
+        total = self.total_deposits
+        active = self._mask(mask) & (total > 0) & (debt > 0)
+        if np.any(active & (debt > total)):
+            raise ValueError("debt larger than deposits")
+
+        self.issue(np.where(active, self.array(issuance), 0))
+
+        # _computeRewardsPerUnitStaked
+        denominator = np.where(active, total, 1)
+        eth_numerator = collateral * DECIMAL_PRECISION + self.last_eth_error
+        emptied = debt == total
+        loss_numerator = debt * DECIMAL_PRECISION - self.last_lusd_loss_error
+        loss_per_unit = np.where(
+            emptied, DECIMAL_PRECISION, loss_numerator // denominator + 1
+        )
+        self.last_lusd_loss_error = np.where(
+            active,
+            np.where(emptied, 0, loss_per_unit * total - loss_numerator),
+            self.last_lusd_loss_error,
+        )
+        eth_per_unit = eth_numerator // denominator
+        self.last_eth_error = np.where(
+            active,
+            eth_numerator - eth_per_unit * total,
+            self.last_eth_error,
+        )
+
+        # _updateRewardSumAndProduct
+        self._add_to_sums("S", np.where(active, eth_per_unit * self.P, 0))
+
+        factor = DECIMAL_PRECISION - loss_per_unit
+        new_epoch = active & (factor == 0)
+        product = self.P * factor // DECIMAL_PRECISION
+        new_scale = active & ~new_epoch & (product < SCALE_FACTOR)
+
+        P = np.where(
+            new_scale, self.P * factor * SCALE_FACTOR // DECIMAL_PRECISION, product
+        )
+        self.P = np.where(new_epoch, DECIMAL_PRECISION, np.where(active, P, self.P))
+        self.epoch = np.where(new_epoch, self.epoch + 1, self.epoch)
+        self.scale = np.where(
+            new_epoch, 0, np.where(new_scale, self.scale + 1, self.scale)
+        )
+        # Sums start over at a new epoch or scale
+        self.S = np.where(new_epoch | new_scale, 0, self.S)
+        self.G = np.where(new_epoch | new_scale, 0, self.G)
+
+        self.total_deposits = np.where(active, total - debt, total)
+
+    # ----------------- LQTY ISSUANCE -----------------
+
+    def issue(self, issuance):
+        """
+        _triggerLQTYIssuance with `issuance` LQTY issued since the last
+        trigger.
+        """
+        issuance = self.array(issuance)
+        total = self.total_deposits
+        active = (total > 0) & (issuance > 0)
+
+        numerator = issuance * DECIMAL_PRECISION + self.last_lqty_error
+        per_unit = np.where(active, numerator // np.where(active, total, 1), 0)
+        self.last_lqty_error = np.where(
+            active, numerator - per_unit * total, self.last_lqty_error
+        )
+        self._add_to_sums("G", per_unit * self.P)
+
+    def _add_to_sums(self, name, increase):
+        # Only the sums at the current epoch and scale grow
+        same_epoch = self.epoch == self.snapshot_epoch
+        first = same_epoch & (self.scale == self.snapshot_scale)
+        second = same_epoch & (self.scale == self.snapshot_scale + 1)
+
+        setattr(self, name, getattr(self, name) + increase)
+        for portion, at in [("first_", first), ("second_", second)]:
+            value = getattr(self, portion + name)
+            setattr(self, portion + name, np.where(at, value + increase, value))
+
+
+# ----------------- MARKET SCENARIOS -----------------
+
+# Prices of ETH and LQTY in LUSD, LUSD offset by liquidations as a share of
+# the Stability Pool and the ETH they pay relative to the debt, LQTY issued to
+# the pool, LUSD deposited by other depositors and the gas price in wei, with
+# one row per step and one column per path. Prices have an extra first row
+# for the start of the simulation
+Market = namedtuple(
+    "Market",
+    [
+        "eth_price",
+        "lqty_price",
+        "offset_share",
+        "collateral_ratio",
+        "lqty_issuance",
+        "inflow_share",
+        "gas_price",
+    ],
+)
+
+
+def price_paths(rng, n_paths, n_steps, price, volatility, drift=0.0, step=DAY):
+    """
+    Geometric Brownian motion starting at `price`, with the annualised
+    `volatility` and `drift`.
+    """
+    dt = step / YEAR
+    shocks = rng.standard_normal((n_steps, n_paths))
+    log_returns = (drift - volatility ** 2 / 2) * dt + volatility * np.sqrt(dt) * shocks
+    log_prices = np.vstack([np.zeros((1, n_paths)), np.cumsum(log_returns, axis=0)])
+    return price * np.exp(log_prices)
+
+
+def lqty_issued(time):
+    """
+    LQTY issued to the Stability Pool `time` seconds after launch, following
+    Liquity's yearly halving schedule.
+    """
+    return LQTY_SUPPLY_CAP * (1 - 0.5 ** (np.asarray(time) / YEAR))
+
+
+def lqty_issuance(n_steps, start=0, step=DAY):
+    # LQTY issued in each step from `start` seconds after launch
+    return np.diff(lqty_issued(start + step * np.arange(n_steps + 1)))
+
+
+def market_scenarios(
+    rng,
+    n_paths,
+    n_steps,
+    eth_price=3_000.0,
+    eth_volatility=0.8,
+    lqty_price=7.5,
+    lqty_volatility=1.2,
+    liquidations_per_year=25,
+    mean_offset_share=0.02,
+    crash_sensitivity=20.0,
+    gas_price=50e9,
+    issuance_start=0,
+    step=DAY,
+):
+    """
+    Random ETH and LQTY price paths with liquidations. Liquidations arrive
+    at `liquidations_per_year` on average, more often and larger when the
+    price of ETH falls, and pay between 100% and 110% of the debt minus
+    Liquity's 0.5% gas compensation. Other depositors refill what they
+    offset by the next step.
+    """
+    eth = price_paths(rng, n_paths, n_steps, eth_price, eth_volatility, step=step)
+    lqty = price_paths(rng, n_paths, n_steps, lqty_price, lqty_volatility, step=step)
+
+    # Falls in the price of ETH leave more troves under-collateralised
+    returns = eth[1:] / eth[:-1] - 1
+    stress = np.exp(-crash_sensitivity * np.minimum(returns, 0))
+    rate = liquidations_per_year * step / YEAR * stress
+    liquidated = rng.random((n_steps, n_paths)) < rate
+    share = rng.exponential(mean_offset_share * stress)
+    offset_share = np.where(liquidated, np.minimum(share, 1.0), 0.0)
+
+    return Market(
+        eth_price=eth,
+        lqty_price=lqty,
+        offset_share=offset_share,
+        collateral_ratio=rng.uniform(1.0, 1.1, (n_steps, n_paths)) * 0.995,
+        lqty_issuance=np.broadcast_to(
+            lqty_issuance(n_steps, issuance_start, step)[:, None], (n_steps, n_paths)
+        ),
+        inflow_share=np.vstack([np.zeros((1, n_paths)), offset_share[:-1]]),
+        gas_price=np.full((n_steps, n_paths), gas_price),
+    )
+
+
+def tile_market(market, times):
+    # Every path repeated for `times` parameter sets, as laid out by `grid`
+    return Market(*[np.tile(values, (1, times)) for values in market])
+
+
+# ----------------- HARVEST POLICIES -----------------
+
+# How the strategy is operated, each field a scalar or an array with one
+# entry per path. Swap costs are the pool fees plus the expected slippage in
+# basis points, and pool depths the LUSD value of the liquidity the sales
+# trade against, which sets their price impact. Amounts are in wei
+HarvestPolicy = namedtuple(
+    "HarvestPolicy",
+    [
+        "harvest_interval",  # Steps between harvests
+        "min_eth_to_sell",
+        "min_lqty_to_sell",
+        "max_eth_sale_value",  # In LUSD, 0 for no cap
+        "max_lqty_sale_value",
+        "eth_swap_cost",
+        "lqty_swap_cost",
+        "eth_pool_depth",
+        "lqty_pool_depth",
+        "min_expected_swap_percentage",
+        "harvest_gas",
+    ],
+)
+
+# Strategy defaults: the 0.3% ETH-DAI and LQTY-ETH pools, the 0.05% DAI-LUSD
+# pool and 1% slippage. Gas as measured by the benchmarks
+DEFAULT_POLICY = HarvestPolicy(
+    harvest_interval=7,
+    min_eth_to_sell=0,
+    min_lqty_to_sell=0,
+    max_eth_sale_value=0,
+    max_lqty_sale_value=0,
+    eth_swap_cost=35,
+    lqty_swap_cost=65,
+    eth_pool_depth=300e24,
+    lqty_pool_depth=10e24,
+    min_expected_swap_percentage=9_900,
+    harvest_gas=1_500_000,
+)
+
+
+def grid(n_paths, policy=DEFAULT_POLICY, **values):
+    """
+    Every combination of the `values` given for some fields of `policy`,
+    each repeated for `n_paths`. Returns the combinations and the policy with
+    one entry per path and combination.
+    """
+    names = list(values)
+    combinations = list(product(*[values[name] for name in names]))
+    fields = {
+        name: np.repeat([combination[i] for combination in combinations], n_paths)
+        for i, name in enumerate(names)
+    }
+    return combinations, policy._replace(**fields)
+
+
+# ----------------- SIMULATION -----------------
+
+# Outcome of each path. Amounts are in wei and valued in LUSD at the last
+# prices. Gas is paid by the keeper, and net_apy takes it out
+Results = namedtuple(
+    "Results",
+    [
+        "total_assets",
+        "apy",
+        "net_apy",
+        "harvests",
+        "failed_harvests",
+        "eth_sold",
+        "eth_proceeds",
+        "lusd_loss",
+        "profit",
+        "loss",
+        "withdrawn",
+        "gas_spent",
+    ],
+)
+
+
+def _sale(amount, price, min_amount, max_value, cost, depth, min_percentage):
+    # Amount sold after the dust threshold and the sale cap, LUSD received
+    # and whether it meets the minimum output
+    amount = np.where(amount >= min_amount, amount, 0)
+    amount = np.where(max_value > 0, np.minimum(amount, max_value / price), amount)
+    value = amount * price
+    received = value * (1 - cost / 10_000) * depth / (depth + value)
+    return amount, received, received >= value * min_percentage / 10_000
+
+
+class StrategyModel:
+    """
+    The strategy with `deposit` LUSD in `pool`, with one entry per path and
+    operated as `policy` says. Harvests claim and sell the gains as
+    _claimRewards does, report the profit or loss as prepareReturn does and
+    deposit the LUSD as adjustPosition does. A harvest whose sales do not
+    meet the minimum output reverts.
+    """
+
+    def __init__(self, pool, policy=DEFAULT_POLICY, deposit=1_000_000 * 10 ** 18):
+        n = pool.n
+        self.pool = pool
+        self.policy = HarvestPolicy(
+            *[
+                np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))
+                for value in policy
+            ]
+        )
+        self.deposit = deposit
+
+        pool.provide(deposit)
+        self.eth_balance = np.zeros(n)
+        self.lqty_balance = np.zeros(n)
+        self.loose = np.zeros(n)
+        self.total_debt = np.full(n, float(deposit))
+        self.totals = {
+            name: np.zeros(n)
+            for name in Results._fields
+            if name not in ["total_assets", "apy", "net_apy"]
+        }
+
+    def harvest(self, due, eth_price, lqty_price, gas_price):
+        """
+        Harvests the paths where `due`. Returns where the harvest went
+        through.
+        """
+        pool, policy, totals = self.pool, self.policy, self.totals
+        eth_balance, lqty_balance = self.eth_balance, self.lqty_balance
+
+        # Sales are sized before claiming to find the harvests that revert
+        eth_gain, lqty_gain = pool.eth_gain(), pool.lqty_gain()
+        eth_sold, eth_received, eth_ok = _sale(
+            eth_balance + eth_gain,
+            eth_price,
+            policy.min_eth_to_sell,
+            policy.max_eth_sale_value,
+            policy.eth_swap_cost,
+            policy.eth_pool_depth,
+            policy.min_expected_swap_percentage,
+        )
+        lqty_sold, lqty_received, lqty_ok = _sale(
+            lqty_balance + lqty_gain,
+            lqty_price,
+            policy.min_lqty_to_sell,
+            policy.max_lqty_sale_value,
+            policy.lqty_swap_cost,
+            policy.lqty_pool_depth,
+            policy.min_expected_swap_percentage,
+        )
+        harvested = due & eth_ok & lqty_ok
+        totals["failed_harvests"] += due & ~harvested
+
+        # _claimRewards
+        claim = harvested & (
+            ((eth_gain > 0) & (eth_balance + eth_gain >= policy.min_eth_to_sell))
+            | ((lqty_gain > 0) & (lqty_balance + lqty_gain >= policy.min_lqty_to_sell))
+        )
+        gains = pool.withdraw(0, mask=claim)
+        eth_sold = np.where(harvested, np.minimum(eth_sold, eth_balance + gains.eth), 0)
+        lqty_sold = np.where(
+            harvested, np.minimum(lqty_sold, lqty_balance + gains.lqty), 0
+        )
+        eth_received = np.where(eth_sold > 0, eth_received, 0)
+        lqty_received = np.where(lqty_sold > 0, lqty_received, 0)
+        eth_balance = eth_balance + gains.eth - eth_sold
+        lqty_balance = lqty_balance + gains.lqty - lqty_sold
+        loose = self.loose + eth_received + lqty_received
+
+        # prepareReturn: unsold ETH counts towards the profit, which is
+        # reported as far as the LUSD held allows
+        deposit_value = pool.compounded_deposit()
+        total_assets = loose + deposit_value + eth_balance * eth_price
+        profit = np.minimum(
+            np.maximum(total_assets - self.total_debt, 0), loose + deposit_value
+        )
+        loss = np.maximum(self.total_debt - total_assets, 0)
+        self.total_debt = np.where(
+            harvested, self.total_debt + profit - loss, self.total_debt
+        )
+
+        # adjustPosition, which pays out gains left in the Stability Pool
+        deposited = pool.provide(loose, mask=harvested)
+        self.loose = np.where(harvested, 0, loose)
+        self.eth_balance = eth_balance + deposited.eth
+        self.lqty_balance = lqty_balance + deposited.lqty
+
+        totals["harvests"] += harvested
+        totals["eth_sold"] += eth_sold
+        totals["eth_proceeds"] += eth_received
+        totals["lusd_loss"] += gains.lusd_loss + deposited.lusd_loss
+        totals["profit"] += np.where(harvested, profit, 0)
+        totals["loss"] += np.where(harvested, loss, 0)
+        totals["gas_spent"] += np.where(
+            harvested, policy.harvest_gas * gas_price * eth_price, 0
+        )
+        return harvested
+
+    def liquidate_position(self, amount, mask=None):
+        """
+        liquidatePosition: frees up to `amount` LUSD for a withdrawal from
+        the vault, from the loose LUSD first and then from the Stability
+        Pool, whose gains are paid out to the strategy. Returns the LUSD
+        freed, which is repaid to the vault.
+        """
+        if mask is not None:
+            amount = np.where(mask, amount, 0)
+        needed = np.maximum(amount - self.loose, 0)
+        gains = self.pool.withdraw(needed, mask=needed > 0)
+        self.eth_balance = self.eth_balance + gains.eth
+        self.lqty_balance = self.lqty_balance + gains.lqty
+        self.totals["lusd_loss"] += gains.lusd_loss
+
+        freed = np.minimum(amount, self.loose + gains.lusd)
+        self.loose = self.loose + gains.lusd - freed
+        self.total_debt = np.maximum(self.total_debt - freed, 0)
+        self.totals["withdrawn"] += freed
+        return freed
+
+    def total_assets(self, eth_price, lqty_price):
+        # Everything held and pending, ETH and LQTY included
+        pool = self.pool
+        return (
+            self.loose
+            + pool.compounded_deposit()
+            + (self.eth_balance + pool.eth_gain()) * eth_price
+            + (self.lqty_balance + pool.lqty_gain()) * lqty_price
+        )
+
+    def results(self, eth_price, lqty_price, years):
+        # The LUSD withdrawn counts as returned, when it was withdrawn is not
+        # taken into account
+        total_assets = self.total_assets(eth_price, lqty_price)
+        value = total_assets + self.totals["withdrawn"]
+        net_value = np.maximum(value - self.totals["gas_spent"], 0)
+        return Results(
+            total_assets=total_assets,
+            apy=(value / self.deposit) ** (1 / years) - 1,
+            net_apy=(net_value / self.deposit) ** (1 / years) - 1,
+            **self.totals,
+        )
+
+
+def simulate(
+    market,
+    policy=DEFAULT_POLICY,
+    deposit=1_000_000 * 10 ** 18,
+    pool_deposits=500_000_000 * 10 ** 18,
+    step=DAY,
+):
+    """
+    Runs the strategy with `deposit` LUSD along every path of `market`,
+    harvesting as `policy` says. Each step issues LQTY, offsets the
+    liquidations, lets other depositors refill the pool and harvests the
+    strategy when due. Harvests that revert are retried at the next step.
+    """
+    n_steps, n = market.offset_share.shape
+    pool = StabilityPool(n, total_deposits=pool_deposits)
+    strategy = StrategyModel(pool, policy, deposit)
+    last_harvest = np.zeros(n)
+
+    for i in range(n_steps):
+        eth_price = market.eth_price[i + 1]
+        pool.issue(market.lqty_issuance[i])
+        debt = pool.total_deposits * market.offset_share[i]
+        pool.offset(debt, debt * market.collateral_ratio[i] / eth_price)
+        pool.total_deposits = pool.total_deposits + (
+            pool_deposits * market.inflow_share[i]
+        )
+
+        due = i + 1 - last_harvest >= strategy.policy.harvest_interval
+        harvested = strategy.harvest(
+            due, eth_price, market.lqty_price[i + 1], market.gas_price[i]
+        )
+        last_harvest = np.where(harvested, i + 1, last_harvest)
+
+    years = n_steps * step / YEAR
+    return strategy.results(market.eth_price[-1], market.lqty_price[-1], years)
+
+
+def main(n_paths=1_000, n_steps=365, seed=0):
+    # `brownie run simulator main [<paths>] [<steps>] [<seed>]`
+    n_paths, n_steps = int(n_paths), int(n_steps)
+    rng = np.random.default_rng(int(seed))
+    market = market_scenarios(rng, n_paths, n_steps)
+
+    intervals = [1, 3, 7, 14, 30]
+    combinations, policy = grid(n_paths, harvest_interval=intervals)
+    results = simulate(tile_market(market, len(combinations)), policy)
+
+    print(f"{n_paths} paths over {n_steps} days")
+    print(f"{'interval':>8} {'apy':>8} {'net apy':>8} {'p5':>8} {'harvests':>8}")
+    for i, (interval,) in enumerate(combinations):
+        paths = slice(i * n_paths, (i + 1) * n_paths)
+        apy, net_apy = results.apy[paths], results.net_apy[paths]
+        print(
+            f"{interval:>8} {np.mean(apy):>8.2%} {np.mean(net_apy):>8.2%} "
+            f"{np.percentile(net_apy, 5):>8.2%} {np.mean(results.harvests[paths]):>8.1f}"
+        )
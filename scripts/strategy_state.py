@@ -0,0 +1,89 @@
+from collections import namedtuple
+
+from brownie import network, web3
+from eth_utils import function_signature_to_4byte_selector
+
+try:
+    from eth_abi import decode as decode_abi
+except ImportError:
+    # eth-abi < 4, installed with eth-brownie < 1.20
+    from eth_abi import decode_abi
+
+# Fields of Strategy.SwapConfig and Strategy.StrategyState, in order
+SWAP_CONFIG_FIELDS = [
+    ("convertDAItoLUSDonCurve", "bool"),
+    ("selectBestDAItoLUSDVenue", "bool"),
+    ("convertRewardsInSingleSwap", "bool"),
+    ("swapOnPoolsDirectly", "bool"),
+    ("lqtyToEthFee", "uint24"),
+    ("ethToDaiFee", "uint24"),
+    ("daiToLusdFee", "uint24"),
+    ("minExpectedSwapPercentage", "uint16"),
+    ("lqtyRouteSet", "bool"),
+    ("ethRouteSet", "bool"),
+    ("daiRouteSet", "bool"),
+]
+STRATEGY_STATE_FIELDS = [
+    ("estimatedTotalAssets", "uint256"),
+    ("wantBalance", "uint256"),
+    ("lusdDeposit", "uint256"),
+    ("totalLUSDBalance", "uint256"),
+    ("ethBalance", "uint256"),
+    ("ethGain", "uint256"),
+    ("totalETHBalance", "uint256"),
+    ("lqtyBalance", "uint256"),
+    ("lqtyGain", "uint256"),
+    ("totalLQTYBalance", "uint256"),
+    ("daiBalance", "uint256"),
+    ("lastGoodPrice", "uint256"),
+]
+
+SwapConfig = namedtuple("SwapConfig", [name for name, _ in SWAP_CONFIG_FIELDS])
+StrategyState = namedtuple(
+    "StrategyState", [name for name, _ in STRATEGY_STATE_FIELDS] + ["swapConfig"]
+)
+
+# ABI type of the value returned by Strategy.getStrategyState()
+SWAP_CONFIG_TYPE = f"({','.join(type_ for _, type_ in SWAP_CONFIG_FIELDS)})"
+STRATEGY_STATE_TYPE = (
+    f"({','.join(type_ for _, type_ in STRATEGY_STATE_FIELDS)},{SWAP_CONFIG_TYPE})"
+)
+
+GET_STRATEGY_STATE_SELECTOR = function_signature_to_4byte_selector("getStrategyState()")
+
+
+def decode_strategy_state(data):
+    """
+    Decodes the return data of a raw `eth_call` to Strategy.getStrategyState(),
+    given as bytes or as a hex string.
+    """
+    if isinstance(data, str):
+        data = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+
+    (values,) = decode_abi([STRATEGY_STATE_TYPE], data)
+    return StrategyState(*values[:-1], SwapConfig(*values[-1]))
+
+
+def strategy_state_call(address):
+    # Transaction object of the eth_call that reads the state of a strategy
+    return {"to": str(address), "data": "0x" + GET_STRATEGY_STATE_SELECTOR.hex()}
+
+
+def get_strategy_state(address, block_identifier="latest"):
+    """
+    State of the strategy at `address` read in a single RPC round trip.
+    """
+    data = web3.eth.call(strategy_state_call(address), block_identifier)
+    return decode_strategy_state(data)
+
+
+def main(address):
+    # `brownie run strategy_state main <strategy> --network <network>`
+    print(f"You are using the '{network.show_active()}' network")
+    state = get_strategy_state(address)
+    for field, value in state._asdict().items():
+        if field == "swapConfig":
+            for name, config_value in value._asdict().items():
+                print(f"{name:>28}: {config_value}")
+        else:
+            print(f"{field:>28}: {value}")
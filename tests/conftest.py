@@ -1,140 +1,331 @@
+import time
+
 import pytest
-from brownie import config
+from brownie import chain, config, network
 from brownie import Contract
 
+from scripts.mock_protocol import deploy_mock_protocol, protocol_addresses as _addresses
+
+# Liquity, Uniswap and Curve contracts the strategy uses on mainnet
+MAINNET_PROTOCOL = {
+    "lqty": "0x6DEA81C8171D0bA574754EF6F8b412F2Ed88c54D",
+    "stability_pool": "0x66017D22b0f8556afDd19FC67041899Eb65a21bb",
+    "price_feed": "0x4c517D4e2C851CA76d7eC94B805269Df0f2201De",
+    "router": "0xE592427A0AEce92De3Edee1F18E0157C05861564",
+    "curve_pool": "0xEd279fDD11cA84bEef15AF5D39BB4d4bEE23F0cA",
+    "weth": "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2",
+    "dai": "0x6B175474E89094C44Da98b954EedeAC495271d0F",
+    "uniswap_factory": "0x1F98431c8aD98523631AE4a59f267346ea31F984",
+    "quoter": "0xb27308f9F90D607463bb33eA1BeBb41C27CE5AB6",
+    "eth_usd_aggregator": "0x5f4eC3Df9cbd43714FE2740F5E3616155c5b8419",
+    "lusd": "0x5f98805A4E8be255a32880FDeC7F6728C6568bA0",
+    "health_check": "0xDDCea799fF1699e98EDF118e0629A974Df7DF012",
+}
+
+# Init code hash of the pools deployed by the Uniswap v3 factory
+POOL_INIT_CODE_HASH = (
+    "0xe34f199b19b2b4f47f68442619d555527d244f78a3297ea89325f843f87b8b54"
+)
+
+# Wall-clock seconds spent building the golden state and running each test
+TIMINGS = {"golden_state": 0.0, "tests": {}}
+
+
+@pytest.fixture(scope="session")
+def golden_state(
+    vault, strategy, test_vault, test_strategy, amount, weth_amout, eth_whale
+):
+    # Everything deployed and funded by the session fixtures below is captured
+    # once in this snapshot and restored after every test. That includes the
+    # LUSD and WETH of the user and the impersonated ETH, DAI and LQTY holders
+    chain.snapshot()
+    yield
+
 
 @pytest.fixture(autouse=True)
-def isolation(fn_isolation):
-    pass
+def isolation(golden_state):
+    yield
+    chain.revert()
 
 
-@pytest.fixture
-def gov(accounts):
-    yield accounts.at("0xFEB4acf3df3cDEA7399794D0869ef76A6EfAff52", force=True)
+@pytest.fixture(scope="session")
+def local():
+    # Use the local mock protocol stack unless running on a mainnet fork:
+    # `brownie test --network development`
+    yield not network.show_active().endswith("-fork")
 
 
 @pytest.fixture
+def local_only(local):
+    # Prices, pool depths and liquidations are only set on the local stand-ins
+    if not local:
+        pytest.skip("runs against the local mock protocol stack")
+
+
+@pytest.fixture(scope="session")
+def gov(accounts, local):
+    if local:
+        yield accounts[9]
+    else:
+        yield accounts.at("0xFEB4acf3df3cDEA7399794D0869ef76A6EfAff52", force=True)
+
+
+@pytest.fixture(scope="session")
 def user(accounts):
     yield accounts[0]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def rewards(accounts):
     yield accounts[1]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def guardian(accounts):
     yield accounts[2]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def management(accounts):
     yield accounts[3]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def strategist(accounts):
     yield accounts[4]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def keeper(accounts):
     yield accounts[5]
 
 
-@pytest.fixture
-def healthCheck():
-    yield Contract("0xDDCea799fF1699e98EDF118e0629A974Df7DF012")
+@pytest.fixture(scope="session")
+def mock_protocol(accounts):
+    yield deploy_mock_protocol(accounts[9], accounts[6], accounts[7], accounts[8])
 
 
-@pytest.fixture
-def token():
-    token_address = "0x5f98805A4E8be255a32880FDeC7F6728C6568bA0"  # this should be the address of the ERC-20 used by the strategy/vault (DAI)
-    yield Contract(token_address)
+@pytest.fixture(scope="session")
+def protocol(request, local, accounts):
+    if local:
+        yield request.getfixturevalue("mock_protocol")
+    else:
+        contracts = {key: Contract(addr) for key, addr in MAINNET_PROTOCOL.items()}
+        contracts["pool_init_code_hash"] = POOL_INIT_CODE_HASH
+        # Exchanges and holders to impersonate in order to get funds
+        contracts["lusd_whale"] = accounts.at(
+            "0x31F8Cc382c9898b273eff4e0b7626a6987C846E8", force=True
+        )
+        contracts["dai_whale"] = accounts.at(
+            "0x028171bCA77440897B824Ca71D1c56caC55b68A3", force=True
+        )
+        contracts["lqty_whale"] = accounts.at(
+            "0xfEE47986A4B9083d7dB1829BeEd6f88A91DD4338", force=True
+        )
+        yield contracts
 
 
-@pytest.fixture
-def amount(accounts, token, user):
+@pytest.fixture(scope="session")
+def protocol_addresses(protocol):
+    # Strategy.ProtocolAddresses constructor argument
+    yield _addresses(protocol)
+
+
+@pytest.fixture(scope="session")
+def healthCheck(protocol):
+    yield protocol["health_check"]
+
+
+@pytest.fixture(scope="session")
+def token(protocol):
+    # this should be the ERC-20 used by the strategy/vault (LUSD)
+    yield protocol["lusd"]
+
+
+@pytest.fixture(scope="session")
+def amount(accounts, token, user, lusd_whale):
     amount = 10_000 * 10 ** token.decimals()
     # In order to get some funds for the token you are about to use,
-    # it impersonate an exchange address to use it's funds.
-    reserve = accounts.at("0x31F8Cc382c9898b273eff4e0b7626a6987C846E8", force=True)
-    token.transfer(user, amount, {"from": reserve})
+    # take them from a whale (an impersonated exchange address on a fork)
+    token.transfer(user, amount, {"from": lusd_whale})
     yield amount
 
 
-@pytest.fixture
-def lusd():
-    yield Contract("0x5f98805A4E8be255a32880FDeC7F6728C6568bA0")
+@pytest.fixture(scope="session")
+def lusd(protocol):
+    yield protocol["lusd"]
 
 
-@pytest.fixture
-def lusd_whale(accounts):
-    yield accounts.at("0x31F8Cc382c9898b273eff4e0b7626a6987C846E8", force=True)
+@pytest.fixture(scope="session")
+def lusd_whale(protocol):
+    yield protocol["lusd_whale"]
 
 
-@pytest.fixture
-def dai():
-    yield Contract("0x6B175474E89094C44Da98b954EedeAC495271d0F")
+@pytest.fixture(scope="session")
+def dai(protocol):
+    yield protocol["dai"]
 
 
-@pytest.fixture
-def dai_whale(accounts):
-    yield accounts.at("0x028171bCA77440897B824Ca71D1c56caC55b68A3", force=True)
+@pytest.fixture(scope="session")
+def dai_whale(protocol):
+    yield protocol["dai_whale"]
 
 
-@pytest.fixture
-def lqty():
-    yield Contract("0x6DEA81C8171D0bA574754EF6F8b412F2Ed88c54D")
+@pytest.fixture(scope="session")
+def lqty(protocol):
+    yield protocol["lqty"]
 
 
-@pytest.fixture
-def lqty_whale(accounts):
-    yield accounts.at("0xfEE47986A4B9083d7dB1829BeEd6f88A91DD4338", force=True)
+@pytest.fixture(scope="session")
+def lqty_whale(protocol):
+    yield protocol["lqty_whale"]
 
 
-@pytest.fixture
-def weth():
-    token_address = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
-    yield Contract(token_address)
+@pytest.fixture(scope="session")
+def stability_pool(protocol):
+    yield protocol["stability_pool"]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def price_feed(protocol):
+    yield protocol["price_feed"]
+
+
+@pytest.fixture(scope="session")
+def eth_usd_aggregator(protocol):
+    yield protocol["eth_usd_aggregator"]
+
+
+@pytest.fixture(scope="session")
+def weth(protocol):
+    yield protocol["weth"]
+
+
+@pytest.fixture(scope="session")
+def eth_whale(accounts, weth):
+    # WETH holds the ETH of every wrapped token. Impersonated once here, later
+    # `accounts.at(weth, force=True)` calls return the same account
+    yield accounts.at(weth, force=True)
+
+
+@pytest.fixture(scope="session")
 def weth_amout(user, weth):
     weth_amout = 10 ** weth.decimals()
     user.transfer(weth, weth_amout)
     yield weth_amout
 
 
-@pytest.fixture
-def vault(pm, gov, rewards, guardian, management, token):
+def deploy_vault(pm, gov, rewards, guardian, management, token):
     Vault = pm(config["dependencies"][0]).Vault
     vault = guardian.deploy(Vault)
     vault.initialize(token, gov, rewards, "", "", guardian, management)
     vault.setDepositLimit(2 ** 256 - 1, {"from": gov})
     vault.setManagement(management, {"from": gov})
-    yield vault
+    return vault
 
 
-@pytest.fixture
-def strategy(strategist, keeper, vault, Strategy, gov):
-    strategy = strategist.deploy(Strategy, vault)
+@pytest.fixture(scope="session")
+def vault(pm, gov, rewards, guardian, management, token):
+    yield deploy_vault(pm, gov, rewards, guardian, management, token)
+
+
+@pytest.fixture(scope="session")
+def test_vault(pm, gov, rewards, guardian, management, token):
+    # TestStrategy gets its own vault so both strategies can be attached
+    yield deploy_vault(pm, gov, rewards, guardian, management, token)
+
+
+@pytest.fixture(scope="session")
+def swap_lib(SwapLib, strategist):
+    # Strategy links to the latest deployment of its external library
+    yield strategist.deploy(SwapLib)
+
+
+def deploy_strategy(
+    Strategy, vault, protocol_addresses, strategist, keeper, gov, healthCheck
+):
+    strategy = strategist.deploy(Strategy, vault, protocol_addresses)
     strategy.setKeeper(keeper)
+    strategy.setHealthCheck(healthCheck, {"from": gov})
     strategy.setDoHealthCheck(True, {"from": gov})
     vault.addStrategy(strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
-    yield strategy
+    return strategy
+
+
+@pytest.fixture(scope="session")
+def strategy(
+    strategist, keeper, vault, Strategy, gov, protocol_addresses, healthCheck, swap_lib
+):
+    yield deploy_strategy(
+        Strategy, vault, protocol_addresses, strategist, keeper, gov, healthCheck
+    )
+
+
+@pytest.fixture(scope="session")
+def test_strategy(
+    strategist,
+    keeper,
+    test_vault,
+    TestStrategy,
+    gov,
+    protocol_addresses,
+    healthCheck,
+    swap_lib,
+):
+    yield deploy_strategy(
+        TestStrategy,
+        test_vault,
+        protocol_addresses,
+        strategist,
+        keeper,
+        gov,
+        healthCheck,
+    )
 
 
 @pytest.fixture
-def test_strategy(strategist, keeper, vault, TestStrategy, gov):
-    strategy = strategist.deploy(TestStrategy, vault)
-    strategy.setKeeper(keeper)
-    strategy.setDoHealthCheck(True, {"from": gov})
-    vault.addStrategy(strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
-    yield strategy
+def deposited(vault, strategy, token, user, amount):
+    # `amount` deposited and invested in the Stability Pool
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
 
 
 @pytest.fixture(scope="session")
 def RELATIVE_APPROX():
     yield 1e-5
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    # The golden state is built while setting up the first test
+    start = time.perf_counter()
+    yield
+    if not TIMINGS["tests"] and not TIMINGS["golden_state"]:
+        TIMINGS["golden_state"] = time.perf_counter() - start
+
+
+def pytest_runtest_logreport(report):
+    if report.when == "call":
+        TIMINGS["tests"][report.nodeid] = report.duration
+
+
+def pytest_terminal_summary(terminalreporter):
+    tests = TIMINGS["tests"]
+    if not tests:
+        return
+
+    # Before the golden state every test deployed and funded its own vault
+    # and strategies. That run is not measured: its time is estimated as the
+    # setup cost paid once per test
+    setup = TIMINGS["golden_state"]
+    elapsed = sum(tests.values())
+    terminalreporter.write_sep("=", "wall-clock report")
+    terminalreporter.write_line(f"golden state setup (once): {setup:.2f}s")
+    terminalreporter.write_line(f"{len(tests)} tests: {elapsed:.2f}s")
+    terminalreporter.write_line(f"with snapshot-revert: {setup + elapsed:.2f}s")
+    terminalreporter.write_line(
+        f"with setup per test (estimated, not measured): "
+        f"{setup * len(tests) + elapsed:.2f}s"
+    )
@@ -0,0 +1,103 @@
+"""
+Reference implementation of the split order used by the strategy to sell DAI
+for LUSD across Curve and Uniswap v3, on models of the local stand-ins.
+
+Venues are functions returning the LUSD received for an amount of DAI, or 0
+when they cannot be quoted. All the math is done on integers so the results
+match the contracts to the wei.
+"""
+import itertools
+
+
+def curve_venue(balances, A, fee):
+    # TestCurvePool.get_dy_underlying(1, 0, dx): DAI (1) for LUSD (0)
+    def get_d():
+        S = balances[0] + balances[1]
+        Ann = A * 2
+        D = S
+        for _ in range(255):
+            D_P = D * D // (balances[0] * 2)
+            D_P = D_P * D // (balances[1] * 2)
+            D_prev = D
+            D = (Ann * S + D_P * 2) * D // ((Ann - 1) * D + D_P * 3)
+            if abs(D - D_prev) <= 1:
+                break
+        return D
+
+    def get_y(x, D):
+        Ann = A * 2
+        c = D * D // (x * 2)
+        c = c * D // (Ann * 2)
+        b = x + D // Ann
+        y = D
+        for _ in range(255):
+            y_prev = y
+            y = (y * y + c) // (2 * y + b - D)
+            if abs(y - y_prev) <= 1:
+                break
+        return y
+
+    D = get_d()
+
+    def quote(dx):
+        dy = balances[0] - get_y(balances[1] + dx, D) - 1
+        return dy - dy * fee // 10 ** 10
+
+    return quote
+
+
+def uniswap_venue(reserve_in, reserve_out, fee):
+    # TestUniswapV3Pool.getAmountOut, fee in hundredths of a bip
+    def quote(amount_in):
+        if reserve_in == 0 or reserve_out == 0:
+            return 0
+        amount_in_less_fee = amount_in * (10 ** 6 - fee) // 10 ** 6
+        return reserve_out * amount_in_less_fee // (reserve_in + amount_in_less_fee)
+
+    return quote
+
+
+def chunks(amount, steps):
+    # Equal chunks, the last one takes the remainder of the division
+    chunk = amount // steps
+    return [chunk] * (steps - 1) + [amount - chunk * (steps - 1)]
+
+
+def greedy_split(amount, venues, steps):
+    # Mirrors SwapLib.splitOrder: every chunk goes to the venue with the
+    # largest marginal output, ties and chunks no venue pays more for go to
+    # the first venue
+    amount_in = [0] * len(venues)
+    amount_out = [0] * len(venues)
+    for chunk in chunks(amount, steps):
+        best_venue, best_gain = 0, 0
+        for i, venue in enumerate(venues):
+            out = venue(amount_in[i] + chunk)
+            if i == 0:
+                best_out = out
+            if out > amount_out[i] and out - amount_out[i] > best_gain:
+                best_venue, best_out, best_gain = i, out, out - amount_out[i]
+        amount_in[best_venue] += chunk
+        amount_out[best_venue] = best_out
+    return amount_in
+
+
+def total_output(venues, amounts):
+    return sum(venue(amount) for venue, amount in zip(venues, amounts) if amount > 0)
+
+
+def brute_force_split(amount, venues, steps):
+    # Best allocation of the same chunks, trying every number of equal chunks
+    # per venue and every venue for the last chunk
+    *parts, last = chunks(amount, steps)
+    best_amounts, best_out = None, -1
+    for counts in itertools.product(range(len(parts) + 1), repeat=len(venues)):
+        if sum(counts) != len(parts):
+            continue
+        for last_venue in range(len(venues)):
+            amounts = [count * parts[0] if parts else 0 for count in counts]
+            amounts[last_venue] += last
+            out = total_output(venues, amounts)
+            if out > best_out:
+                best_amounts, best_out = amounts, out
+    return best_amounts
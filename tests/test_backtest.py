@@ -0,0 +1,119 @@
+import json
+
+import numpy as np
+import pytest
+
+from scripts.backtest import LIQUITY_LAUNCH, backtest, read_records, replay
+from scripts.simulator import DAY, DEFAULT_POLICY, grid
+
+START = LIQUITY_LAUNCH + 30 * DAY
+POOL = 500_000_000 * 10 ** 18
+
+
+def write_jsonl(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def records(tmp_path):
+    # 90 days of prices, with the Stability Pool and its liquidations in
+    # another file
+    prices = [
+        {
+            "timestamp": START + day * DAY,
+            "type": "price",
+            "eth": 3_000.0,
+            "lqty": 7.5,
+            "gas_price": 50 * 10 ** 9,
+        }
+        for day in range(91)
+    ]
+    events = [{"timestamp": START, "type": "deposits", "total_deposits": str(POOL)}]
+    for day in [10, 40, 70]:
+        # 2% of the pool for ETH worth 10% more
+        debt = POOL // 50
+        events += [
+            {
+                "timestamp": START + day * DAY + 3_600,
+                "type": "offset",
+                "debt": str(debt),
+                "collateral": str(debt * 11 // 10 // 3_000),
+                "total_deposits": str(POOL),
+            },
+            {
+                "timestamp": START + day * DAY + 7_200,
+                "type": "deposits",
+                "total_deposits": str(POOL),
+            },
+        ]
+    return [
+        write_jsonl(tmp_path / "prices.jsonl", prices),
+        write_jsonl(tmp_path / "events.jsonl", events),
+    ]
+
+
+def test_records_are_merged_in_order(records):
+    timestamps = [record["timestamp"] for record in read_records(records)]
+
+    assert len(timestamps) == 91 + 7
+    assert timestamps == sorted(timestamps)
+
+
+def test_replay_harvest_policies(records):
+    combinations, policy = grid(1, harvest_interval=[1, 7, 30])
+    results = replay(records, policy)
+
+    assert list(results.harvests) == [90, 12, 3]
+    assert np.all(results.failed_harvests == 0)
+    assert results.gas_spent == pytest.approx(
+        results.harvests * 1_500_000 * 50e9 * 3_000
+    )
+
+    # Every liquidation is sold at its premium, minus the swap costs
+    premium = results.eth_proceeds / results.lusd_loss - 1
+    assert np.all(results.lusd_loss > 0)
+    assert premium == pytest.approx(0.1 - 0.0035, abs=1e-3)
+    assert np.all(results.apy > 0)
+    assert results.net_apy[0] < results.net_apy[2]
+
+
+def test_withdrawals_liquidate_the_position(records, tmp_path):
+    withdrawal = {"timestamp": START + 50 * DAY, "type": "withdrawal", "share": 0.5}
+    records.append(write_jsonl(tmp_path / "withdrawals.jsonl", [withdrawal]))
+
+    results = replay(records)
+
+    # Half of the deposit and of the profit reported by then
+    assert 0.5 < results.withdrawn[0] / 10 ** 24 < 0.55
+    assert results.withdrawn[0] < results.total_assets[0] < 0.6 * 10 ** 24
+    assert results.apy[0] > 0
+
+
+def test_policies_run_in_parallel(records):
+    combinations, policy = grid(
+        1, harvest_interval=[1, 7], eth_swap_cost=[35, 300], max_eth_sale_value=[0]
+    )
+
+    results = backtest(records, policy, processes=2)
+
+    expected = replay(records, policy)
+    for name, values in results._asdict().items():
+        assert np.array_equal(values, getattr(expected, name)), name
+    # Swaps below the minimum output are never made
+    assert np.all(results.eth_sold[np.array(combinations)[:, 1] == 300] == 0)
+
+
+def test_parquet_records(records, tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    prices = list(read_records(records[:1]))
+    pq.write_table(pa.Table.from_pylist(prices), tmp_path / "prices.parquet")
+
+    expected = replay(records, DEFAULT_POLICY)
+    results = replay([str(tmp_path / "prices.parquet"), records[1]], DEFAULT_POLICY)
+
+    assert all(np.array_equal(a, b) for a, b in zip(results, expected))
@@ -0,0 +1,12 @@
+from brownie import web3
+
+# EIP-170 limit on the size of deployed code, in bytes
+MAX_CODE_SIZE = 24_576
+
+
+def test_strategy_fits_in_a_contract(strategy):
+    assert len(web3.eth.get_code(strategy.address)) <= MAX_CODE_SIZE
+
+
+def test_swap_lib_fits_in_a_contract(swap_lib):
+    assert len(web3.eth.get_code(swap_lib.address)) <= MAX_CODE_SIZE
@@ -0,0 +1,175 @@
+import pytest
+
+from brownie import reverts
+
+# Venue prices are set on the local stand-ins
+pytestmark = pytest.mark.usefixtures("local_only")
+
+
+@pytest.fixture
+def curve_pool(protocol):
+    yield protocol["curve_pool"]
+
+
+@pytest.fixture
+def uniswap_reserves(protocol, dai, lusd):
+    # DAI reserve of the DAI-LUSD 0.05% pool
+    yield lambda: protocol["router"].getReserves(dai, lusd, 500)[0]
+
+
+@pytest.fixture
+def select_best_venue(test_strategy, gov):
+    test_strategy.setSelectBestDAItoLUSDVenue(True, {"from": gov})
+
+
+@pytest.fixture
+def cheaper_on_uniswap(curve_pool):
+    # Most of the Curve pool is DAI so LUSD is expensive there
+    curve_pool.setBalances(5_000_000 * 10 ** 18, 95_000_000 * 10 ** 18)
+
+
+def test_select_best_venue_acl(
+    strategy, gov, strategist, management, keeper, guardian, user
+):
+    # Quoting both venues is opt-in
+    assert strategy.selectBestDAItoLUSDVenue() == False
+
+    strategy.setSelectBestDAItoLUSDVenue(True, {"from": gov})
+    assert strategy.selectBestDAItoLUSDVenue() == True
+
+    strategy.setSelectBestDAItoLUSDVenue(False, {"from": management})
+    assert strategy.selectBestDAItoLUSDVenue() == False
+
+    strategy.setSelectBestDAItoLUSDVenue(True, {"from": strategist})
+    assert strategy.selectBestDAItoLUSDVenue() == True
+
+    strategy.setSelectBestDAItoLUSDVenue(False, {"from": guardian})
+    assert strategy.selectBestDAItoLUSDVenue() == False
+
+    strategy.setSelectBestDAItoLUSDVenue(True, {"from": gov})
+
+    with reverts("!authorized"):
+        strategy.setSelectBestDAItoLUSDVenue(False, {"from": keeper})
+
+    with reverts("!authorized"):
+        strategy.setSelectBestDAItoLUSDVenue(False, {"from": user})
+
+    # Choosing a venue overrides the selection
+    strategy.setConvertDAItoLUSDonCurve(True, {"from": gov})
+    assert strategy.selectBestDAItoLUSDVenue() == False
+
+
+def test_sells_on_curve_when_better(
+    test_strategy, select_best_venue, curve_pool, uniswap_reserves, dai, dai_whale, lusd
+):
+    amount = 1_000 * (10 ** dai.decimals())
+    dai_reserve = uniswap_reserves()
+    dai.transfer(test_strategy, amount, {"from": dai_whale})
+
+    test_strategy.sellDAIforLUSD()
+
+    assert curve_pool.balances(1) == 50_000_000 * 10 ** 18 + amount
+    assert uniswap_reserves() == dai_reserve
+    assert dai.balanceOf(test_strategy) == 0
+    assert lusd.balanceOf(test_strategy) > 0
+
+
+def test_sells_on_uniswap_when_better(
+    test_strategy,
+    select_best_venue,
+    cheaper_on_uniswap,
+    curve_pool,
+    uniswap_reserves,
+    dai,
+    dai_whale,
+    lusd,
+):
+    amount = 1_000 * (10 ** dai.decimals())
+    curve_dai = curve_pool.balances(1)
+    dai_reserve = uniswap_reserves()
+    dai.transfer(test_strategy, amount, {"from": dai_whale})
+
+    test_strategy.sellDAIforLUSD()
+
+    assert uniswap_reserves() == dai_reserve + amount
+    assert curve_pool.balances(1) == curve_dai
+    assert dai.balanceOf(test_strategy) == 0
+    assert lusd.balanceOf(test_strategy) > 0
+
+
+def test_best_venue_gets_more_lusd(
+    test_strategy, cheaper_on_uniswap, gov, dai, dai_whale, lusd
+):
+    amount = 1_000 * (10 ** dai.decimals())
+
+    received = []
+    for select_best in [False, True]:
+        dai.transfer(test_strategy, amount, {"from": dai_whale})
+        lusd_before = lusd.balanceOf(test_strategy)
+        test_strategy.setConvertDAItoLUSDonCurve(True, {"from": gov})
+        test_strategy.setSelectBestDAItoLUSDVenue(select_best, {"from": gov})
+
+        test_strategy.sellDAIforLUSD()
+        received.append(lusd.balanceOf(test_strategy) - lusd_before)
+
+    assert received[1] > received[0]
+
+
+def test_venue_override(
+    test_strategy,
+    cheaper_on_uniswap,
+    gov,
+    curve_pool,
+    uniswap_reserves,
+    dai,
+    dai_whale,
+):
+    amount = 1_000 * (10 ** dai.decimals())
+    curve_dai = curve_pool.balances(1)
+    dai_reserve = uniswap_reserves()
+    dai.transfer(test_strategy, amount, {"from": dai_whale})
+
+    # Uniswap is better but Curve was chosen by governance
+    test_strategy.setConvertDAItoLUSDonCurve(True, {"from": gov})
+    test_strategy.sellDAIforLUSD()
+
+    assert curve_pool.balances(1) == curve_dai + amount
+    assert uniswap_reserves() == dai_reserve
+
+
+def test_non_existent_uniswap_pool_is_not_selected(
+    test_strategy, select_best_venue, cheaper_on_uniswap, curve_pool, dai, dai_whale
+):
+    amount = 1_000 * (10 ** dai.decimals())
+    curve_dai = curve_pool.balances(1)
+    test_strategy.setSwapFees(
+        test_strategy.lqtyToEthFee(), test_strategy.ethToDaiFee(), 123
+    )
+    dai.transfer(test_strategy, amount, {"from": dai_whale})
+
+    test_strategy.sellDAIforLUSD()
+
+    assert curve_pool.balances(1) == curve_dai + amount
+    assert dai.balanceOf(test_strategy) == 0
+
+
+def test_single_swap_sells_dai_on_best_venue(
+    test_strategy,
+    select_best_venue,
+    cheaper_on_uniswap,
+    gov,
+    uniswap_reserves,
+    accounts,
+    weth,
+    dai,
+):
+    test_strategy.setConvertRewardsInSingleSwap(True, {"from": gov})
+    dai_reserve = uniswap_reserves()
+    accounts.at(weth, force=True).transfer(test_strategy, "10 ether")
+
+    test_strategy.claimRewards()
+
+    # WETH is sold for DAI, which is then sold on Uniswap
+    assert uniswap_reserves() > dai_reserve
+    assert dai.balanceOf(test_strategy) == 0
+    assert test_strategy.totalETHBalance() == 0
@@ -0,0 +1,211 @@
+import pytest
+
+from brownie import reverts, Wei
+
+try:
+    from eth_abi import encode as encode_abi
+except ImportError:
+    # eth-abi < 4, installed with eth-brownie < 1.20
+    from eth_abi import encode_abi
+
+
+def encode_path(tokens, fees):
+    # Uniswap v3 path: token + n * (fee + token)
+    path = bytes.fromhex(tokens[0].address[2:])
+    for fee, token in zip(fees, tokens[1:]):
+        path += fee.to_bytes(3, "big") + bytes.fromhex(token.address[2:])
+    return path
+
+
+def router_calls(tx, strategy, router):
+    return [
+        call
+        for call in tx.subcalls
+        if call["from"] == strategy.address and call["to"] == router.address
+    ]
+
+
+@pytest.fixture
+def direct_strategy(test_strategy, gov):
+    test_strategy.setSwapOnPoolsDirectly(True, {"from": gov})
+    yield test_strategy
+
+
+def test_swap_on_pools_directly_acl(
+    strategy, gov, strategist, management, keeper, guardian, user
+):
+    # Swaps go through the router by default
+    assert strategy.swapOnPoolsDirectly() == False
+
+    strategy.setSwapOnPoolsDirectly(True, {"from": gov})
+    assert strategy.swapOnPoolsDirectly() == True
+
+    strategy.setSwapOnPoolsDirectly(False, {"from": management})
+    assert strategy.swapOnPoolsDirectly() == False
+
+    strategy.setSwapOnPoolsDirectly(True, {"from": strategist})
+    assert strategy.swapOnPoolsDirectly() == True
+
+    strategy.setSwapOnPoolsDirectly(False, {"from": guardian})
+    assert strategy.swapOnPoolsDirectly() == False
+
+    with reverts("!authorized"):
+        strategy.setSwapOnPoolsDirectly(True, {"from": keeper})
+
+    with reverts("!authorized"):
+        strategy.setSwapOnPoolsDirectly(True, {"from": user})
+
+
+def test_lqty_to_dai_on_pools(direct_strategy, protocol, lqty, lqty_whale, weth, dai):
+    lqty.transfer(
+        direct_strategy, 1_000 * (10 ** lqty.decimals()), {"from": lqty_whale}
+    )
+
+    tx = direct_strategy.sellLQTYforDAI()
+
+    assert len(router_calls(tx, direct_strategy, protocol["router"])) == 0
+    assert direct_strategy.totalLQTYBalance() == 0
+    assert weth.balanceOf(direct_strategy) == 0
+    assert dai.balanceOf(direct_strategy) > 0
+
+
+def test_eth_to_dai_on_pools(direct_strategy, protocol, accounts, weth, dai):
+    accounts.at(weth, force=True).transfer(direct_strategy, Wei("10 ether"))
+
+    tx = direct_strategy.sellETHforDAI()
+
+    assert len(router_calls(tx, direct_strategy, protocol["router"])) == 0
+    assert direct_strategy.totalETHBalance() == 0
+    assert weth.balanceOf(direct_strategy) == 0
+    assert dai.balanceOf(direct_strategy) > 0
+
+
+def test_eth_to_dai_on_pools_with_no_slippage_reverts(direct_strategy, accounts, weth):
+    accounts.at(weth, force=True).transfer(direct_strategy, Wei("10 ether"))
+
+    # Set min expected swap to 102% of current chainlink price
+    direct_strategy.setMinExpectedSwapPercentageUnchecked(10200)
+
+    with reverts("dev: too little received"):
+        direct_strategy.sellETHforDAI()
+
+
+def test_dai_to_lusd_on_pools(direct_strategy, protocol, gov, dai, dai_whale, lusd):
+    direct_strategy.setConvertDAItoLUSDonCurve(False, {"from": gov})
+    dai.transfer(direct_strategy, 1_000 * (10 ** dai.decimals()), {"from": dai_whale})
+
+    tx = direct_strategy.sellDAIforLUSD()
+
+    assert len(router_calls(tx, direct_strategy, protocol["router"])) == 0
+    assert dai.balanceOf(direct_strategy) == 0
+    assert lusd.balanceOf(direct_strategy) > 0
+
+
+def test_rewards_in_single_swap_on_pools(
+    direct_strategy, protocol, gov, accounts, lqty, lqty_whale, weth, dai
+):
+    direct_strategy.setConvertRewardsInSingleSwap(True, {"from": gov})
+    accounts.at(weth, force=True).transfer(direct_strategy, Wei("10 ether"))
+    lqty.transfer(
+        direct_strategy, 1_000 * (10 ** lqty.decimals()), {"from": lqty_whale}
+    )
+
+    tx = direct_strategy.sellRewardsInSingleSwap()
+
+    assert len(router_calls(tx, direct_strategy, protocol["router"])) == 0
+    assert direct_strategy.totalETHBalance() == 0
+    assert direct_strategy.totalLQTYBalance() == 0
+    assert weth.balanceOf(direct_strategy) == 0
+    assert dai.balanceOf(direct_strategy) > 0
+
+
+def test_route_on_pools(
+    direct_strategy, protocol, gov, lqty, lqty_whale, weth, dai, lusd
+):
+    direct_strategy.setRoute(
+        lqty, encode_path([lqty, weth, dai, lusd], [3000, 3000, 500]), {"from": gov}
+    )
+    lqty.transfer(
+        direct_strategy, 1_000 * (10 ** lqty.decimals()), {"from": lqty_whale}
+    )
+
+    tx = direct_strategy.sellLQTYforDAI()
+
+    # Every hop is received and paid by the strategy
+    assert len(router_calls(tx, direct_strategy, protocol["router"])) == 0
+    assert tx.return_value > 0
+    assert lusd.balanceOf(direct_strategy) == tx.return_value
+    assert weth.balanceOf(direct_strategy) == 0
+    assert dai.balanceOf(direct_strategy) == 0
+
+
+def test_route_on_pools_with_no_slippage_reverts(
+    direct_strategy, gov, accounts, weth, dai, lusd
+):
+    direct_strategy.setRoute(
+        weth, encode_path([weth, dai, lusd], [3000, 500]), {"from": gov}
+    )
+    accounts.at(weth, force=True).transfer(direct_strategy, Wei("10 ether"))
+
+    direct_strategy.setMinExpectedSwapPercentageUnchecked(10200)
+
+    with reverts("dev: too little received"):
+        direct_strategy.sellETHforDAI()
+
+
+def test_non_existent_pool_reverts(direct_strategy, gov, dai, dai_whale):
+    direct_strategy.setConvertDAItoLUSDonCurve(False, {"from": gov})
+    direct_strategy.setSwapFees(
+        direct_strategy.lqtyToEthFee(), direct_strategy.ethToDaiFee(), 123
+    )
+    dai.transfer(direct_strategy, 1_000 * (10 ** dai.decimals()), {"from": dai_whale})
+
+    with reverts():
+        direct_strategy.sellDAIforLUSD()
+
+
+def test_callback_from_unknown_caller_reverts(strategy, user, lusd, lusd_whale, dai):
+    lusd.transfer(strategy, 1_000 * (10 ** lusd.decimals()), {"from": lusd_whale})
+    data = encode_abi(
+        ["address", "address", "uint24"], [lusd.address, dai.address, 500]
+    )
+
+    # Only the pool for the tokens and fee can pull tokens from the strategy
+    for caller in [user, lusd_whale]:
+        with reverts("dev: invalid pool"):
+            strategy.uniswapV3SwapCallback(1_000 * 10 ** 18, 0, data, {"from": caller})
+    assert lusd.balanceOf(strategy) == 1_000 * (10 ** lusd.decimals())
+
+
+def test_harvest_on_pools(
+    chain,
+    token,
+    vault,
+    strategy,
+    user,
+    amount,
+    gov,
+    protocol,
+    lqty,
+    lqty_whale,
+    weth,
+    accounts,
+):
+    strategy.setSwapOnPoolsDirectly(True, {"from": gov})
+
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    lqty.transfer(strategy, 5 * (10 ** lqty.decimals()), {"from": lqty_whale})
+    accounts.at(weth, force=True).transfer(strategy, Wei("0.01 ether"))
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    assert len(router_calls(tx, strategy, protocol["router"])) == 0
+    profit = tx.events["Harvested"]["profit"]
+    assert profit > 0
+    assert vault.strategies(strategy).dict()["totalGain"] == profit
+    assert strategy.totalLQTYBalance() == 0
+    assert strategy.totalETHBalance() == 0
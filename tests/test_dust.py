@@ -0,0 +1,123 @@
+from brownie import chain, reverts, Wei
+
+
+def test_set_min_sell_amounts_acl(
+    strategy, gov, strategist, management, keeper, guardian, user
+):
+    # Everything is sold by default
+    assert strategy.minETHToSell() == 0
+    assert strategy.minLQTYToSell() == 0
+    assert strategy.minDAIToSell() == 0
+
+    strategy.setMinSellAmounts(1, 2, 3, {"from": gov})
+    assert strategy.minETHToSell() == 1
+    assert strategy.minLQTYToSell() == 2
+    assert strategy.minDAIToSell() == 3
+
+    strategy.setMinSellAmounts(4, 5, 6, {"from": management})
+    assert strategy.minETHToSell() == 4
+
+    strategy.setMinSellAmounts(7, 8, 9, {"from": strategist})
+    assert strategy.minLQTYToSell() == 8
+
+    strategy.setMinSellAmounts(10, 11, 12, {"from": guardian})
+    assert strategy.minDAIToSell() == 12
+
+    with reverts("!authorized"):
+        strategy.setMinSellAmounts(1, 2, 3, {"from": keeper})
+
+    with reverts("!authorized"):
+        strategy.setMinSellAmounts(1, 2, 3, {"from": user})
+
+
+def test_eth_dust_is_carried_over(strategy, deposited, gov, accounts, weth):
+    strategy.setMinSellAmounts(Wei("0.01 ether"), 0, 0, {"from": gov})
+    accounts.at(weth, force=True).transfer(strategy, Wei("0.005 ether"))
+    total_assets = strategy.estimatedTotalAssets()
+
+    chain.sleep(1)
+    strategy.harvest()
+
+    # ETH is still accounted for
+    assert strategy.balance() == Wei("0.005 ether")
+    assert strategy.estimatedTotalAssets() >= total_assets
+
+    accounts.at(weth, force=True).transfer(strategy, Wei("0.005 ether"))
+    chain.sleep(1)
+    strategy.harvest()
+
+    assert strategy.balance() == 0
+
+
+def test_lqty_dust_is_carried_over(strategy, deposited, gov, lqty, lqty_whale):
+    strategy.setMinSellAmounts(0, 10 * 10 ** 18, 0, {"from": gov})
+    lqty.transfer(strategy, 5 * 10 ** 18, {"from": lqty_whale})
+
+    chain.sleep(1)
+    strategy.harvest()
+
+    assert lqty.balanceOf(strategy) == 5 * 10 ** 18
+
+    lqty.transfer(strategy, 5 * 10 ** 18, {"from": lqty_whale})
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    assert lqty.balanceOf(strategy) == 0
+    assert tx.events["Harvested"]["profit"] > 0
+
+
+def test_dai_dust_is_carried_over(strategy, deposited, gov, dai, dai_whale):
+    # LQTY gains are left in the pool so that no DAI is bought
+    strategy.setMinSellAmounts(0, 2 ** 256 - 1, 10 * 10 ** 18, {"from": gov})
+    dai.transfer(strategy, 5 * 10 ** 18, {"from": dai_whale})
+
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    # DAI is still accounted for and is not reported as a loss
+    assert dai.balanceOf(strategy) == 5 * 10 ** 18
+    assert tx.events["Harvested"]["loss"] == 0
+    assert tx.events["Harvested"]["profit"] >= 5 * 10 ** 18
+
+    dai.transfer(strategy, 5 * 10 ** 18, {"from": dai_whale})
+    chain.sleep(1)
+    strategy.harvest()
+
+    assert dai.balanceOf(strategy) == 0
+
+
+def test_dust_in_single_swap(
+    strategy, deposited, gov, accounts, weth, lqty, lqty_whale
+):
+    strategy.setConvertRewardsInSingleSwap(True, {"from": gov})
+    strategy.setMinSellAmounts(Wei("0.01 ether"), 10 * 10 ** 18, 0, {"from": gov})
+    accounts.at(weth, force=True).transfer(strategy, Wei("0.005 ether"))
+    lqty.transfer(strategy, 100 * 10 ** 18, {"from": lqty_whale})
+
+    chain.sleep(1)
+    strategy.harvest()
+
+    # LQTY is sold on its own, ETH is left for the next harvest
+    assert lqty.balanceOf(strategy) == 0
+    assert strategy.balance() == Wei("0.005 ether")
+    assert weth.balanceOf(strategy) == 0
+
+
+def test_dust_gains_are_not_claimed(
+    local_only, strategy, deposited, gov, stability_pool
+):
+    # ~0.0002 ETH of gains for the strategy
+    stability_pool.liquidate(10 ** 22, {"from": gov, "value": Wei("10 ether")})
+    strategy.setMinSellAmounts(Wei("0.01 ether"), 2 ** 256 - 1, 0, {"from": gov})
+
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    # withdrawFromSP(0) was not called and the gains stay in the pool
+    assert stability_pool.getDepositorETHGain(strategy) > 0
+    assert not [
+        call
+        for call in tx.subcalls
+        if call["to"] == stability_pool.address
+        and call["function"].startswith("withdrawFromSP")
+    ]
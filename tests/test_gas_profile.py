@@ -0,0 +1,84 @@
+from scripts.gas_profile import (
+    aggregate,
+    folded_stacks,
+    format_folded,
+    format_report,
+    function_costs,
+)
+
+
+def step(fn, depth, jump_depth, gas, op="PUSH1", gas_cost=3):
+    return {
+        "fn": fn,
+        "depth": depth,
+        "jumpDepth": jump_depth,
+        "gas": gas,
+        "gasCost": gas_cost,
+        "op": op,
+    }
+
+
+# harvest -> _claimRewards -> exchange_underlying (external) -> _getD
+TRACE = [
+    step("Strategy.harvest", 0, 0, 100_000),
+    step("Strategy._claimRewards", 0, 1, 99_990),
+    # CALL: the node reports the gas forwarded as the cost of the opcode
+    step("Strategy._claimRewards", 0, 1, 99_980, op="CALL", gas_cost=90_000),
+    step("TestCurvePool.exchange_underlying", 1, 0, 88_000),
+    step("TestCurvePool._getD", 1, 1, 87_000),
+    step("TestCurvePool.exchange_underlying", 1, 0, 80_000, op="RETURN"),
+    step("Strategy._claimRewards", 0, 1, 79_000),
+    step("Strategy.harvest", 0, 0, 78_000),
+    step("Strategy.harvest", 0, 0, 77_500, op="STOP", gas_cost=0),
+]
+
+
+def test_folded_stacks_attributes_gas_to_each_frame():
+    stacks = folded_stacks(TRACE)
+
+    # The CALL is charged what the call used (99_980 - 79_000) minus the gas
+    # used by the callee (1_000 + 7_000 + 3), not the gas it forwarded
+    assert stacks == {
+        "Strategy.harvest": 10 + 500,
+        "Strategy.harvest;Strategy._claimRewards": 10 + 12_977 + 1_000,
+        "Strategy.harvest;Strategy._claimRewards;TestCurvePool.exchange_underlying": (
+            1_000 + 3
+        ),
+        "Strategy.harvest;Strategy._claimRewards;"
+        "TestCurvePool.exchange_underlying;TestCurvePool._getD": 7_000,
+    }
+    assert sum(stacks.values()) == 100_000 - 77_500
+
+
+def test_function_costs_and_reports():
+    stacks = aggregate([folded_stacks(TRACE), folded_stacks(TRACE)])
+    costs = function_costs(stacks)
+
+    assert costs["TestCurvePool._getD"] == {"self": 14_000, "total": 14_000}
+    assert costs["Strategy.harvest"]["total"] == sum(stacks.values())
+
+    report = format_report(stacks, 2).splitlines()
+    # Sorted by gas including callees, averaged over the runs
+    assert report[2].startswith("Strategy.harvest ")
+    assert report[-1].endswith(str(sum(stacks.values()) // 2))
+
+    folded = format_folded(stacks).splitlines()
+    assert "Strategy.harvest;Strategy._claimRewards 27974" in folded
+
+
+def test_harvest_profile(chain, token, vault, strategy, user, amount, lqty, lqty_whale):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    lqty.transfer(strategy, 5 * 10 ** 18, {"from": lqty_whale})
+    chain.sleep(1)
+    tx = strategy.harvest()
+    stacks = folded_stacks(tx.trace)
+    costs = function_costs(stacks)
+
+    assert all(stack.startswith("Strategy.harvest") for stack in stacks)
+    assert costs["Strategy.harvest"]["total"] < tx.gas_used
+    assert costs["Strategy._sellLQTYforDAI"]["total"] > 0
+    assert costs["Strategy._sellDAIforLUSDonCurve"]["total"] > 0
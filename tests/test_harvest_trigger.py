@@ -0,0 +1,88 @@
+from brownie import chain, reverts, Wei
+
+# Debt offset by the liquidations, 20% of the Stability Pool
+DEBT = 100_000_000 * 10 ** 18
+
+
+def test_set_min_liquidation_premium_acl(
+    strategy, gov, strategist, management, keeper, guardian, user
+):
+    # Half of the ~10% liquidation premium by default
+    assert strategy.minLiquidationPremium() == 500
+
+    strategy.setMinLiquidationPremium(100, {"from": gov})
+    assert strategy.minLiquidationPremium() == 100
+
+    strategy.setMinLiquidationPremium(200, {"from": management})
+    assert strategy.minLiquidationPremium() == 200
+
+    strategy.setMinLiquidationPremium(300, {"from": strategist})
+    assert strategy.minLiquidationPremium() == 300
+
+    strategy.setMinLiquidationPremium(400, {"from": guardian})
+    assert strategy.minLiquidationPremium() == 400
+
+    with reverts("!authorized"):
+        strategy.setMinLiquidationPremium(500, {"from": keeper})
+
+    with reverts("!authorized"):
+        strategy.setMinLiquidationPremium(500, {"from": user})
+
+    with reverts("dev: invalid premium"):
+        strategy.setMinLiquidationPremium(10_001, {"from": gov})
+
+
+def test_no_trigger_without_gains(local_only, strategy, deposited):
+    assert strategy.harvestTrigger(Wei("0.001 ether")) == False
+
+
+def test_trigger_when_eth_gains_pay_for_harvest(
+    local_only, strategy, deposited, stability_pool, gov
+):
+    # 50% liquidation premium, ~1,000 LUSD of profit for the strategy
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("50000 ether")})
+
+    # profitFactor is 100, the gains have to pay for 100 harvests
+    assert strategy.harvestTrigger(Wei("0.001 ether")) == True
+    assert strategy.harvestTrigger(Wei("0.01 ether")) == False
+
+
+def test_trigger_values_lqty(local_only, strategy, deposited, lqty, lqty_whale):
+    # 1 ETH worth of LQTY
+    lqty.transfer(strategy, 400 * 10 ** 18, {"from": lqty_whale})
+
+    assert strategy.harvestTrigger(Wei("0.005 ether")) == True
+    assert strategy.harvestTrigger(Wei("0.02 ether")) == False
+
+
+def test_trigger_when_liquidation_premium_erodes(
+    local_only, strategy, deposited, stability_pool, price_feed, gov
+):
+    # 11% liquidation premium, too little profit to pay for the harvest
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("37000 ether")})
+    assert strategy.harvestTrigger(Wei("0.01 ether")) == False
+
+    # A 6.7% ETH price drop leaves a 3.6% premium
+    price_feed.setPrice(2_800 * 10 ** 18)
+    assert strategy.harvestTrigger(Wei("0.01 ether")) == True
+
+    strategy.setMinLiquidationPremium(300, {"from": gov})
+    assert strategy.harvestTrigger(Wei("0.01 ether")) == False
+
+    # Unless selling the ETH costs more than it is worth
+    strategy.setMinLiquidationPremium(500, {"from": gov})
+    assert strategy.harvestTrigger(Wei("1 ether")) == False
+
+
+def test_trigger_after_max_report_delay(local_only, strategy, deposited):
+    chain.sleep(strategy.maxReportDelay())
+    chain.mine()
+
+    assert strategy.harvestTrigger(0) == True
+
+
+def test_trigger_to_report_loss(local_only, strategy, deposited, stability_pool, gov):
+    # Collateral is worth less than the debt it offsets
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("30000 ether")})
+
+    assert strategy.harvestTrigger(Wei("1 ether")) == True
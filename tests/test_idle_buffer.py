@@ -0,0 +1,147 @@
+import pytest
+
+from brownie import chain, reverts, Wei
+
+
+def sp_withdrawals(tx, strategy, stability_pool):
+    return [
+        call
+        for call in tx.subcalls
+        if call["from"] == strategy.address
+        and call["to"] == stability_pool.address
+        and call["function"].startswith("withdrawFromSP")
+    ]
+
+
+def test_set_idle_buffer_ratio_acl(
+    strategy, gov, strategist, management, keeper, guardian, user
+):
+    # Everything is deposited by default
+    assert strategy.idleBufferRatio() == 0
+
+    strategy.setIdleBufferRatio(100, {"from": gov})
+    assert strategy.idleBufferRatio() == 100
+
+    strategy.setIdleBufferRatio(200, {"from": management})
+    assert strategy.idleBufferRatio() == 200
+
+    strategy.setIdleBufferRatio(300, {"from": strategist})
+    assert strategy.idleBufferRatio() == 300
+
+    strategy.setIdleBufferRatio(10_000, {"from": guardian})
+    assert strategy.idleBufferRatio() == 10_000
+
+    with reverts("dev: invalid ratio"):
+        strategy.setIdleBufferRatio(10_001, {"from": gov})
+
+    with reverts("!authorized"):
+        strategy.setIdleBufferRatio(100, {"from": keeper})
+
+    with reverts("!authorized"):
+        strategy.setIdleBufferRatio(100, {"from": user})
+
+
+def buffer_target(vault, strategy):
+    total_debt = vault.strategies(strategy).dict()["totalDebt"]
+    return total_debt * strategy.idleBufferRatio() // 10_000
+
+
+def test_harvest_keeps_buffer(vault, strategy, deposited, amount, gov, stability_pool):
+    assert strategy.balanceOfWant() == 0
+
+    strategy.setIdleBufferRatio(1_000, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest()
+
+    assert strategy.balanceOfWant() == buffer_target(vault, strategy)
+    assert strategy.balanceOfWant() >= amount // 10
+    assert strategy.estimatedTotalAssets() >= amount
+
+    # Lowering the ratio deposits the excess back
+    strategy.setIdleBufferRatio(500, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest()
+
+    assert strategy.balanceOfWant() == buffer_target(vault, strategy)
+    assert strategy.balanceOfWant() < amount // 10
+
+
+def test_tend_keeps_buffer(vault, strategy, deposited, amount, gov, keeper):
+    strategy.setIdleBufferRatio(1_000, {"from": gov})
+    strategy.tend({"from": keeper})
+
+    # Tending does not report so the debt is still the first deposit
+    assert strategy.balanceOfWant() == buffer_target(vault, strategy)
+    assert strategy.balanceOfWant() == amount // 10
+
+
+def test_small_withdrawal_served_from_buffer(
+    vault, strategy, deposited, token, user, amount, gov, stability_pool
+):
+    # Without a buffer the Stability Pool pays for every withdrawal
+    tx_without_buffer = vault.withdraw(amount // 100, {"from": user})
+    assert len(sp_withdrawals(tx_without_buffer, strategy, stability_pool)) == 1
+
+    strategy.setIdleBufferRatio(1_000, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest()
+
+    tx_with_buffer = vault.withdraw(amount // 100, {"from": user})
+    assert len(sp_withdrawals(tx_with_buffer, strategy, stability_pool)) == 0
+    assert token.balanceOf(user) >= 2 * (amount // 100)
+
+    print(
+        f"Withdrawal gas: {tx_without_buffer.gas_used} from the Stability Pool, "
+        f"{tx_with_buffer.gas_used} from the buffer"
+    )
+    assert tx_with_buffer.gas_used < tx_without_buffer.gas_used
+
+
+def test_large_withdrawal_exceeding_buffer(
+    vault, strategy, deposited, token, user, amount, gov, stability_pool
+):
+    strategy.setIdleBufferRatio(1_000, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest()
+
+    # The buffer is used up before withdrawing the rest from the pool
+    tx = vault.withdraw(amount // 2, {"from": user})
+
+    assert len(sp_withdrawals(tx, strategy, stability_pool)) == 1
+    assert token.balanceOf(user) >= amount // 2
+    assert strategy.balanceOfWant() == 0
+
+
+def test_harvest_refills_buffer(vault, strategy, deposited, user, amount, gov):
+    strategy.setIdleBufferRatio(1_000, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest()
+
+    vault.withdraw(amount // 20, {"from": user})
+    assert strategy.balanceOfWant() < buffer_target(vault, strategy)
+
+    chain.sleep(1)
+    strategy.harvest()
+
+    assert strategy.balanceOfWant() == buffer_target(vault, strategy)
+
+
+@pytest.mark.parametrize("ratio", [0, 500, 2_000])
+def test_buffer_yield_drag(local_only, strategy, deposited, gov, stability_pool, ratio):
+    strategy.setIdleBufferRatio(ratio, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest()
+
+    deposit = stability_pool.getCompoundedLUSDDeposit(strategy)
+    total_lusd = strategy.totalLUSDBalance()
+    total_deposits = stability_pool.getTotalLUSDDeposits()
+
+    eth = Wei("100 ether")
+    stability_pool.liquidate(10 ** 24, {"from": gov, "value": eth})
+    eth_gain = stability_pool.getDepositorETHGain(strategy)
+
+    # ETH gains are shared by deposit, so the buffer misses its share of them
+    eth_without_buffer = eth * total_lusd / (total_deposits + total_lusd - deposit)
+    drag = 1 - eth_gain / eth_without_buffer
+    print(f"Buffer of {ratio / 100:.0f}% of the debt loses {drag:.2%} of the yield")
+    assert drag == pytest.approx(ratio / 10_000, rel=1e-3, abs=1e-6)
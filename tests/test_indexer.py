@@ -0,0 +1,169 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from brownie import chain, web3, Wei
+
+from scripts.indexer import Indexer, connect
+from scripts.keeper import RPC, RPCError
+
+# Liquidations are simulated on the local stand-ins
+pytestmark = pytest.mark.usefixtures("local_only")
+
+# Debt offset by the liquidations, 20% of the Stability Pool
+DEBT = 100_000_000 * 10 ** 18
+
+
+class CappedRPC(RPC):
+    # Refuses eth_getLogs over more than `max_range` blocks, as nodes capping
+    # the number of results do, and keeps the ranges requested
+    def __init__(self, url, session, max_range=None):
+        super().__init__(url, session)
+        self.max_range = max_range
+        self.ranges = []
+
+    async def batch(self, requests):
+        ranges = [
+            (int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16))
+            for method, params in requests
+            if method == "eth_getLogs"
+        ]
+        self.ranges += ranges
+        if self.max_range and any(
+            last - first >= self.max_range for first, last in ranges
+        ):
+            return [RPCError("query returned more than 10000 results")] * len(requests)
+        return await super().batch(requests)
+
+
+def index(db, strategy, stability_pool, max_range=None, **kwargs):
+    async def _index():
+        async with aiohttp.ClientSession() as session:
+            rpc = CappedRPC(web3.provider.endpoint_uri, session, max_range)
+            indexer = Indexer(rpc, db, strategy.address, str(stability_pool), **kwargs)
+            block = await indexer.index(to_block=web3.eth.block_number)
+            return indexer, rpc, block
+
+    return asyncio.run(_index())
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = connect(str(tmp_path / "indexer.db"))
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def harvested(vault, strategy, token, user, amount, stability_pool, gov):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    first = strategy.harvest()
+
+    # ETH and LQTY gains are claimed and sold by the next harvest
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("36667 ether")})
+    chain.sleep(86400)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    second = strategy.harvest()
+    yield [first, second]
+
+
+def test_swaps_emit_events(strategy, harvested, weth, dai, token, protocol):
+    swaps = harvested[1].events["Swapped"]
+
+    # ETH is sold for DAI on Uniswap and DAI for LUSD last
+    eth_sale = [swap for swap in swaps if swap["tokenIn"] == weth][0]
+    assert eth_sale["tokenOut"] == dai
+    assert eth_sale["venue"] == protocol["uniswap_factory"]
+    assert eth_sale["amountIn"] == harvested[1].events["ETHGainWithdrawn"]["_ETH"]
+    assert swaps[-1]["tokenIn"] == dai
+    assert swaps[-1]["tokenOut"] == token
+    for swap in swaps:
+        assert swap["amountOut"] >= swap["minAmountOut"]
+        assert swap["amountOut"] > 0
+
+
+def test_index_reports_gains_and_swaps(strategy, stability_pool, harvested, db):
+    _, _, block = index(db, strategy, stability_pool)
+
+    assert block == web3.eth.block_number
+    reports = db.execute("SELECT block, gain, loss FROM reports ORDER BY block")
+    assert reports.fetchall() == [
+        (
+            tx.block_number,
+            str(tx.events["Harvested"]["profit"]),
+            str(tx.events["Harvested"]["loss"]),
+        )
+        for tx in harvested
+    ]
+
+    gains = db.execute(
+        "SELECT token, amount FROM gains WHERE block = ? ORDER BY log_index",
+        (harvested[1].block_number,),
+    ).fetchall()
+    assert gains == [
+        ("ETH", str(event["_ETH"]))
+        if event.name == "ETHGainWithdrawn"
+        else ("LQTY", str(event["_LQTY"]))
+        for event in harvested[1].events
+        if event.name in ["ETHGainWithdrawn", "LQTYPaidToDepositor"]
+    ]
+    assert ("LQTY", "0") not in gains
+
+    swaps = db.execute(
+        "SELECT token_in, token_out, amount_in, amount_out FROM swaps "
+        "ORDER BY block, log_index"
+    ).fetchall()
+    assert swaps == [
+        (
+            swap["tokenIn"],
+            swap["tokenOut"],
+            str(swap["amountIn"]),
+            str(swap["amountOut"]),
+        )
+        for swap in harvested[1].events["Swapped"]
+    ]
+
+    # Every block with events has its timestamp
+    assert (
+        db.execute(
+            "SELECT timestamp FROM blocks WHERE number = ?",
+            (harvested[1].block_number,),
+        ).fetchone()
+        == (web3.eth.get_block(harvested[1].block_number).timestamp,)
+    )
+
+
+def test_resume_from_checkpoint(strategy, stability_pool, harvested, db, gov):
+    _, _, first_block = index(db, strategy, stability_pool)
+
+    chain.sleep(86400)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    tx = strategy.harvest()
+    indexer, rpc, block = index(db, strategy, stability_pool)
+
+    # Only the new blocks are fetched
+    assert indexer.checkpoint() == block == web3.eth.block_number
+    assert min(first for first, _ in rpc.ranges) == first_block + 1
+    assert db.execute("SELECT COUNT(*) FROM reports").fetchone() == (3,)
+    assert db.execute("SELECT MAX(block) FROM reports").fetchone() == (tx.block_number,)
+
+
+def test_chunks_adapt_to_node_limits(strategy, stability_pool, harvested, db, tmp_path):
+    indexer, rpc, _ = index(
+        db, strategy, stability_pool, max_range=16, chunk_size=64, concurrency=2
+    )
+
+    # Ranges over 16 blocks are refused and split until the node answers,
+    # with the same results
+    assert any(last - first >= 16 for first, last in rpc.ranges)
+    assert indexer.chunk_size <= 32
+
+    reference = connect(str(tmp_path / "reference.db"))
+    index(reference, strategy, stability_pool)
+    for table in ["reports", "gains", "swaps", "blocks"]:
+        query = f"SELECT * FROM {table} ORDER BY 1, 2"
+        assert db.execute(query).fetchall() == reference.execute(query).fetchall()
+    reference.close()
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+
+import aiohttp
+import pytest
+
+from brownie import chain, web3, Wei
+
+from scripts.keeper import RPC, WANT, Keeper, RPCError
+
+# The keeper is run against the local stand-ins
+pytestmark = pytest.mark.usefixtures("local_only")
+
+
+class RecordingRPC(RPC):
+    # Keeps the requests of every batch
+    def __init__(self, url, session):
+        super().__init__(url, session)
+        self.batches = []
+
+    async def batch(self, requests):
+        self.batches.append(requests)
+        return await super().batch(requests)
+
+
+class Response:
+    # Body of the reply to a batch
+    def __init__(self, body):
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    async def json(self, content_type=None):
+        return json.loads(self.body)
+
+
+class Session:
+    # Answers every batch with the same body
+    def __init__(self, body):
+        self.body = body
+
+    def post(self, url, json):
+        return Response(self.body)
+
+
+def poll(keeper_address, strategies, polls=1):
+    async def _poll():
+        async with aiohttp.ClientSession() as session:
+            rpc = RecordingRPC(web3.provider.endpoint_uri, session)
+            keeper = Keeper(rpc, strategies, keeper_address)
+            results = [await keeper.poll() for _ in range(polls)]
+            return keeper, rpc, results
+
+    return asyncio.run(_poll())
+
+
+def test_harvest_when_triggered(vault, strategy, deposited, keeper, gov, token, caplog):
+    strategy.setMaxReportDelay(60, {"from": gov})
+    chain.sleep(120)
+    chain.mine()
+    last_report = vault.strategies(strategy).dict()["lastReport"]
+
+    with caplog.at_level(logging.INFO, logger="scripts.keeper"):
+        keeper_, _, [(block, actions)] = poll(keeper.address, [strategy.address])
+
+    assert actions == {strategy.address: "harvest"}
+    assert keeper_.strategies[0].pending is not None
+    assert vault.strategies(strategy).dict()["lastReport"] > last_report
+
+    # The transaction is reported with the state it was sent on
+    [sent] = [
+        r.getMessage() for r in caplog.records if "harvest sent" in r.getMessage()
+    ]
+    assert f"{token.address} in vault {vault.address}" in sent
+
+
+def test_tend_when_triggered(strategy, deposited, keeper, gov, accounts, weth):
+    # Too early to harvest, but the ETH is worth a tend
+    strategy.setMinReportDelay(10 ** 6, {"from": gov})
+    accounts.at(weth, force=True).transfer(strategy, Wei("10 ether"))
+
+    _, _, [(_, actions)] = poll(keeper.address, [strategy.address])
+
+    assert actions == {strategy.address: "tend"}
+    assert strategy.balance() == 0
+
+
+def test_nothing_to_do(strategy, deposited, keeper, gov):
+    strategy.setMinReportDelay(10 ** 6, {"from": gov})
+    keeper_, _, [(block, actions)] = poll(keeper.address, [strategy.address])
+
+    assert block == web3.eth.block_number
+    assert actions == {strategy.address: None}
+    assert keeper_.strategies[0].pending is None
+
+    # The state is read along with the triggers
+    state = keeper_.strategies[0].state
+    assert state.estimatedTotalAssets == strategy.estimatedTotalAssets()
+    assert state.swapConfig.minExpectedSwapPercentage == 9900
+
+
+def test_poll_many_strategies(
+    vault, test_vault, strategy, test_strategy, token, user, amount, keeper, gov
+):
+    for vault_, strategy_ in [(vault, strategy), (test_vault, test_strategy)]:
+        token.approve(vault_, amount // 2, {"from": user})
+        vault_.deposit(amount // 2, {"from": user})
+        strategy_.setMaxReportDelay(60, {"from": gov})
+    chain.sleep(120)
+    chain.mine()
+
+    _, rpc, [(_, actions)] = poll(
+        keeper.address, [strategy.address, test_strategy.address]
+    )
+
+    assert actions == {
+        strategy.address: "harvest",
+        test_strategy.address: "harvest",
+    }
+    assert vault.strategies(strategy).dict()["totalDebt"] > 0
+    assert test_vault.strategies(test_strategy).dict()["totalDebt"] > 0
+
+    # Triggers and state of both strategies are read in a single batch
+    assert len(rpc.batches[1]) == 6
+
+
+def test_immutables_are_read_once(vault, strategy, deposited, keeper, gov, token):
+    strategy.setMinReportDelay(10 ** 6, {"from": gov})
+
+    def want_calls(batch):
+        return [
+            request
+            for request in batch
+            if request[0] == "eth_call" and request[1][0]["data"] == "0x" + WANT.hex()
+        ]
+
+    keeper_, rpc, results = poll(keeper.address, [strategy.address], polls=2)
+
+    assert keeper_.strategies[0].want == token.address
+    assert keeper_.strategies[0].vault == vault.address
+    assert len(want_calls(rpc.batches[0])) == 1
+    assert not any(want_calls(batch) for batch in rpc.batches[1:])
+
+    # No new block, so the second poll stops after the first batch
+    assert results[1] is None
+    assert len(rpc.batches) == 3
+
+
+def test_dropped_transaction_is_given_up(strategy, deposited, keeper, gov):
+    strategy.setMaxReportDelay(60, {"from": gov})
+    chain.sleep(120)
+    chain.mine()
+
+    async def _poll():
+        async with aiohttp.ClientSession() as session:
+            rpc = RPC(web3.provider.endpoint_uri, session)
+            keeper_ = Keeper(rpc, [strategy.address], keeper.address, pending_timeout=3)
+            # A harvest that never makes it to a block
+            keeper_.strategies[0].pending = "0x" + "00" * 32
+            keeper_.strategies[0].pending_block = web3.eth.block_number
+            first = await keeper_.poll()
+            chain.mine(3)
+            second = await keeper_.poll()
+            return keeper_, first, second
+
+    keeper_, (_, first), (_, second) = asyncio.run(_poll())
+
+    # The strategy waits for the receipt, then is harvested again
+    assert first == {strategy.address: None}
+    assert second == {strategy.address: "harvest"}
+    assert keeper_.strategies[0].pending != "0x" + "00" * 32
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        # Batches not supported
+        '{"jsonrpc": "2.0", "id": null, "error": {"code": -32600, "message": ""}}',
+        # Reply to another request
+        '[{"jsonrpc": "2.0", "id": 1234, "result": "0x1"}]',
+        '[{"jsonrpc": "2.0", "result": "0x1"}]',
+        '[{"jsonrpc": "2.0", "id": 0}]',
+        '"0x1"',
+        "<html>",
+    ],
+)
+def test_malformed_replies(body):
+    rpc = RPC("http://localhost", Session(body))
+
+    with pytest.raises(RPCError):
+        asyncio.run(rpc.batch([("eth_blockNumber", [])]))
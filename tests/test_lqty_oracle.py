@@ -0,0 +1,101 @@
+import pytest
+
+from brownie import chain, reverts, Wei
+
+
+def push_lqty_price_down(protocol, lqty_whale, amount):
+    # Front-run: dump LQTY in the pool the strategy is about to sell on
+    router, lqty, weth = protocol["router"], protocol["lqty"], protocol["weth"]
+    lqty.approve(router, amount, {"from": lqty_whale})
+    router.exactInputSingle(
+        (lqty, weth, 3000, lqty_whale, chain.time() + 3600, amount, 0, 0),
+        {"from": lqty_whale},
+    )
+
+
+def test_set_lqty_twap_period_acl(strategy, gov, strategist, management, guardian):
+    # LQTY is priced over the last 30 minutes by default
+    assert strategy.priceConfig()[3] == 1800
+
+    strategy.setLQTYTwapPeriod(3600, {"from": gov})
+    assert strategy.priceConfig()[3] == 3600
+
+    # Other settings are kept
+    assert strategy.priceConfig()[:3] == (0, 0, 0)
+
+    for account in [strategist, management, guardian]:
+        with reverts("!authorized"):
+            strategy.setLQTYTwapPeriod(0, {"from": account})
+
+
+def test_lqty_to_want(local_only, strategy, gov):
+    # 1M LQTY for 2500 ETH at 3000 USD, i.e. 7.5 LUSD per LQTY
+    assert strategy.lqtyToWant(100 * 10 ** 18) == pytest.approx(
+        750 * 10 ** 18, rel=1e-3
+    )
+
+    strategy.setLQTYTwapPeriod(0, {"from": gov})
+    assert strategy.lqtyToWant(100 * 10 ** 18) == 0
+
+
+def test_lqty_sale_protected_from_manipulation(
+    local_only, test_strategy, protocol, lqty, lqty_whale
+):
+    lqty.transfer(test_strategy, 1_000 * 10 ** 18, {"from": lqty_whale})
+    push_lqty_price_down(protocol, lqty_whale, 100_000 * 10 ** 18)
+
+    # The average price does not move with the spot price
+    with reverts():
+        test_strategy.sellLQTYforDAI()
+
+
+def test_lqty_sale_without_price_protection(
+    local_only, test_strategy, gov, protocol, dai, lqty, lqty_whale
+):
+    test_strategy.setLQTYTwapPeriod(0, {"from": gov})
+    lqty.transfer(test_strategy, 1_000 * 10 ** 18, {"from": lqty_whale})
+    push_lqty_price_down(protocol, lqty_whale, 100_000 * 10 ** 18)
+
+    test_strategy.sellLQTYforDAI()
+
+    assert lqty.balanceOf(test_strategy) == 0
+    assert dai.balanceOf(test_strategy) > 0
+
+
+def test_lqty_sale_at_fair_price(local_only, test_strategy, dai, lqty, lqty_whale):
+    lqty.transfer(test_strategy, 1_000 * 10 ** 18, {"from": lqty_whale})
+
+    test_strategy.sellLQTYforDAI()
+
+    assert lqty.balanceOf(test_strategy) == 0
+    assert dai.balanceOf(test_strategy) >= 7_500 * 10 ** 18 * 0.99
+
+
+def test_single_swap_protected_from_manipulation(
+    local_only, test_strategy, gov, protocol, lqty, lqty_whale
+):
+    test_strategy.setConvertRewardsInSingleSwap(True, {"from": gov})
+    gov.transfer(test_strategy, Wei("1 ether"))
+    lqty.transfer(test_strategy, 1_000 * 10 ** 18, {"from": lqty_whale})
+    push_lqty_price_down(protocol, lqty_whale, 100_000 * 10 ** 18)
+
+    # The ETH leg alone would pass the WETH swap minimum
+    with reverts():
+        test_strategy.sellRewardsInSingleSwap()
+
+
+def test_harvest_with_lqty_price_unavailable(
+    vault, strategy, token, user, amount, gov, lqty, lqty_whale
+):
+    # A period the pool cannot look back on is like no price protection
+    strategy.setLQTYTwapPeriod(2 ** 32 - 1, {"from": gov})
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    lqty.transfer(strategy, 100 * 10 ** 18, {"from": lqty_whale})
+    chain.sleep(1)
+    strategy.harvest()
+
+    assert lqty.balanceOf(strategy) == 0
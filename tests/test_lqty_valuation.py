@@ -0,0 +1,91 @@
+import pytest
+
+from brownie import chain, reverts
+
+
+def test_set_lqty_valuation_acl(strategy, gov, strategist, management, guardian):
+    # LQTY is not counted by default
+    assert strategy.lqtyValuation() == (False, 0)
+
+    strategy.setLQTYValuation(True, 2_000, {"from": gov})
+    assert strategy.lqtyValuation() == (True, 2_000)
+
+    with reverts("dev: invalid haircut"):
+        strategy.setLQTYValuation(True, 10_001, {"from": gov})
+
+    for account in [strategist, management, guardian]:
+        with reverts("!authorized"):
+            strategy.setLQTYValuation(False, 0, {"from": account})
+
+
+def test_lqty_not_counted_by_default(strategy, lqty, lqty_whale):
+    total_assets = strategy.estimatedTotalAssets()
+
+    lqty.transfer(strategy, 100 * 10 ** 18, {"from": lqty_whale})
+
+    assert strategy.estimatedTotalAssets() == total_assets
+
+
+@pytest.mark.parametrize("haircut", [0, 2_000, 10_000])
+def test_lqty_counted_with_haircut(
+    local_only, strategy, gov, lqty, lqty_whale, haircut
+):
+    total_assets = strategy.estimatedTotalAssets()
+    strategy.setLQTYValuation(True, haircut, {"from": gov})
+    lqty.transfer(strategy, 100 * 10 ** 18, {"from": lqty_whale})
+
+    # 7.5 LUSD per LQTY on the local pools
+    lqty_value = strategy.lqtyToWant(100 * 10 ** 18)
+    assert lqty_value == pytest.approx(750 * 10 ** 18, rel=1e-3)
+    assert strategy.estimatedTotalAssets() == pytest.approx(
+        total_assets + lqty_value * (10_000 - haircut) // 10_000, rel=1e-9
+    )
+
+
+def test_pending_lqty_gains_are_counted(
+    local_only, vault, strategy, token, user, amount, gov, stability_pool
+):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    strategy.setLQTYValuation(True, 0, {"from": gov})
+    chain.sleep(24 * 3600)
+    chain.mine()
+
+    lqty_gain = stability_pool.getDepositorLQTYGain(strategy)
+    assert lqty_gain > 0
+    assert strategy.estimatedTotalAssets() == pytest.approx(
+        strategy.totalLUSDBalance() + strategy.lqtyToWant(lqty_gain), rel=1e-9
+    )
+
+
+def test_lqty_without_price_is_not_counted(strategy, gov, lqty, lqty_whale):
+    strategy.setLQTYTwapPeriod(0, {"from": gov})
+    strategy.setLQTYValuation(True, 0, {"from": gov})
+    total_assets = strategy.estimatedTotalAssets()
+
+    lqty.transfer(strategy, 100 * 10 ** 18, {"from": lqty_whale})
+
+    assert strategy.estimatedTotalAssets() == total_assets
+
+
+def test_lqty_price_follows_the_pool(
+    local_only, strategy, gov, protocol, lqty, lqty_whale
+):
+    strategy.setLQTYValuation(True, 0, {"from": gov})
+    lqty.transfer(strategy, 100 * 10 ** 18, {"from": lqty_whale})
+    lqty_price = strategy.lqtyToWant(10 ** 18)
+
+    # LQTY doubles its price in ETH
+    protocol["router"].setPool(
+        lqty, protocol["weth"], 3000, 1_000_000 * 10 ** 18, 5_000 * 10 ** 18
+    )
+    chain.mine()
+
+    assert strategy.lqtyToWant(10 ** 18) == pytest.approx(2 * lqty_price, rel=1e-3)
+    assert strategy.estimatedTotalAssets() == pytest.approx(
+        strategy.totalLUSDBalance() + strategy.lqtyToWant(100 * 10 ** 18),
+        rel=1e-9,
+    )
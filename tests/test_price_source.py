@@ -0,0 +1,173 @@
+from brownie import chain, reverts, Wei
+
+FETCH_PRICE, LAST_GOOD_PRICE, CHAINLINK, UNISWAP_TWAP = range(4)
+
+
+def price_fetches(tx, price_feed):
+    return [
+        call
+        for call in tx.subcalls
+        if call["to"] == price_feed.address
+        and call["function"].startswith("fetchPrice")
+    ]
+
+
+def test_set_price_source_acl(strategy, gov, strategist, management, guardian):
+    # Liquity's fetchPrice is used by default
+    assert strategy.priceConfig() == (FETCH_PRICE, 0, 0, 1800, 0)
+
+    strategy.setPriceSource(LAST_GOOD_PRICE, 3600, 0, {"from": gov})
+    assert strategy.priceConfig() == (LAST_GOOD_PRICE, 3600, 0, 1800, 0)
+
+    strategy.setPriceSource(UNISWAP_TWAP, 0, 1800, {"from": gov})
+    assert strategy.priceConfig() == (UNISWAP_TWAP, 0, 1800, 1800, 0)
+
+    for account in [strategist, management, guardian]:
+        with reverts("!authorized"):
+            strategy.setPriceSource(CHAINLINK, 3600, 0, {"from": account})
+
+
+def test_set_price_source_checks_parameters(strategy, gov):
+    with reverts("dev: invalid max price age"):
+        strategy.setPriceSource(LAST_GOOD_PRICE, 0, 1800, {"from": gov})
+
+    with reverts("dev: invalid max price age"):
+        strategy.setPriceSource(CHAINLINK, 0, 1800, {"from": gov})
+
+    with reverts("dev: invalid twap period"):
+        strategy.setPriceSource(UNISWAP_TWAP, 3600, 0, {"from": gov})
+
+    strategy.setPriceSource(FETCH_PRICE, 0, 0, {"from": gov})
+
+
+def test_fetch_price(test_strategy, gov, price_feed):
+    gov.transfer(test_strategy, Wei("1 ether"))
+
+    tx = test_strategy.sellETHforDAI()
+
+    assert len(price_fetches(tx, price_feed)) == 1
+    assert test_strategy.balance() == 0
+
+
+def test_last_good_price_is_refreshed_when_old(test_strategy, gov, price_feed):
+    test_strategy.setPriceSource(LAST_GOOD_PRICE, 3600, 0, {"from": gov})
+
+    # The strategy has never fetched the price
+    gov.transfer(test_strategy, Wei("1 ether"))
+    tx = test_strategy.sellETHforDAI()
+    assert len(price_fetches(tx, price_feed)) == 1
+    assert test_strategy.priceConfig()[4] == tx.timestamp
+
+    gov.transfer(test_strategy, Wei("1 ether"))
+    tx = test_strategy.sellETHforDAI()
+    assert len(price_fetches(tx, price_feed)) == 0
+
+    chain.sleep(3601)
+    gov.transfer(test_strategy, Wei("1 ether"))
+    tx = test_strategy.sellETHforDAI()
+    assert len(price_fetches(tx, price_feed)) == 1
+    assert test_strategy.balance() == 0
+
+
+def test_chainlink(test_strategy, gov, price_feed):
+    test_strategy.setPriceSource(CHAINLINK, 24 * 3600, 0, {"from": gov})
+    gov.transfer(test_strategy, Wei("1 ether"))
+
+    tx = test_strategy.sellETHforDAI()
+
+    assert len(price_fetches(tx, price_feed)) == 0
+    assert test_strategy.balance() == 0
+
+
+def test_uniswap_twap(test_strategy, gov, price_feed):
+    test_strategy.setPriceSource(UNISWAP_TWAP, 0, 1800, {"from": gov})
+    gov.transfer(test_strategy, Wei("1 ether"))
+
+    tx = test_strategy.sellETHforDAI()
+
+    assert len(price_fetches(tx, price_feed)) == 0
+    assert test_strategy.balance() == 0
+
+
+def test_single_swap_uses_price_source(
+    test_strategy, gov, price_feed, lqty, lqty_whale
+):
+    test_strategy.setPriceSource(CHAINLINK, 24 * 3600, 0, {"from": gov})
+    gov.transfer(test_strategy, Wei("1 ether"))
+    lqty.transfer(test_strategy, 100 * 10 ** 18, {"from": lqty_whale})
+
+    tx = test_strategy.sellRewardsInSingleSwap()
+
+    assert len(price_fetches(tx, price_feed)) == 0
+    assert test_strategy.balance() == 0
+
+
+def test_price_is_fetched_once_per_claim(
+    test_strategy, gov, price_feed, lqty, lqty_whale
+):
+    # The LQTY and ETH legs are sold separately with the same ETH price
+    gov.transfer(test_strategy, Wei("1 ether"))
+    lqty.transfer(test_strategy, 100 * 10 ** 18, {"from": lqty_whale})
+
+    tx = test_strategy.claimRewards()
+
+    assert len(price_fetches(tx, price_feed)) == 1
+    assert test_strategy.balance() == 0
+    assert lqty.balanceOf(test_strategy) == 0
+
+
+def test_lqty_only_claim_does_not_fetch_price(
+    test_strategy, gov, price_feed, lqty, lqty_whale
+):
+    # The minimum output of the LQTY sale is converted at lastGoodPrice
+    lqty.transfer(test_strategy, 100 * 10 ** 18, {"from": lqty_whale})
+
+    tx = test_strategy.claimRewards()
+
+    assert len(price_fetches(tx, price_feed)) == 0
+    assert lqty.balanceOf(test_strategy) == 0
+
+
+def test_minimum_output_follows_price_source(
+    local_only, test_strategy, gov, price_feed, eth_usd_aggregator
+):
+    # Liquity and Chainlink disagree with the ETH-DAI pool by a third
+    price_feed.setPrice(4_000 * 10 ** 18)
+    eth_usd_aggregator.setAnswer(4_000 * 10 ** 8)
+    gov.transfer(test_strategy, Wei("1 ether"))
+
+    for source in [FETCH_PRICE, CHAINLINK]:
+        test_strategy.setPriceSource(source, 24 * 3600, 1800, {"from": gov})
+        with reverts():
+            test_strategy.sellETHforDAI()
+
+    # The pool has been quoting ~3000 DAI for the last 30 minutes
+    test_strategy.setPriceSource(UNISWAP_TWAP, 0, 1800, {"from": gov})
+    test_strategy.sellETHforDAI()
+    assert test_strategy.balance() == 0
+
+
+def test_stale_chainlink_falls_back_to_fetch_price(
+    local_only, test_strategy, gov, price_feed, eth_usd_aggregator
+):
+    test_strategy.setPriceSource(CHAINLINK, 3600, 0, {"from": gov})
+    eth_usd_aggregator.setUpdatedAt(chain.time() - 2 * 3600)
+    gov.transfer(test_strategy, Wei("1 ether"))
+
+    tx = test_strategy.sellETHforDAI()
+
+    assert len(price_fetches(tx, price_feed)) == 1
+    assert test_strategy.balance() == 0
+
+
+def test_invalid_chainlink_answer_falls_back_to_fetch_price(
+    local_only, test_strategy, gov, price_feed, eth_usd_aggregator
+):
+    test_strategy.setPriceSource(CHAINLINK, 3600, 0, {"from": gov})
+    eth_usd_aggregator.setAnswer(0)
+    gov.transfer(test_strategy, Wei("1 ether"))
+
+    tx = test_strategy.sellETHforDAI()
+
+    assert len(price_fetches(tx, price_feed)) == 1
+    assert test_strategy.balance() == 0
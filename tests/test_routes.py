@@ -0,0 +1,191 @@
+import pytest
+
+from brownie import reverts, Wei
+
+
+def encode_path(tokens, fees):
+    # Uniswap v3 path: token + n * (fee + token)
+    path = bytes.fromhex(tokens[0].address[2:])
+    for fee, token in zip(fees, tokens[1:]):
+        path += fee.to_bytes(3, "big") + bytes.fromhex(token.address[2:])
+    return path
+
+
+@pytest.fixture
+def lqty_to_lusd(lqty, weth, dai, lusd):
+    yield encode_path([lqty, weth, dai, lusd], [3000, 3000, 500])
+
+
+@pytest.fixture
+def eth_to_lusd(weth, dai, lusd):
+    yield encode_path([weth, dai, lusd], [3000, 500])
+
+
+def test_set_route_acl(
+    strategy, lqty, gov, strategist, management, guardian, keeper, lqty_to_lusd
+):
+    assert strategy.routes(lqty) == "0x"
+
+    strategy.setRoute(lqty, lqty_to_lusd, {"from": gov})
+    assert strategy.routes(lqty) == "0x" + lqty_to_lusd.hex()
+
+    for account in [strategist, management, guardian, keeper]:
+        with reverts("!authorized"):
+            strategy.setRoute(lqty, lqty_to_lusd, {"from": account})
+
+    # Empty path goes back to the default route
+    strategy.setRoute(lqty, b"", {"from": gov})
+    assert strategy.routes(lqty) == "0x"
+
+
+def test_route_flags(strategy, gov, lqty, dai, lusd, lqty_to_lusd):
+    # Sales only read the routes of the tokens flagged in the swap config
+    assert strategy.swapConfig()[-3:] == (False, False, False)
+
+    strategy.setRoute(lqty, lqty_to_lusd, {"from": gov})
+    strategy.setRoute(dai, encode_path([dai, lusd], [500]), {"from": gov})
+    assert strategy.swapConfig()[-3:] == (True, False, True)
+
+    # The flags follow the routes, not the whole configuration
+    config = (True, False, False, False, 3000, 3000, 500, 9900, False, True, False)
+    strategy.setSwapConfig(config, {"from": gov})
+    assert strategy.swapConfig()[-3:] == (True, False, True)
+
+    strategy.setRoute(lqty, b"", {"from": gov})
+    assert strategy.swapConfig()[-3:] == (False, False, True)
+
+
+def test_set_route_validation(strategy, gov, lqty, weth, dai, lusd, lqty_to_lusd):
+    with reverts("dev: no route for token"):
+        strategy.setRoute(lusd, encode_path([lusd, dai], [500]), {"from": gov})
+
+    with reverts("dev: invalid path"):
+        strategy.setRoute(lqty, lqty_to_lusd[:-1], {"from": gov})
+
+    with reverts("dev: invalid path"):
+        strategy.setRoute(lqty, lqty.address, {"from": gov})
+
+    with reverts("dev: invalid first token"):
+        strategy.setRoute(weth, lqty_to_lusd, {"from": gov})
+
+    with reverts("dev: invalid last token"):
+        strategy.setRoute(lqty, encode_path([lqty, weth], [3000]), {"from": gov})
+
+    # DAI can only be sold for LUSD
+    with reverts("dev: invalid last token"):
+        strategy.setRoute(
+            dai, encode_path([dai, weth, dai], [3000, 3000]), {"from": gov}
+        )
+
+    strategy.setRoute(dai, encode_path([dai, lusd], [500]), {"from": gov})
+    strategy.setRoute(weth, encode_path([weth, dai], [500]), {"from": gov})
+
+
+def test_lqty_route_to_lusd(
+    test_strategy, gov, lqty, lqty_whale, dai, lusd, lqty_to_lusd
+):
+    test_strategy.setRoute(lqty, lqty_to_lusd, {"from": gov})
+    lqty.transfer(test_strategy, 1_000 * (10 ** lqty.decimals()), {"from": lqty_whale})
+
+    tx = test_strategy.sellLQTYforDAI()
+
+    assert tx.return_value > 0
+    assert lusd.balanceOf(test_strategy) == tx.return_value
+    assert lqty.balanceOf(test_strategy) == 0
+    assert dai.balanceOf(test_strategy) == 0
+
+
+def test_eth_route_to_lusd(test_strategy, gov, accounts, weth, dai, lusd, eth_to_lusd):
+    test_strategy.setRoute(weth, eth_to_lusd, {"from": gov})
+    accounts.at(weth, force=True).transfer(test_strategy, Wei("10 ether"))
+
+    tx = test_strategy.sellETHforDAI()
+
+    assert tx.return_value > 0
+    assert lusd.balanceOf(test_strategy) == tx.return_value
+    assert test_strategy.totalETHBalance() == 0
+    assert weth.balanceOf(test_strategy) == 0
+    assert dai.balanceOf(test_strategy) == 0
+
+
+def test_eth_route_with_no_slippage_reverts(
+    test_strategy, gov, accounts, weth, eth_to_lusd
+):
+    test_strategy.setRoute(weth, eth_to_lusd, {"from": gov})
+    accounts.at(weth, force=True).transfer(test_strategy, Wei("10 ether"))
+
+    # Set min expected swap to 102% of current chainlink price
+    test_strategy.setMinExpectedSwapPercentageUnchecked(10200)
+
+    with reverts():
+        test_strategy.sellETHforDAI()
+
+
+def test_eth_route_in_single_swap(
+    test_strategy, gov, accounts, weth, lqty, lqty_whale, dai, lusd, eth_to_lusd
+):
+    test_strategy.setRoute(weth, eth_to_lusd, {"from": gov})
+    test_strategy.setConvertRewardsInSingleSwap(True, {"from": gov})
+    accounts.at(weth, force=True).transfer(test_strategy, Wei("10 ether"))
+    lqty.transfer(test_strategy, 1_000 * (10 ** lqty.decimals()), {"from": lqty_whale})
+
+    tx = test_strategy.sellRewardsInSingleSwap()
+
+    assert lusd.balanceOf(test_strategy) == tx.return_value
+    assert weth.balanceOf(test_strategy) == 0
+    assert dai.balanceOf(test_strategy) == 0
+
+
+def test_dai_route(test_strategy, gov, dai, dai_whale, lusd):
+    test_strategy.setConvertDAItoLUSDonCurve(False, {"from": gov})
+    test_strategy.setRoute(dai, encode_path([dai, lusd], [123]), {"from": gov})
+    dai.transfer(test_strategy, 1_000 * (10 ** dai.decimals()), {"from": dai_whale})
+
+    # Setting a non-existent pool will cause the swap operation to revert
+    with reverts():
+        test_strategy.sellDAIforLUSD()
+
+    test_strategy.setRoute(dai, encode_path([dai, lusd], [500]), {"from": gov})
+    test_strategy.sellDAIforLUSD()
+
+    assert dai.balanceOf(test_strategy) == 0
+    assert lusd.balanceOf(test_strategy) > 0
+
+
+def test_harvest_with_routes_to_lusd(
+    chain,
+    token,
+    vault,
+    strategy,
+    user,
+    amount,
+    gov,
+    lqty,
+    lqty_whale,
+    weth,
+    accounts,
+    lqty_to_lusd,
+    eth_to_lusd,
+):
+    strategy.setRoute(lqty, lqty_to_lusd, {"from": gov})
+    strategy.setRoute(weth, eth_to_lusd, {"from": gov})
+
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    lqty.transfer(strategy, 5 * (10 ** lqty.decimals()), {"from": lqty_whale})
+    accounts.at(weth, force=True).transfer(strategy, Wei("0.01 ether"))
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    # LUSD from the swaps was accounted as profit and is back in the pool
+    profit = tx.events["Harvested"]["profit"]
+    assert profit > 0
+    assert vault.strategies(strategy).dict()["totalGain"] == profit
+    assert strategy.balanceOfWant() == 0
+    assert (
+        strategy.estimatedTotalAssets()
+        == vault.strategies(strategy).dict()["totalDebt"]
+    )
@@ -0,0 +1,192 @@
+import pytest
+
+from brownie import chain, reverts, Wei
+
+# Debt offset by the liquidations, 20% of the Stability Pool
+DEBT = 100_000_000 * 10 ** 18
+
+
+@pytest.fixture
+def deposited(deposited, strategy, gov):
+    # Rewards sent to the strategy are large compared to the deposit
+    strategy.setDoHealthCheck(False, {"from": gov})
+
+
+def test_set_max_sale_values_acl(
+    strategy, gov, strategist, management, keeper, guardian, user
+):
+    # Sales are not capped by default
+    assert strategy.maxETHSaleValue() == 0
+    assert strategy.maxLQTYSaleValue() == 0
+
+    for i, account in enumerate([gov, strategist, management, guardian]):
+        strategy.setMaxSaleValues(i + 1, i + 2, {"from": account})
+        assert strategy.maxETHSaleValue() == i + 1
+        assert strategy.maxLQTYSaleValue() == i + 2
+
+    for account in [keeper, user]:
+        with reverts("!authorized"):
+            strategy.setMaxSaleValues(1, 2, {"from": account})
+
+
+def test_set_sale_cap_interval_acl(
+    strategy, gov, strategist, management, keeper, guardian, user
+):
+    # An hour between capped sales by default
+    assert strategy.saleCapInterval() == 3600
+    assert strategy.lastCappedSale() == 0
+
+    for i, account in enumerate([gov, strategist, management, guardian]):
+        strategy.setSaleCapInterval(i, {"from": account})
+        assert strategy.saleCapInterval() == i
+
+    for account in [keeper, user]:
+        with reverts("!authorized"):
+            strategy.setSaleCapInterval(0, {"from": account})
+
+
+def test_eth_sale_is_capped(
+    vault, strategy, deposited, gov, keeper, accounts, weth, price_feed
+):
+    max_value = 500 * 10 ** 18
+    strategy.setMaxSaleValues(max_value, 0, {"from": gov})
+    accounts.at(weth, force=True).transfer(strategy, Wei("1 ether"))
+    eth_value = strategy.ethToWant(Wei("1 ether"))
+
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    max_amount = max_value * 10 ** 18 // price_feed.lastGoodPrice()
+    assert strategy.balance() == Wei("1 ether") - max_amount
+
+    # The ETH left is reported as profit and still accounted for
+    assert tx.events["Harvested"]["loss"] == 0
+    assert tx.events["Harvested"]["profit"] >= eth_value * 0.99
+    assert strategy.estimatedTotalAssets() == pytest.approx(
+        vault.strategies(strategy).dict()["totalDebt"], rel=1e-2
+    )
+
+    assert strategy.lastCappedSale() == tx.timestamp
+
+    # Following tends sell the rest once the sale cap interval has passed
+    strategy.tend({"from": keeper})
+    assert strategy.balance() == Wei("1 ether") - max_amount
+
+    chain.sleep(strategy.saleCapInterval())
+    strategy.tend({"from": keeper})
+    assert strategy.balance() == Wei("1 ether") - 2 * max_amount
+
+
+def test_harvests_in_a_row_wait_for_the_sale_cap_interval(
+    strategy, deposited, gov, accounts, weth, price_feed
+):
+    max_value = 500 * 10 ** 18
+    strategy.setMaxSaleValues(max_value, 0, {"from": gov})
+    accounts.at(weth, force=True).transfer(strategy, Wei("1 ether"))
+
+    chain.sleep(1)
+    strategy.harvest()
+
+    max_amount = max_value * 10 ** 18 // price_feed.lastGoodPrice()
+    assert strategy.balance() == Wei("1 ether") - max_amount
+
+    # The second harvest in a row does not sell again
+    chain.sleep(1)
+    tx = strategy.harvest()
+    assert strategy.balance() == Wei("1 ether") - max_amount
+    assert tx.events["Harvested"]["loss"] == 0
+
+    # Until the sale cap interval has passed
+    chain.sleep(strategy.saleCapInterval())
+    strategy.harvest()
+    assert strategy.balance() == Wei("1 ether") - 2 * max_amount
+
+
+def test_profit_in_eth_is_reported_as_far_as_lusd_allows(
+    vault, strategy, deposited, gov, accounts, weth
+):
+    # 10 ETH are worth more than the whole position in LUSD
+    strategy.setMaxSaleValues(1_000 * 10 ** 18, 0, {"from": gov})
+    accounts.at(weth, force=True).transfer(strategy, Wei("10 ether"))
+    eth_value = strategy.ethToWant(Wei("10 ether"))
+
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    profit = tx.events["Harvested"]["profit"]
+    assert tx.events["Harvested"]["loss"] == 0
+    assert 0 < profit < eth_value
+
+    # The rest is reported once the ETH is sold
+    strategy.setMaxSaleValues(0, 0, {"from": gov})
+    strategy.setDoHealthCheck(False, {"from": gov})
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    assert strategy.balance() == 0
+    assert profit + tx.events["Harvested"]["profit"] >= eth_value * 0.99
+
+
+def test_lqty_sale_is_capped(local_only, strategy, deposited, gov, lqty, lqty_whale):
+    # 1000 LQTY at ~7.5 LUSD
+    strategy.setMaxSaleValues(0, 1_500 * 10 ** 18, {"from": gov})
+    lqty.transfer(strategy, 1_000 * 10 ** 18, {"from": lqty_whale})
+
+    chain.sleep(1)
+    strategy.harvest()
+
+    assert lqty.balanceOf(strategy) == pytest.approx(800 * 10 ** 18, rel=1e-2)
+
+
+def test_capped_single_swap(strategy, deposited, gov, accounts, weth, price_feed):
+    strategy.setConvertRewardsInSingleSwap(True, {"from": gov})
+    max_value = 1_000 * 10 ** 18
+    strategy.setMaxSaleValues(max_value, 0, {"from": gov})
+    accounts.at(weth, force=True).transfer(strategy, Wei("10 ether"))
+
+    chain.sleep(1)
+    strategy.harvest()
+
+    max_amount = max_value * 10 ** 18 // price_feed.lastGoodPrice()
+    assert strategy.balance() == Wei("10 ether") - max_amount
+    assert weth.balanceOf(strategy) == 0
+
+
+def test_liquidation_gains_left_unsold_are_not_a_loss(
+    local_only, vault, strategy, deposited, gov, stability_pool
+):
+    # Liquidations burn LUSD for ETH worth ~10% more
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("36667 ether")})
+    strategy.setMaxSaleValues(1, 0, {"from": gov})
+
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    assert strategy.balance() > 0
+    assert tx.events["Harvested"]["loss"] == 0
+    assert tx.events["Harvested"]["profit"] > 0
+
+
+def test_capped_sale_does_not_trigger_again(
+    local_only, strategy, deposited, gov, stability_pool
+):
+    # Liquidations burn LUSD for ETH worth ~10% more
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("36667 ether")})
+    strategy.setMaxSaleValues(1_000 * 10 ** 18, 0, {"from": gov})
+    call_cost = Wei("0.001 ether")
+    assert strategy.harvestTrigger(call_cost) == True
+
+    chain.sleep(1)
+    strategy.harvest()
+    assert strategy.balance() > 0
+
+    # The ETH left has lost its premium over the LUSD it offset, but it is
+    # not sold again on the next block
+    chain.mine()
+    assert strategy.harvestTrigger(call_cost) == False
+    assert strategy.tendTrigger(call_cost) == False
+
+    chain.sleep(strategy.saleCapInterval())
+    chain.mine()
+    assert strategy.harvestTrigger(call_cost) == True
+    assert strategy.tendTrigger(call_cost) == True
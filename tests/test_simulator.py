@@ -0,0 +1,166 @@
+import numpy as np
+import pytest
+
+from brownie import ZERO_ADDRESS, Wei, chain
+
+from scripts.simulator import (
+    DEFAULT_POLICY,
+    StabilityPool,
+    grid,
+    market_scenarios,
+    simulate,
+    tile_market,
+)
+
+
+@pytest.fixture
+def stability_pool(local_only, mock_protocol):
+    stability_pool = mock_protocol["stability_pool"]
+    stability_pool.setLQTYIssuancePerSecond(10 ** 18 + 7)
+    yield stability_pool
+
+
+@pytest.fixture
+def depositor(accounts, mock_protocol, stability_pool):
+    mock_protocol["lusd"].mint(accounts[1], 10_000 * 10 ** 18)
+    mock_protocol["lusd"].approve(stability_pool, 2 ** 256 - 1, {"from": accounts[1]})
+    yield accounts[1]
+
+
+class Issuance:
+    # LQTY issued by the stand-in since the last operation that triggered it
+    def __init__(self, stability_pool):
+        self.rate = stability_pool.lqtyIssuancePerSecond()
+        self.last = stability_pool.lastLQTYIssuanceTime()
+
+    def __call__(self, tx):
+        issuance = (tx.timestamp - self.last) * self.rate
+        self.last = tx.timestamp
+        return issuance
+
+
+def pool_model(stability_pool):
+    epoch, scale = stability_pool.currentEpoch(), stability_pool.currentScale()
+    return StabilityPool(
+        1,
+        exact=True,
+        total_deposits=stability_pool.getTotalLUSDDeposits(),
+        P=stability_pool.P(),
+        scale=scale,
+        epoch=epoch,
+        S=stability_pool.epochToScaleToSum(epoch, scale),
+        G=stability_pool.epochToScaleToG(epoch, scale),
+        last_eth_error=stability_pool.lastETHError_Offset(),
+        last_lusd_loss_error=stability_pool.lastLUSDLossError_Offset(),
+        last_lqty_error=stability_pool.lastLQTYError(),
+    )
+
+
+def assert_matches(model, stability_pool, depositor):
+    assert model.total_deposits[0] == stability_pool.getTotalLUSDDeposits()
+    assert model.P[0] == stability_pool.P()
+    assert model.scale[0] == stability_pool.currentScale()
+    assert model.epoch[0] == stability_pool.currentEpoch()
+    assert model.compounded_deposit()[0] == stability_pool.getCompoundedLUSDDeposit(
+        depositor
+    )
+    assert model.eth_gain()[0] == stability_pool.getDepositorETHGain(depositor)
+    assert model.lqty_gain()[0] == stability_pool.getDepositorLQTYGain(depositor)
+
+
+def test_model_matches_stability_pool(stability_pool, depositor):
+    model = pool_model(stability_pool)
+    issuance = Issuance(stability_pool)
+    amount = 10_000 * 10 ** 18
+
+    tx = stability_pool.provideToSP(amount, ZERO_ADDRESS, {"from": depositor})
+    model.provide(amount, issuance(tx))
+    assert_matches(model, stability_pool, depositor)
+
+    def liquidate(debt, collateral):
+        chain.sleep(3_600)
+        tx = stability_pool.liquidate(debt, {"value": collateral})
+        model.offset(debt, collateral, issuance(tx))
+        assert_matches(model, stability_pool, depositor)
+
+    # Amounts that leave errors to be carried over
+    liquidate(stability_pool.getTotalLUSDDeposits() // 7, Wei("13.37 ether") + 1)
+    liquidate(12_345_678_901_234_567_890_123, 12_345)
+
+    chain.sleep(3_600)
+    tx = stability_pool.withdrawFromSP(amount // 3, {"from": depositor})
+    gains = model.withdraw(amount // 3, issuance(tx))
+    assert_matches(model, stability_pool, depositor)
+    assert gains.eth[0] == tx.events["ETHGainWithdrawn"]["_ETH"]
+    assert gains.lusd_loss[0] == tx.events["ETHGainWithdrawn"]["_LUSDLoss"]
+    assert gains.lqty[0] == tx.events["LQTYPaidToDepositor"]["_LQTY"]
+
+    # P would fall below the scale factor: the deposit is depleted beyond
+    # precision and gains span the scale change
+    total = stability_pool.getTotalLUSDDeposits()
+    liquidate(total - total // 10 ** 10, Wei("1 ether"))
+    assert model.scale[0] == 1
+    liquidate(stability_pool.getTotalLUSDDeposits() // 2, Wei("1 ether"))
+
+    # The pool is emptied and a new epoch starts
+    liquidate(stability_pool.getTotalLUSDDeposits(), Wei("1 ether"))
+    assert model.epoch[0] == 1
+
+    tx = stability_pool.provideToSP(amount // 3, ZERO_ADDRESS, {"from": depositor})
+    model.provide(amount // 3, issuance(tx))
+    assert_matches(model, stability_pool, depositor)
+
+
+def test_float_model_tracks_exact_model():
+    models = [
+        StabilityPool(3, exact=exact, total_deposits=500_000_000 * 10 ** 18)
+        for exact in [True, False]
+    ]
+    debts = [10 ** 25, 3 * 10 ** 26, 123_456_789 * 10 ** 18]
+
+    for model in models:
+        model.provide([10_000 * 10 ** 18, 10 ** 18, 10 ** 24], issuance=10 ** 21)
+        for share in [7, 3, 11]:
+            debt = [int(total) // share for total in model.total_deposits]
+            model.offset(debt, debts, issuance=10 ** 22)
+        model.withdraw(10 ** 18, issuance=10 ** 21)
+
+    exact, approximate = models
+    for view in ["compounded_deposit", "eth_gain", "lqty_gain"]:
+        assert getattr(approximate, view)() == pytest.approx(
+            getattr(exact, view)().astype(float), rel=1e-9
+        )
+
+
+def test_harvest_cadence():
+    rng = np.random.default_rng(0)
+    market = market_scenarios(rng, 100, 90, eth_volatility=0, lqty_volatility=0)
+    combinations, policy = grid(100, harvest_interval=[1, 7, 30])
+
+    results = simulate(tile_market(market, len(combinations)), policy)
+
+    daily, weekly, monthly = [
+        slice(i * 100, (i + 1) * 100) for i in range(len(combinations))
+    ]
+    assert np.all(results.harvests[weekly] + results.failed_harvests[weekly] >= 12)
+    assert np.all(results.harvests[monthly] <= 3)
+    assert np.all(results.apy > 0)
+    # Harvesting more often compounds more but pays more gas
+    assert np.mean(results.apy[daily]) > np.mean(results.apy[monthly])
+    assert np.all(results.gas_spent[daily] > results.gas_spent[monthly])
+
+    # ETH is sold at the liquidation premium on average
+    assert np.sum(results.eth_proceeds) > np.sum(results.lusd_loss)
+
+
+def test_harvests_revert_below_min_expected_swap_percentage():
+    rng = np.random.default_rng(0)
+    market = market_scenarios(rng, 100, 90, liquidations_per_year=100)
+    policy = DEFAULT_POLICY._replace(eth_swap_cost=200, lqty_swap_cost=0)
+
+    results = simulate(market, policy)
+
+    # ETH is never sold, nor anything else from the harvests with ETH gains
+    assert np.all(results.eth_sold == 0)
+    assert np.sum(results.failed_harvests) > 0
+    assert np.all(results.total_assets > 0)
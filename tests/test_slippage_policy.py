@@ -0,0 +1,157 @@
+import pytest
+
+from brownie import reverts, Wei
+
+# Strategy.SwapLeg
+ETH_TO_DAI, DAI_TO_LUSD_ON_CURVE, DAI_TO_LUSD_ON_UNISWAP = range(3)
+
+
+def test_no_slippage_policy_by_default(test_strategy):
+    for leg, fee in [(ETH_TO_DAI, 3000), (DAI_TO_LUSD_ON_CURVE, 0)]:
+        assert test_strategy.slippagePolicies(leg) == (False, 0, 0, 0)
+        # minExpectedSwapPercentage applies to every trade size
+        for amount in [10 ** 18, 10 ** 24]:
+            assert test_strategy.minExpectedPercentage(leg, fee, amount) == 9900
+
+
+def test_set_slippage_policy_acl(
+    strategy, gov, strategist, management, keeper, guardian, user
+):
+    policy = (True, 30, 10_000, 500)
+    for account in [gov, strategist, management, guardian]:
+        strategy.setSlippagePolicy(ETH_TO_DAI, policy, {"from": account})
+        assert strategy.slippagePolicies(ETH_TO_DAI) == policy
+
+    # Legs are configured independently
+    assert strategy.slippagePolicies(DAI_TO_LUSD_ON_CURVE) == (False, 0, 0, 0)
+
+    for account in [keeper, user]:
+        with reverts("!authorized"):
+            strategy.setSlippagePolicy(ETH_TO_DAI, policy, {"from": account})
+
+
+def test_set_slippage_policy_checks_bounds(strategy, gov):
+    with reverts("dev: invalid slippage"):
+        strategy.setSlippagePolicy(ETH_TO_DAI, (True, 600, 0, 500), {"from": gov})
+
+    with reverts("dev: invalid slippage"):
+        strategy.setSlippagePolicy(ETH_TO_DAI, (True, 0, 0, 10_001), {"from": gov})
+
+    # The impact factor may tolerate more than the estimated price impact
+    strategy.setSlippagePolicy(ETH_TO_DAI, (True, 0, 20_000, 10_000), {"from": gov})
+
+
+def test_curve_tolerance_scales_with_trade_size(local_only, test_strategy, gov):
+    test_strategy.setSlippagePolicy(
+        DAI_TO_LUSD_ON_CURVE, (True, 4, 1_000, 50), {"from": gov}
+    )
+
+    # 5M DAI against 50M LUSD in the pool
+    assert (
+        test_strategy.minExpectedPercentage(
+            DAI_TO_LUSD_ON_CURVE, 0, 5_000_000 * 10 ** 18
+        )
+        == 10_000 - 4 - 1_000 * 5 // 55
+    )
+
+    # Small trades are only allowed the base slippage
+    assert (
+        test_strategy.minExpectedPercentage(DAI_TO_LUSD_ON_CURVE, 0, 1_000 * 10 ** 18)
+        == 10_000 - 4
+    )
+
+    # Capped for trades as large as the pool
+    assert (
+        test_strategy.minExpectedPercentage(
+            DAI_TO_LUSD_ON_CURVE, 0, 50_000_000 * 10 ** 18
+        )
+        == 10_000 - 50
+    )
+
+
+def test_uniswap_tolerance_scales_with_trade_size(local_only, test_strategy, gov):
+    test_strategy.setSlippagePolicy(
+        ETH_TO_DAI, (True, 30, 10_000, 1_000), {"from": gov}
+    )
+    test_strategy.setSlippagePolicy(
+        DAI_TO_LUSD_ON_UNISWAP, (True, 5, 10_000, 1_000), {"from": gov}
+    )
+
+    # 1000 ETH against 100k ETH backing the in-range liquidity
+    assert test_strategy.minExpectedPercentage(
+        ETH_TO_DAI, 3000, 1_000 * 10 ** 18
+    ) == pytest.approx(10_000 - 30 - 10_000 * 1_000 / 101_000, abs=1)
+
+    # 1M DAI against 10M DAI in the 0.05% pool or 2M DAI in the 0.01% pool
+    assert (
+        test_strategy.minExpectedPercentage(
+            DAI_TO_LUSD_ON_UNISWAP, 500, 1_000_000 * 10 ** 18
+        )
+        == 10_000 - 5 - 10_000 // 11
+    )
+    assert (
+        test_strategy.minExpectedPercentage(
+            DAI_TO_LUSD_ON_UNISWAP, 100, 1_000_000 * 10 ** 18
+        )
+        == 10_000 - 1_000
+    )
+
+
+def test_missing_pool_uses_min_expected_swap_percentage(test_strategy, gov):
+    test_strategy.setSlippagePolicy(
+        ETH_TO_DAI, (True, 30, 10_000, 1_000), {"from": gov}
+    )
+
+    assert test_strategy.minExpectedPercentage(ETH_TO_DAI, 5511, 10 ** 18) == 9900
+
+
+def test_large_eth_sale_goes_through(local_only, test_strategy, accounts, weth, gov):
+    # Selling 5% of the pool loses ~5% to price impact and fees
+    accounts.at(weth, force=True).transfer(test_strategy, Wei("5000 ether"))
+    with reverts():
+        test_strategy.sellETHforDAI()
+
+    test_strategy.setSlippagePolicy(
+        ETH_TO_DAI, (True, 50, 10_000, 1_000), {"from": gov}
+    )
+    test_strategy.sellETHforDAI()
+
+    assert test_strategy.balance() == 0
+
+
+def test_large_dai_sale_on_uniswap_goes_through(
+    local_only, test_strategy, dai, dai_whale, gov
+):
+    test_strategy.setConvertDAItoLUSDonCurve(False, {"from": gov})
+    dai.transfer(test_strategy, 1_000_000 * 10 ** 18, {"from": dai_whale})
+    with reverts():
+        test_strategy.sellDAIforLUSD()
+
+    test_strategy.setSlippagePolicy(
+        DAI_TO_LUSD_ON_UNISWAP, (True, 10, 10_000, 1_500), {"from": gov}
+    )
+    test_strategy.sellDAIforLUSD()
+
+    assert dai.balanceOf(test_strategy) == 0
+
+
+def test_small_dai_sale_is_better_protected(
+    local_only, test_strategy, dai, dai_whale, gov
+):
+    # 1000 DAI lose 6 bps to the fees and price impact of the 0.05% pool,
+    # which minExpectedSwapPercentage allows but a 1 bp tolerance does not
+    test_strategy.setConvertDAItoLUSDonCurve(False, {"from": gov})
+    test_strategy.setSlippagePolicy(
+        DAI_TO_LUSD_ON_UNISWAP, (True, 1, 10_000, 100), {"from": gov}
+    )
+    dai.transfer(test_strategy, 1_000 * 10 ** 18, {"from": dai_whale})
+
+    with reverts():
+        test_strategy.sellDAIforLUSD()
+
+    test_strategy.setSlippagePolicy(
+        DAI_TO_LUSD_ON_UNISWAP, (True, 10, 10_000, 100), {"from": gov}
+    )
+    test_strategy.sellDAIforLUSD()
+
+    assert dai.balanceOf(test_strategy) == 0
@@ -0,0 +1,172 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from brownie import chain, Wei
+
+# Gas recorded by the benchmarks for the same scenarios, see benchmarks/
+GAS_BASELINE_PATH = Path(__file__).parents[1] / "benchmarks" / "gas_baseline.json"
+
+# Same default as the benchmarks' --gas-tolerance, in percent
+GAS_TOLERANCE = 2.0
+
+
+@pytest.fixture(scope="module")
+def gas_baseline(local):
+    # Baselines are recorded against the local mocks only
+    if not local:
+        yield None
+        return
+
+    assert (
+        GAS_BASELINE_PATH.exists()
+    ), "no gas baseline, record it with brownie test benchmarks --update-gas-baseline"
+    with GAS_BASELINE_PATH.open() as fp:
+        yield json.load(fp)
+
+
+def assert_gas_within_baseline(tx, gas_baseline, scenario):
+    # Reading the pool once must not cost more than the benchmark scenario
+    if gas_baseline is None:
+        return
+
+    assert (
+        scenario in gas_baseline
+    ), f"{scenario} has no baseline, record it with --update-gas-baseline"
+    limit = gas_baseline[scenario] * (1 + GAS_TOLERANCE / 100)
+    assert (
+        tx.gas_used <= limit
+    ), f"{scenario} used {tx.gas_used} gas, baseline {gas_baseline[scenario]}"
+
+
+def sp_calls(tx, stability_pool, fn_name):
+    # Calls issued to the Stability Pool getter `fn_name` during `tx`
+    return [
+        call
+        for call in tx.subcalls
+        if call["to"] == stability_pool.address
+        and call.get("function", "").startswith(f"{fn_name}(")
+    ]
+
+
+def test_harvest_reads_deposit_once(
+    chain, token, vault, strategy, user, amount, stability_pool, gas_baseline
+):
+    token.approve(vault.address, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    # Let LQTY rewards accrue so there is something to claim
+    chain.sleep(3600)
+
+    tx = strategy.harvest()
+
+    assert len(sp_calls(tx, stability_pool, "getCompoundedLUSDDeposit")) == 1
+    assert len(sp_calls(tx, stability_pool, "getDepositorETHGain")) == 1
+    assert len(sp_calls(tx, stability_pool, "getDepositorLQTYGain")) == 1
+    assert len(sp_calls(tx, stability_pool, "withdrawFromSP")) == 1
+    assert_gas_within_baseline(tx, gas_baseline, "harvest_dust_swapped")
+
+
+def test_harvest_without_gains_does_not_claim(
+    token, vault, strategy, user, amount, stability_pool, gas_baseline
+):
+    token.approve(vault.address, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+
+    # Nothing has been deposited to the Stability Pool yet
+    tx = strategy.harvest()
+
+    assert len(sp_calls(tx, stability_pool, "getCompoundedLUSDDeposit")) == 1
+    assert len(sp_calls(tx, stability_pool, "withdrawFromSP")) == 0
+    assert len(sp_calls(tx, stability_pool, "provideToSP")) == 1
+    assert_gas_within_baseline(tx, gas_baseline, "harvest_first_deposit")
+
+
+def test_withdrawal_reads_deposit_once(
+    chain,
+    token,
+    vault,
+    strategy,
+    user,
+    amount,
+    stability_pool,
+    RELATIVE_APPROX,
+    gas_baseline,
+):
+    token.approve(vault.address, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    tx = vault.withdraw(amount // 2, {"from": user})
+
+    assert len(sp_calls(tx, stability_pool, "getCompoundedLUSDDeposit")) == 1
+    assert len(sp_calls(tx, stability_pool, "withdrawFromSP")) == 1
+    assert pytest.approx(token.balanceOf(user), rel=RELATIVE_APPROX) == amount // 2
+    assert_gas_within_baseline(tx, gas_baseline, "withdraw_liquidate_position")
+
+
+def test_withdrawal_from_loose_want_does_not_call_stability_pool(
+    chain, token, vault, strategy, user, amount, gov, stability_pool, gas_baseline
+):
+    strategy.setIdleBufferRatio(1_000, {"from": gov})
+    token.approve(vault.address, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    tx = vault.withdraw(amount // 100, {"from": user})
+
+    assert not [call for call in tx.subcalls if call["to"] == stability_pool.address]
+    assert token.balanceOf(user) == amount // 100
+    assert_gas_within_baseline(tx, gas_baseline, "withdraw_idle_buffer")
+
+
+def test_emergency_exit_reads_deposit_once(
+    chain, token, vault, strategy, user, amount, accounts, weth, stability_pool
+):
+    token.approve(vault.address, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    # Pending ETH should not trigger additional Stability Pool reads
+    accounts.at(weth, force=True).transfer(strategy, Wei("1 ether"))
+
+    strategy.setEmergencyExit()
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    assert len(sp_calls(tx, stability_pool, "getCompoundedLUSDDeposit")) == 1
+    assert len(sp_calls(tx, stability_pool, "withdrawFromSP")) == 1
+
+
+def test_migration_reads_deposit_once(
+    chain,
+    token,
+    vault,
+    strategy,
+    user,
+    amount,
+    Strategy,
+    protocol_addresses,
+    strategist,
+    gov,
+    stability_pool,
+    gas_baseline,
+):
+    token.approve(vault.address, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    new_strategy = strategist.deploy(Strategy, vault, protocol_addresses)
+    tx = vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+
+    assert len(sp_calls(tx, stability_pool, "getCompoundedLUSDDeposit")) == 1
+    assert token.balanceOf(new_strategy) == amount
+    assert_gas_within_baseline(tx, gas_baseline, "migrate")
@@ -0,0 +1,188 @@
+import pytest
+
+from brownie import reverts
+from split_order import (
+    brute_force_split,
+    curve_venue,
+    greedy_split,
+    total_output,
+    uniswap_venue,
+)
+
+E = 10 ** 18
+
+
+@pytest.mark.parametrize(
+    "curve_balances,pools,amount,steps",
+    [
+        # Balanced Curve pool against the 0.05% and 0.01% Uniswap pools
+        ((50_000_000, 50_000_000), [(10_000_000, 500), (2_000_000, 100)], 20, 10),
+        # LUSD is expensive on Curve
+        ((5_000_000, 95_000_000), [(10_000_000, 500), (2_000_000, 100)], 20, 10),
+        # Small conversion fits in a single venue
+        ((50_000_000, 50_000_000), [(10_000_000, 500)], 0.001, 5),
+        # Shallow venues everywhere
+        ((500_000, 600_000), [(300_000, 500), (200_000, 100), (100_000, 3000)], 2, 8),
+        ((50_000_000, 50_000_000), [(10_000_000, 500)], 20, 1),
+    ],
+)
+def test_greedy_split_is_optimal(curve_balances, pools, amount, steps):
+    venues = [curve_venue([b * E for b in curve_balances], 200, 4_000_000)]
+    venues += [uniswap_venue(reserve * E, reserve * E, fee) for reserve, fee in pools]
+    amount = int(amount * 1_000_000) * E
+
+    greedy = greedy_split(amount, venues, steps)
+    best = brute_force_split(amount, venues, steps)
+
+    assert sum(greedy) == amount
+    # Up to rounding of the integer math, 1 wei per chunk
+    assert total_output(venues, greedy) >= total_output(venues, best) - steps
+
+
+def test_chunks_no_venue_pays_more_for_go_to_curve():
+    # Venues out of liquidity past 10 and 5 LUSD
+    venues = [lambda dai: min(dai, 10 * E), lambda dai: min(dai, 5 * E)]
+
+    amount_in = greedy_split(30 * E, venues, 6)
+
+    assert amount_in == [25 * E, 5 * E]
+    assert total_output(venues, amount_in) == 15 * E
+
+
+def test_set_split_order_acl(
+    strategy, gov, strategist, management, keeper, guardian, user
+):
+    # Orders are not split by default
+    assert strategy.splitOrderSteps() == 0
+
+    strategy.setSplitOrder([500], 1, {"from": gov})
+    assert strategy.splitOrderFees(0) == 500
+    assert strategy.splitOrderSteps() == 1
+
+    strategy.setSplitOrder([500, 100], 2, {"from": management})
+    assert strategy.splitOrderFees(1) == 100
+    assert strategy.splitOrderSteps() == 2
+
+    strategy.setSplitOrder([100], 3, {"from": strategist})
+    assert strategy.splitOrderSteps() == 3
+
+    strategy.setSplitOrder([], 0, {"from": guardian})
+    assert strategy.splitOrderSteps() == 0
+    with reverts():
+        strategy.splitOrderFees(0)
+
+    with reverts("!authorized"):
+        strategy.setSplitOrder([500], 1, {"from": keeper})
+
+    with reverts("!authorized"):
+        strategy.setSplitOrder([500], 1, {"from": user})
+
+    with reverts("dev: too many steps"):
+        strategy.setSplitOrder([500], 21, {"from": gov})
+
+
+@pytest.fixture
+def venues(local_only, protocol, test_strategy, gov, dai, lusd):
+    # Thin Curve pool with expensive LUSD so that large sales are worth splitting
+    protocol["curve_pool"].setBalances(5_000_000 * E, 20_000_000 * E)
+    # Price impact of these sales is way above the default 1% slippage
+    test_strategy.setMinExpectedSwapPercentage(5_000, {"from": gov})
+
+    # Models of the venues at their current state, Curve first
+    def build(fees):
+        curve_pool = protocol["curve_pool"]
+        balances = [curve_pool.balances(0), curve_pool.balances(1)]
+        models = [curve_venue(balances, curve_pool.A(), curve_pool.fee())]
+        for fee in fees:
+            reserve_in, reserve_out = protocol["router"].getReserves(dai, lusd, fee)
+            models.append(uniswap_venue(reserve_in, reserve_out, fee))
+        return models
+
+    yield build
+
+
+def sold_on_venues(protocol, dai, lusd, fees, before=None):
+    # DAI sold on every venue, read from the Curve balances and pool reserves
+    amounts = [protocol["curve_pool"].balances(1)]
+    amounts += [protocol["router"].getReserves(dai, lusd, fee)[0] for fee in fees]
+    if before is None:
+        return amounts
+    return [after - b for after, b in zip(amounts, before)]
+
+
+@pytest.mark.parametrize("steps", [1, 4, 10])
+def test_split_order_matches_reference(
+    test_strategy, gov, protocol, venues, dai, dai_whale, lusd, steps
+):
+    fees = [500, 100]
+    amount = 5_000_000 * E
+    test_strategy.setSplitOrder(fees, steps, {"from": gov})
+    dai.transfer(test_strategy, amount, {"from": dai_whale})
+
+    models = venues(fees)
+    expected = greedy_split(amount, models, steps)
+    before = sold_on_venues(protocol, dai, lusd, fees)
+
+    test_strategy.sellDAIforLUSD()
+
+    assert sold_on_venues(protocol, dai, lusd, fees, before) == expected
+    assert lusd.balanceOf(test_strategy) == total_output(models, expected)
+    assert dai.balanceOf(test_strategy) == 0
+
+    best = brute_force_split(amount, models, steps)
+    assert lusd.balanceOf(test_strategy) >= total_output(models, best) - steps
+
+
+def test_split_order_beats_single_venue(
+    test_strategy, gov, venues, dai, dai_whale, lusd
+):
+    fees = [500, 100]
+    amount = 5_000_000 * E
+    test_strategy.setSplitOrder(fees, 10, {"from": gov})
+    dai.transfer(test_strategy, amount, {"from": dai_whale})
+    models = venues(fees)
+
+    test_strategy.sellDAIforLUSD()
+
+    assert lusd.balanceOf(test_strategy) > max(venue(amount) for venue in models)
+
+
+def test_split_order_skips_missing_pools(
+    test_strategy, gov, protocol, venues, dai, dai_whale, lusd
+):
+    # There is no DAI-LUSD pool with a 123 fee
+    test_strategy.setSplitOrder([123, 500], 5, {"from": gov})
+    dai.transfer(test_strategy, 5_000_000 * E, {"from": dai_whale})
+    before = sold_on_venues(protocol, dai, lusd, [500])
+
+    test_strategy.sellDAIforLUSD()
+
+    assert sum(sold_on_venues(protocol, dai, lusd, [500], before)) == 5_000_000 * E
+    assert dai.balanceOf(test_strategy) == 0
+
+
+def test_split_order_defaults_to_curve(
+    test_strategy, gov, protocol, venues, dai, dai_whale, lusd
+):
+    # There is no DAI-LUSD pool with a 123 fee, so every chunk goes to Curve
+    amount = 1_000_000 * E
+    test_strategy.setSplitOrder([123], 5, {"from": gov})
+    dai.transfer(test_strategy, amount, {"from": dai_whale})
+    curve = venues([])[0]
+    before = sold_on_venues(protocol, dai, lusd, [])
+
+    test_strategy.sellDAIforLUSD()
+
+    assert sold_on_venues(protocol, dai, lusd, [], before) == [amount]
+    assert lusd.balanceOf(test_strategy) == curve(amount)
+
+
+def test_split_order_with_no_slippage_reverts(test_strategy, gov, dai, dai_whale):
+    test_strategy.setSplitOrder([500, 100], 5, {"from": gov})
+    dai.transfer(test_strategy, 1_000 * E, {"from": dai_whale})
+
+    # Set min expected swap to 105% of balance
+    test_strategy.setMinExpectedSwapPercentageUnchecked(10500)
+
+    with reverts():
+        test_strategy.sellDAIforLUSD()
@@ -0,0 +1,72 @@
+import pytest
+
+from brownie import chain, web3, Wei
+
+from scripts.strategy_state import (
+    decode_strategy_state,
+    get_strategy_state,
+    strategy_state_call,
+)
+
+
+@pytest.fixture
+def funded(vault, strategy, token, user, amount, accounts, weth, lqty, lqty_whale):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    accounts.at(weth, force=True).transfer(strategy, Wei("1 ether"))
+    lqty.transfer(strategy, 10 * 10 ** 18, {"from": lqty_whale})
+    chain.sleep(3600)
+    chain.mine(1)
+
+
+def test_state_matches_getters(strategy, funded, stability_pool, price_feed, dai):
+    state = strategy.getStrategyState().dict()
+
+    assert state["estimatedTotalAssets"] == strategy.estimatedTotalAssets()
+    assert state["wantBalance"] == strategy.balanceOfWant()
+    assert state["lusdDeposit"] == stability_pool.getCompoundedLUSDDeposit(strategy)
+    assert state["totalLUSDBalance"] == strategy.totalLUSDBalance()
+    assert state["ethBalance"] == Wei("1 ether")
+    assert state["ethGain"] == stability_pool.getDepositorETHGain(strategy)
+    assert state["totalETHBalance"] == strategy.totalETHBalance()
+    assert state["lqtyBalance"] == 10 * 10 ** 18
+    assert state["lqtyGain"] == stability_pool.getDepositorLQTYGain(strategy)
+    assert state["lqtyGain"] > 0
+    assert state["totalLQTYBalance"] == strategy.totalLQTYBalance()
+    assert state["daiBalance"] == dai.balanceOf(strategy)
+    assert state["lastGoodPrice"] == price_feed.lastGoodPrice()
+    assert state["swapConfig"] == strategy.swapConfig()
+
+
+def test_state_with_lqty_valuation(strategy, funded, gov):
+    strategy.setLQTYValuation(True, 2_000, {"from": gov})
+
+    state = strategy.getStrategyState().dict()
+    assert state["estimatedTotalAssets"] == strategy.estimatedTotalAssets()
+
+
+def test_state_with_dai_carried_over(strategy, funded, gov, dai, dai_whale):
+    strategy.setMinSellAmounts(0, 0, 10 * 10 ** 18, {"from": gov})
+    dai.transfer(strategy, 5 * 10 ** 18, {"from": dai_whale})
+
+    state = strategy.getStrategyState().dict()
+    assert state["daiBalance"] == 5 * 10 ** 18
+    assert state["estimatedTotalAssets"] == strategy.estimatedTotalAssets()
+
+
+def test_decode_strategy_state(strategy, funded, gov):
+    strategy.setSwapFees(500, 10_000, 100, {"from": gov})
+
+    data = web3.eth.call(strategy_state_call(strategy.address))
+    state = decode_strategy_state(data)
+
+    assert tuple(state) == strategy.getStrategyState()
+    assert state.swapConfig.daiToLusdFee == 100
+    assert state.ethBalance == Wei("1 ether")
+
+    # Hex strings are decoded as well
+    assert decode_strategy_state(data.hex()) == state
+    assert get_strategy_state(strategy.address) == state
@@ -0,0 +1,156 @@
+import pytest
+
+from brownie import chain, reverts
+
+
+# Order of the fields in Strategy.SwapConfig
+DEFAULT_SWAP_CONFIG = (
+    True,
+    False,
+    False,
+    False,
+    3000,
+    3000,
+    500,
+    9900,
+    False,
+    False,
+    False,
+)
+
+
+def test_default_swap_config(strategy):
+    assert strategy.swapConfig() == DEFAULT_SWAP_CONFIG
+
+    # Fields can still be read one by one
+    assert strategy.convertDAItoLUSDonCurve() == True
+    assert strategy.selectBestDAItoLUSDVenue() == False
+    assert strategy.convertRewardsInSingleSwap() == False
+    assert strategy.swapOnPoolsDirectly() == False
+    assert strategy.lqtyToEthFee() == 3000
+    assert strategy.ethToDaiFee() == 3000
+    assert strategy.daiToLusdFee() == 500
+    assert strategy.minExpectedSwapPercentage() == 9900
+
+
+def test_set_swap_config_acl(
+    strategy, gov, strategist, management, keeper, guardian, user
+):
+    config = (False, False, True, True, 10000, 500, 100, 9500, False, False, False)
+    strategy.setSwapConfig(config, {"from": gov})
+    assert strategy.swapConfig() == config
+
+    config = (True, False, False, True, 3000, 3000, 100, 9800, False, False, False)
+    strategy.setSwapConfig(config, {"from": management})
+    assert strategy.swapConfig() == config
+
+    config = (False, True, True, False, 500, 10000, 500, 9700, False, False, False)
+    strategy.setSwapConfig(config, {"from": strategist})
+    assert strategy.swapConfig() == config
+
+    strategy.setSwapConfig(DEFAULT_SWAP_CONFIG, {"from": guardian})
+    assert strategy.swapConfig() == DEFAULT_SWAP_CONFIG
+
+    with reverts("!authorized"):
+        strategy.setSwapConfig(config, {"from": keeper})
+
+    with reverts("!authorized"):
+        strategy.setSwapConfig(config, {"from": user})
+
+
+def test_set_swap_config_checks_bounds(strategy, gov):
+    with reverts("dev: invalid percentage"):
+        strategy.setSwapConfig(
+            (True, True, False, False, 3000, 3000, 500, 10001, False, False, False),
+            {"from": gov},
+        )
+
+    for fees in [(10 ** 6, 3000, 500), (3000, 10 ** 6, 500), (3000, 3000, 10 ** 6)]:
+        with reverts("dev: invalid fee"):
+            strategy.setSwapConfig(
+                (True, True, False, False) + fees + (9900, False, False, False),
+                {"from": gov},
+            )
+
+    # 100% is allowed
+    strategy.setSwapConfig(
+        (True, True, False, False, 3000, 3000, 500, 10000, False, False, False),
+        {"from": gov},
+    )
+    assert strategy.minExpectedSwapPercentage() == 10000
+
+
+def test_single_field_setters_check_bounds(strategy, gov):
+    with reverts("dev: invalid percentage"):
+        strategy.setMinExpectedSwapPercentage(10001, {"from": gov})
+
+    # Would not fit in the packed field
+    with reverts("dev: invalid percentage"):
+        strategy.setMinExpectedSwapPercentage(2 ** 16 + 9900, {"from": gov})
+
+    with reverts("dev: invalid fee"):
+        strategy.setSwapFees(3000, 3000, 10 ** 6, {"from": gov})
+
+    assert strategy.swapConfig() == DEFAULT_SWAP_CONFIG
+
+
+def test_single_field_setters_keep_other_fields(strategy, gov):
+    strategy.setSwapFees(100, 200, 300, {"from": gov})
+    strategy.setMinExpectedSwapPercentage(9500, {"from": gov})
+    strategy.setSwapOnPoolsDirectly(True, {"from": gov})
+    strategy.setConvertRewardsInSingleSwap(True, {"from": gov})
+
+    assert strategy.swapConfig() == (
+        True,
+        True,
+        True,
+        True,
+        100,
+        200,
+        300,
+        9500,
+        False,
+        False,
+        False,
+    )
+
+    # Choosing a venue turns off the selection of the best one
+    strategy.setConvertDAItoLUSDonCurve(False, {"from": gov})
+    assert strategy.swapConfig() == (
+        False,
+        False,
+        True,
+        True,
+        100,
+        200,
+        300,
+        9500,
+        False,
+        False,
+        False,
+    )
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        DEFAULT_SWAP_CONFIG,
+        # Single swap to LUSD on Uniswap pools
+        (False, False, True, True, 3000, 3000, 500, 9900, False, False, False),
+    ],
+)
+def test_harvest_with_swap_config(
+    vault, strategy, token, user, amount, gov, lqty, lqty_whale, config
+):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    strategy.setSwapConfig(config, {"from": gov})
+    lqty.transfer(strategy, 100 * 10 ** 18, {"from": lqty_whale})
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    assert lqty.balanceOf(strategy) == 0
+    assert tx.events["Harvested"]["profit"] > 0
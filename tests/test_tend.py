@@ -0,0 +1,102 @@
+from brownie import chain, reverts, Wei
+
+# Debt offset by the liquidations, 20% of the Stability Pool
+DEBT = 100_000_000 * 10 ** 18
+
+
+def test_tend_acl(local_only, strategy, deposited, gov, keeper, strategist, user):
+    strategy.tend({"from": keeper})
+    strategy.tend({"from": strategist})
+    strategy.tend({"from": gov})
+
+    with reverts("!authorized"):
+        strategy.tend({"from": user})
+
+
+def test_tend_compounds_gains(
+    local_only,
+    vault,
+    strategy,
+    deposited,
+    stability_pool,
+    lqty,
+    lqty_whale,
+    dai,
+    gov,
+    keeper,
+):
+    params = vault.strategies(strategy).dict()
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("50000 ether")})
+    lqty.transfer(strategy, 400 * 10 ** 18, {"from": lqty_whale})
+    deposit = stability_pool.getCompoundedLUSDDeposit(strategy)
+
+    tx = strategy.tend({"from": keeper})
+
+    # Gains are back in the Stability Pool as LUSD
+    assert stability_pool.getCompoundedLUSDDeposit(strategy) > deposit
+    assert stability_pool.getDepositorETHGain(strategy) == 0
+    assert strategy.totalETHBalance() == 0
+    assert strategy.totalLQTYBalance() == 0
+    assert dai.balanceOf(strategy) == 0
+    assert strategy.balanceOfWant() == 0
+
+    # Nothing was reported to the vault
+    assert "Harvested" not in tx.events
+    assert vault.strategies(strategy).dict() == params
+
+
+def test_harvest_after_tend_reports_profit(
+    local_only, vault, strategy, deposited, stability_pool, gov, keeper
+):
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("50000 ether")})
+    strategy.tend({"from": keeper})
+    total_assets = strategy.estimatedTotalAssets()
+    total_debt = vault.strategies(strategy).dict()["totalDebt"]
+
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    # LQTY issued since tend is sold as well
+    assert tx.events["Harvested"]["profit"] >= total_assets - total_debt > 0
+
+
+def test_tend_keeps_debt_outstanding(
+    local_only, vault, strategy, deposited, stability_pool, gov, keeper
+):
+    vault.updateStrategyDebtRatio(strategy, 5_000, {"from": gov})
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("50000 ether")})
+    deposit = stability_pool.getCompoundedLUSDDeposit(strategy)
+
+    strategy.tend({"from": keeper})
+
+    # LUSD from the gains stays in the strategy to pay back the vault
+    assert 0 < strategy.balanceOfWant() <= vault.debtOutstanding(strategy)
+    assert stability_pool.getCompoundedLUSDDeposit(strategy) == deposit
+    assert strategy.totalETHBalance() == 0
+
+
+def test_tend_trigger(local_only, strategy, deposited, stability_pool, gov):
+    assert strategy.tendTrigger(Wei("0.001 ether")) == False
+
+    # ~3,000 LUSD worth of ETH
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("50000 ether")})
+
+    # profitFactor is 100, the gains have to pay for 100 tends
+    assert strategy.tendTrigger(Wei("0.005 ether")) == True
+    assert strategy.tendTrigger(Wei("0.02 ether")) == False
+
+    # No tending once the strategy is exiting
+    strategy.setEmergencyExit({"from": gov})
+    assert strategy.tendTrigger(Wei("0.005 ether")) == False
+
+
+def test_tend_trigger_when_liquidation_premium_erodes(
+    local_only, strategy, deposited, stability_pool, price_feed, gov
+):
+    # 11% liquidation premium
+    stability_pool.liquidate(DEBT, {"from": gov, "value": Wei("37000 ether")})
+    assert strategy.tendTrigger(Wei("0.01 ether")) == False
+
+    # A 6.7% ETH price drop leaves a 3.6% premium
+    price_feed.setPrice(2_800 * 10 ** 18)
+    assert strategy.tendTrigger(Wei("0.01 ether")) == True
@@ -132,7 +132,7 @@ def test_eth_to_dai_with_no_slippage_reverts(test_strategy, accounts, weth, dai)
     accounts.at(weth, force=True).transfer(test_strategy, Wei("100 ether"))
 
     # Set min expected swap to 102% of current chainlink price
-    test_strategy.setMinExpectedSwapPercentage(10200)
+    test_strategy.setMinExpectedSwapPercentageUnchecked(10200)
 
     with reverts():
         test_strategy.sellETHforDAI()
@@ -174,7 +174,7 @@ def test_dai_to_lusd_swap_on_uniswap_with_no_slippage_reverts(
     )
 
     # Set min expected swap to 105% of balance
-    test_strategy.setMinExpectedSwapPercentage(10500)
+    test_strategy.setMinExpectedSwapPercentageUnchecked(10500)
 
     dai.transfer(test_strategy, 1_000 * (10 ** dai.decimals()), {"from": dai_whale})
 
@@ -205,7 +205,7 @@ def test_dai_to_lusd_swap_on_curve_with_no_slippage_reverts(
     test_strategy.setConvertDAItoLUSDonCurve(True, {"from": test_strategy.strategist()})
 
     # Set min expected swap to 105% of balance
-    test_strategy.setMinExpectedSwapPercentage(10500)
+    test_strategy.setMinExpectedSwapPercentageUnchecked(10500)
 
     dai.transfer(test_strategy, 1_000 * (10 ** dai.decimals()), {"from": dai_whale})
 
@@ -286,3 +286,108 @@ def test_claim_rewards_ends_in_lusd_using_curve(
     assert test_strategy.totalLQTYBalance() == 0
     assert test_strategy.totalETHBalance() == 0
     assert lusd.balanceOf(test_strategy) > 0
+
+
+def test_single_swap_acl(strategy, gov, strategist, management, keeper, guardian, user):
+    # Rewards are sold in separate swaps by default
+    assert strategy.convertRewardsInSingleSwap() == False
+
+    strategy.setConvertRewardsInSingleSwap(True, {"from": gov})
+    assert strategy.convertRewardsInSingleSwap() == True
+
+    strategy.setConvertRewardsInSingleSwap(False, {"from": management})
+    assert strategy.convertRewardsInSingleSwap() == False
+
+    strategy.setConvertRewardsInSingleSwap(True, {"from": strategist})
+    assert strategy.convertRewardsInSingleSwap() == True
+
+    strategy.setConvertRewardsInSingleSwap(False, {"from": guardian})
+    assert strategy.convertRewardsInSingleSwap() == False
+
+    with reverts("!authorized"):
+        strategy.setConvertRewardsInSingleSwap(True, {"from": keeper})
+
+    with reverts("!authorized"):
+        strategy.setConvertRewardsInSingleSwap(True, {"from": user})
+
+
+def router_calls(tx, strategy, router):
+    # Calls made by the strategy to the router, not the ones made by pools
+    return [
+        call
+        for call in tx.subcalls
+        if call["from"] == strategy.address and call["to"] == router.address
+    ]
+
+
+def test_claim_rewards_in_single_swap_using_curve(
+    test_strategy, protocol, accounts, lusd, dai, lqty, lqty_whale, weth
+):
+    test_strategy.setConvertRewardsInSingleSwap(
+        True, {"from": test_strategy.strategist()}
+    )
+    test_strategy.setConvertDAItoLUSDonCurve(True, {"from": test_strategy.strategist()})
+
+    accounts.at(weth, force=True).transfer(test_strategy, Wei("10 ether"))
+    lqty.transfer(test_strategy, 1_000 * (10 ** lqty.decimals()), {"from": lqty_whale})
+
+    tx = test_strategy.claimRewards()
+
+    print(
+        f"Swapped 10 ETH and 1000 LQTY for {lusd.balanceOf(test_strategy)/1e18:.2f} LUSD"
+    )
+
+    # LQTY->WETH and WETH->DAI, no ETH refunds
+    assert len(router_calls(tx, test_strategy, protocol["router"])) == 2
+    assert weth.balanceOf(test_strategy) == 0
+    assert dai.balanceOf(test_strategy) == 0
+    assert test_strategy.totalLQTYBalance() == 0
+    assert test_strategy.totalETHBalance() == 0
+    assert lusd.balanceOf(test_strategy) > 0
+
+
+def test_claim_rewards_in_single_swap_using_uniswap(
+    test_strategy, protocol, accounts, lusd, dai, lqty, lqty_whale, weth
+):
+    test_strategy.setConvertRewardsInSingleSwap(
+        True, {"from": test_strategy.strategist()}
+    )
+    test_strategy.setConvertDAItoLUSDonCurve(
+        False, {"from": test_strategy.strategist()}
+    )
+
+    accounts.at(weth, force=True).transfer(test_strategy, Wei("10 ether"))
+    lqty.transfer(test_strategy, 1_000 * (10 ** lqty.decimals()), {"from": lqty_whale})
+
+    tx = test_strategy.claimRewards()
+
+    # LQTY->WETH and WETH->DAI->LUSD
+    assert len(router_calls(tx, test_strategy, protocol["router"])) == 2
+    assert weth.balanceOf(test_strategy) == 0
+    assert dai.balanceOf(test_strategy) == 0
+    assert test_strategy.totalLQTYBalance() == 0
+    assert test_strategy.totalETHBalance() == 0
+    assert lusd.balanceOf(test_strategy) > 0
+
+
+def test_single_swap_with_only_eth(test_strategy, protocol, accounts, weth, dai):
+    accounts.at(weth, force=True).transfer(test_strategy, Wei("10 ether"))
+
+    tx = test_strategy.sellRewardsInSingleSwap()
+
+    assert len(router_calls(tx, test_strategy, protocol["router"])) == 1
+    assert test_strategy.totalETHBalance() == 0
+    assert dai.balanceOf(test_strategy) > 0
+
+
+def test_single_swap_with_no_slippage_reverts(
+    test_strategy, accounts, weth, lqty, lqty_whale
+):
+    accounts.at(weth, force=True).transfer(test_strategy, Wei("10 ether"))
+    lqty.transfer(test_strategy, 1_000 * (10 ** lqty.decimals()), {"from": lqty_whale})
+
+    # Set min expected swap to 102% of current chainlink price
+    test_strategy.setMinExpectedSwapPercentageUnchecked(10200)
+
+    with reverts():
+        test_strategy.sellRewardsInSingleSwap()